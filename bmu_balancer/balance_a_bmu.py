@@ -1,48 +1,145 @@
+from datetime import timedelta
 from typing import Optional
 
-from bmu_balancer.engine.main import run_engine
+from bmu_balancer.engine.adaptive import run_engine_adaptive
+from bmu_balancer.engine.main import BINARY, run_engine
+from bmu_balancer.io.binary import is_binary_input, load_binary_input_data
 from bmu_balancer.io.io import dump_solution, load_input_data
+from bmu_balancer.io.pushdown import load_boa_input_data
+from bmu_balancer.io.sqlite_store import ConnectionPool, is_sqlite_input, load_sqlite_input_data
+from bmu_balancer.io.streaming import stream_input_data
 from bmu_balancer.models import AssetState, Instruction, Rate
-from bmu_balancer.models.engine import Candidate, Solution
+from bmu_balancer.models.engine import Candidate, Solution, SolverOptions
+from bmu_balancer.operations.columnar import AssetStateColumns, InstructionColumns
 from bmu_balancer.operations.key_store import KeyStore, get_keys
-from bmu_balancer.operations.pre_solve.generate_instruction_candidates import generate_instruction_candidates
+from bmu_balancer.operations.pre_solve.generate_instruction_candidates import generate_candidate_set
+from bmu_balancer.operations.pre_solve.parallel_candidates import CHUNK_SIZE, generate_candidate_set_parallel
 from bmu_balancer.operations.post_solve.visualise import visualise
 
+# Every pre and post-solve lookup is by asset, so hash on it up front.
+ASSET_INDEX = ("asset",)
+
 
 def balance_a_bmu(
         input_filepath: str,
         output_filepath: Optional[str] = None,
         do_visualise: bool = False,
+        columnar_states: bool = False,
+        cache_input: bool = False,
+        stream_input: bool = False,
+        state_window: Optional[timedelta] = None,
+        append_output: bool = False,
+        vectorised_candidates: bool = False,
+        workers: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+        adaptive_grid: bool = False,
+        reduce_model: bool = False,
+        formulation: str = BINARY,
+        solver_options: Optional[SolverOptions] = None,
 ) -> Solution:
+    """Balance the BOA in the input file.
+
+    stream_input streams the state and instruction histories rather than
+    loading the whole file at once. Giving a state_window goes further
+    and only loads data for the BOA's BMU, with states within
+    state_window of the BOA, see load_boa_input_data.
+    input_filepath can also be a directory in the binary input format,
+    see convert_to_binary, or of CSV files, see load_csv_input_data, or a
+    SQLite file, see convert_to_sqlite.
+    append_output adds the solution to the end of a JSON Lines output_filepath,
+    so a batch of runs can share one output file.
+    vectorised_candidates generates the candidates for all assets at once,
+    which pays off for BMUs with many assets.
+    Giving workers instead generates them across that many processes,
+    chunk_size assets at a time, see generate_candidate_set_parallel.
+    adaptive_grid solves on a coarse mw grid first and then refines
+    around the chosen levels, see run_engine_adaptive.
+    reduce_model drops candidates that can't be optimal before the solve,
+    see reduce_candidates.
+    formulation picks how the engine solves, see run_engine, and
+    solver_options limits its time, gap and threads, see SolverOptions.
+    """
+    if vectorised_candidates and workers is not None:
+        raise RuntimeError("Candidates can be generated either vectorised or in parallel, not both.")
+    if cache_input and (stream_input or state_window is not None):
+        raise RuntimeError("Only whole input files are cached, so cache_input can't be used when streaming input.")
+    if columnar_states and is_sqlite_input(input_filepath):
+        raise RuntimeError("SQLite states are queried by index, so can't also be loaded as columns.")
+
+    # Only SQLite input holds connections, which are closed once the pre-solve is done with them
+    pool: Optional[ConnectionPool] = None
 
-    data = load_input_data(filepath=input_filepath)
-    rates = KeyStore(keys=get_keys(Rate), objects=data.rates)
+    # Streamed, binary and SQLite states and instructions come back already in queryable stores
+    if is_binary_input(input_filepath):
+        streamed = load_binary_input_data(directory=input_filepath)
+        data, states, instructions = streamed.data, streamed.states, streamed.instructions
+    elif is_sqlite_input(input_filepath):
+        streamed = load_sqlite_input_data(filepath=input_filepath)
+        data, states, instructions = streamed.data, streamed.states, streamed.instructions
+        pool = streamed.states.pool
+    elif state_window is not None:
+        streamed = load_boa_input_data(filepath=input_filepath, state_window=state_window, indexes=ASSET_INDEX)
+        data, states, instructions = streamed.data, streamed.states, streamed.instructions
+    elif stream_input:
+        streamed = stream_input_data(filepath=input_filepath, indexes=ASSET_INDEX)
+        data, states, instructions = streamed.data, streamed.states, streamed.instructions
+    else:
+        data = load_input_data(filepath=input_filepath, cache=cache_input)
+        # CSV input already gives states and instructions as columns
+        states = data.states
+        if not isinstance(states, AssetStateColumns):
+            states = KeyStore(keys=get_keys(AssetState), objects=data.states, indexes=ASSET_INDEX)
+        instructions = data.instructions
+        if not isinstance(instructions, InstructionColumns):
+            instructions = KeyStore(keys=get_keys(Instruction), objects=data.instructions, indexes=ASSET_INDEX)
+
+    rates = KeyStore(keys=get_keys(Rate), objects=data.rates, indexes=ASSET_INDEX)
+    if columnar_states and not isinstance(states, AssetStateColumns):
+        states = AssetStateColumns.from_states(data.states)
 
     # Pre-solve
-    candidates = generate_instruction_candidates(
-        boa=data.boa,
-        states=KeyStore(keys=get_keys(AssetState), objects=data.states),
-        instructions=KeyStore(keys=get_keys(Instruction), objects=data.instructions),
-        execution_time=data.parameters.execution_time,
-    )
+    try:
+        if workers is not None:
+            candidates = generate_candidate_set_parallel(
+                boa=data.boa,
+                states=states,
+                instructions=instructions,
+                execution_time=data.parameters.execution_time,
+                workers=workers,
+                chunk_size=chunk_size,
+            )
+        else:
+            candidates = generate_candidate_set(
+                boa=data.boa,
+                states=states,
+                instructions=instructions,
+                execution_time=data.parameters.execution_time,
+                vectorised=vectorised_candidates,
+            )
+    finally:
+        if pool is not None:
+            pool.close()
 
     # Engine
-    solution = run_engine(
+    solution = (run_engine_adaptive if adaptive_grid else run_engine)(
         boa=data.boa,
         rates=rates,
         candidates=candidates,
+        reduce=reduce_model,
+        formulation=formulation,
+        options=solver_options,
     )
 
     # Post-solve
     if output_filepath is not None:
-        dump_solution(filepath=output_filepath, solution=solution)
+        dump_solution(filepath=output_filepath, solution=solution, append=append_output)
 
     if do_visualise:
         visualise(
             boa=data.boa,
             rates=rates,
-            candidates=KeyStore(keys=get_keys(Candidate), objects=candidates),
-            instructions=KeyStore(keys=get_keys(Instruction), objects=solution.instructions),
+            candidates=KeyStore(keys=get_keys(Candidate), objects=candidates.to_candidates(), indexes=ASSET_INDEX),
+            instructions=KeyStore(keys=get_keys(Instruction), objects=solution.instructions, indexes=ASSET_INDEX),
         )
 
     return solution
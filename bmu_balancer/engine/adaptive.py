@@ -0,0 +1,123 @@
+import logging
+from dataclasses import replace
+from time import time
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from bmu_balancer.engine.main import BINARY, run_engine
+from bmu_balancer.engine.reduction import reduce_candidates
+from bmu_balancer.engine.solution import SOLVED, set_gap
+from bmu_balancer.models import BOA, Rate
+from bmu_balancer.models.engine import Candidate, CandidateSet, Solution, SolverOptions
+from bmu_balancer.operations.instruction_helpers import get_instruction_costs
+from bmu_balancer.operations.key_store import KeyStore
+
+log = logging.getLogger(__name__)
+
+COARSE_STEP = 100
+MAX_ROUNDS = 5
+
+
+def run_engine_adaptive(
+        boa: BOA,
+        rates: KeyStore[Rate],
+        candidates: Union[List[Candidate], CandidateSet],
+        coarse_step: float = COARSE_STEP,
+        max_rounds: int = MAX_ROUNDS,
+        reduce: bool = False,
+        formulation: str = BINARY,
+        options: Optional[SolverOptions] = None,
+) -> Solution:
+    """Solve on a coarse mw grid, then refine around the levels it chose.
+
+    The first solve only has each asset's candidates on multiples of
+    coarse_step, plus its lowest and highest, so the same total mw can
+    still be reached. Each later round has every candidate within
+    coarse_step of the asset's chosen level, widened upwards by the mw
+    left unassigned under the BOA so any asset can take it up. A round
+    always contains the previous solution, so the objective never gets
+    worse. Rounds stop once it stops improving, the candidates don't
+    change, or after max_rounds.
+
+    Falls back to solving on every candidate if the coarse solve
+    isn't optimal. reduce applies reduce_candidates to the fine grid
+    once, before any of the rounds. Each round is solved with formulation.
+    options' time limit is for all the rounds together, and rounds stop
+    once it's passed. The gap is against every candidate, not a round's.
+    """
+    if coarse_step <= 0:
+        raise RuntimeError(f"Coarse step must be positive, got {coarse_step}")
+    start = time()
+    options = options or SolverOptions()
+
+    def solve(round_candidates: CandidateSet) -> Solution:
+        round_options = replace(options, time_limit=options.get_time_left(start))
+        return run_engine(
+            boa=boa, rates=rates, candidates=round_candidates, formulation=formulation, options=round_options,
+        )
+
+    if not isinstance(candidates, CandidateSet):
+        candidates = CandidateSet.from_candidates(boa=boa, candidates=candidates)
+    if candidates.cost is None:
+        # Worked out once for the fine grid, each round takes a subset
+        candidates = replace(candidates, cost=get_instruction_costs(candidates=candidates, rates=rates))
+    if reduce:
+        candidates, _ = reduce_candidates(candidates)
+
+    positions = get_coarse_positions(candidates=candidates, step=coarse_step)
+    log.info(f"Solving on a coarse grid of {len(positions)} of {len(candidates)} candidates.")
+    solution = solve(candidates.take(positions))
+    if solution.status not in SOLVED:
+        log.warning(f"Coarse grid solve was {solution.status}, solving on every candidate.")
+        return solve(candidates)
+
+    for n in range(max_rounds):
+        time_left = options.get_time_left(start)
+        if time_left is not None and time_left <= 0:
+            log.warning("Out of time, stopping refining.")
+            break
+        previous = positions
+        positions = get_refined_positions(candidates=candidates, solution=solution, step=coarse_step)
+        if np.array_equal(positions, previous):
+            break
+        log.info(f"Refining round {n + 1} on {len(positions)} of {len(candidates)} candidates.")
+        refined = solve(candidates.take(positions))
+        if refined.status not in SOLVED or refined.objective <= solution.objective:
+            break
+        solution = refined
+
+    return set_gap(solution=solution, candidates=candidates, proven=False)
+
+
+def get_coarse_positions(candidates: CandidateSet, step: float) -> np.ndarray:
+    """Positions of the candidates on multiples of step, along with
+    each asset's lowest and highest, so every asset keeps its range."""
+    lowest, highest = get_asset_bounds(candidates=candidates)
+    on_grid = (
+        (np.remainder(candidates.mw, step) == 0)
+        | (candidates.mw == lowest[candidates.asset_index])
+        | (candidates.mw == highest[candidates.asset_index])
+    )
+    return np.flatnonzero(on_grid)
+
+
+def get_refined_positions(candidates: CandidateSet, solution: Solution, step: float) -> np.ndarray:
+    """Positions of the candidates within step of each asset's level in
+    solution, widened upwards by the mw the solution left unassigned."""
+    levels = {instruction.asset: instruction.mw for instruction in solution.instructions}
+    chosen = np.array([levels.get(asset, 0) for asset in candidates.assets], dtype=np.float64)
+    residual = max(candidates.boa.mw - chosen.sum(), 0)
+
+    mw = candidates.mw
+    level = chosen[candidates.asset_index]
+    return np.flatnonzero((mw >= level - step) & (mw <= level + step + residual))
+
+
+def get_asset_bounds(candidates: CandidateSet) -> Tuple[np.ndarray, np.ndarray]:
+    """The lowest and highest candidate mw of each asset."""
+    lowest = np.full(len(candidates.assets), np.inf)
+    highest = np.full(len(candidates.assets), -np.inf)
+    np.minimum.at(lowest, candidates.asset_index, candidates.mw)
+    np.maximum.at(highest, candidates.asset_index, candidates.mw)
+    return lowest, highest
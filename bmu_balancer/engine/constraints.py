@@ -1,37 +1,35 @@
-from collections import defaultdict
-
-from pulp import LpProblem
+from pulp import LpConstraint, LpConstraintEQ, LpConstraintLE, LpProblem
 
+from bmu_balancer.engine.reduction import get_profit_margins
 from bmu_balancer.models.engine import Variables
 from bmu_balancer.models.inputs import BOA
 
 
 def add_constraints(model: LpProblem, variables: Variables, boa: BOA) -> None:
-    asset_to_ics = defaultdict(list)
-
-    # Minimum profit a customer has to make to run an asset
-    for candidate, var in variables.candidates.items():
-        if candidate.mw != 0:
-            model += (
-                var * boa.price_mw_hr * candidate.hours
-                >=
-                candidate.asset.min_required_profit * var
-            )
-        asset_to_ics[candidate.asset].append(candidate)
+    """Add the constraints, each row built directly from its (variable, coefficient)
+    pairs rather than by summing var * coefficient terms, which is quadratic."""
+    candidates = variables.candidates
+    mws = candidates.mw.tolist()
+
+    # Minimum profit a customer has to make to run an asset,
+    # var * price * hours >= min_required_profit * var, which for a binary either always
+    # holds or forces it to 0. So rather than a row per candidate, those it would force
+    # off are bounded to 0.
+    for var, mw, margin in zip(variables.selected, mws, get_profit_margins(candidates).tolist()):
+        if mw != 0 and margin < 0:
+            var.upBound = 0
 
     # Asset can only be assigned once
-    for asset, candidates in asset_to_ics.items():
-        model += (
-            sum(
-                variables.candidates[candidate]
-                for candidate in candidates
-            ) == 1
+    for group in candidates.get_asset_groups():
+        model += LpConstraint(
+            [(variables.selected[n], 1) for n in group.tolist()],
+            sense=LpConstraintEQ,
+            rhs=1,
         )
 
     # Total value is less than boa
-    model += sum(
-        var * candidate.mw
-        for candidate, var in variables.candidates.items()
-    ) <= boa.mw
-
-
+    model += LpConstraint(
+        list(zip(variables.selected, mws)),
+        sense=LpConstraintLE,
+        rhs=boa.mw,
+    )
@@ -0,0 +1,130 @@
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+from pulp import (
+    LpAffineExpression,
+    LpBinary,
+    LpConstraint,
+    LpConstraintEQ,
+    LpConstraintLE,
+    LpInteger,
+    LpProblem,
+    LpVariable,
+    value,
+)
+
+from bmu_balancer.engine.reduction import get_profit_margins
+from bmu_balancer.engine.solution import SOLVED, get_status
+from bmu_balancer.models.engine import AssetSteps, CandidateSet, Solution, StepVariables
+from bmu_balancer.models.inputs import BOA
+
+log = logging.getLogger(__name__)
+
+# Relative tolerance for treating an asset's objective as linear in its mw
+LINEAR_TOLERANCE = 1e-9
+
+
+def create_step_variables(candidates: CandidateSet) -> StepVariables:
+    """An integer step variable for each asset whose options are an evenly
+    spaced mw grid with an objective linear in mw, a binary per candidate
+    for the rest.
+
+    The candidates' objective is price * hours * mw less a cost that's
+    linear in mw, and an asset's candidates share their hours, so on the
+    pre-solve's grids the objective is linear in the number of steps and
+    the two formulations have the same solutions.
+    """
+    objective = candidates.objective
+    forced_off = (candidates.mw != 0) & (get_profit_margins(candidates) < 0)
+
+    steps: Dict[int, AssetSteps] = {}
+    selected: Dict[int, LpVariable] = {}
+    for n, group in enumerate(candidates.get_asset_groups()):
+        group = group[np.argsort(candidates.mw[group], kind='stable')]
+        asset_steps = None
+        if not np.any(forced_off[group]):
+            asset_steps = get_asset_steps(n=n, positions=group, mw=candidates.mw[group], objective=objective[group])
+        if asset_steps is not None:
+            steps[n] = asset_steps
+        else:
+            for position in group.tolist():
+                selected[position] = LpVariable(name=f"var__candidate({position})", cat=LpBinary)
+                if forced_off[position]:
+                    # Min profit a customer has to make to run an asset, see add_constraints
+                    selected[position].upBound = 0
+
+    log.info(f"{len(steps)} of {len(candidates.assets)} assets modelled with integer steps.")
+    return StepVariables(candidates=candidates, steps=steps, selected=selected)
+
+
+def get_asset_steps(n: int, positions: np.ndarray, mw: np.ndarray, objective: np.ndarray) -> Optional[AssetSteps]:
+    """The asset's options as integer steps, or None if they
+    aren't an evenly spaced grid with a linear objective."""
+    if len(positions) < 2:
+        return None
+    step = mw[1] - mw[0]
+    if step == 0 or np.any(mw != mw[0] + step * np.arange(len(mw))):
+        return None
+    slope = (objective[-1] - objective[0]) / (len(objective) - 1)
+    linear = objective[0] + slope * np.arange(len(objective))
+    scale = max(np.abs(objective).max(), 1.0)
+    if np.any(np.abs(objective - linear) > LINEAR_TOLERANCE * scale):
+        return None
+
+    return AssetSteps(
+        positions=positions,
+        first=float(mw[0]),
+        step=float(step),
+        variable=LpVariable(name=f"var__steps({n})", lowBound=0, upBound=len(positions) - 1, cat=LpInteger),
+    )
+
+
+def set_step_objective(model: LpProblem, variables: StepVariables) -> None:
+    objective = variables.candidates.objective
+    terms = []
+    constant = 0.0
+    for asset_steps in variables.steps.values():
+        first, last = float(objective[asset_steps.positions[0]]), float(objective[asset_steps.positions[-1]])
+        constant += first
+        terms.append((asset_steps.variable, (last - first) / (asset_steps.count - 1)))
+    terms.extend((var, float(objective[position])) for position, var in variables.selected.items())
+    model += LpAffineExpression(terms, constant=constant)
+
+
+def add_step_constraints(model: LpProblem, variables: StepVariables, boa: BOA) -> None:
+    candidates = variables.candidates
+
+    # Asset can only be assigned once, which the step variables meet by construction
+    groups: Dict[int, List[LpVariable]] = {}
+    for position, var in variables.selected.items():
+        groups.setdefault(int(candidates.asset_index[position]), []).append(var)
+    for group in groups.values():
+        model += LpConstraint([(var, 1) for var in group], sense=LpConstraintEQ, rhs=1)
+
+    # Total value is less than boa, with the steps' first mw moved to the right hand side
+    terms = [(asset_steps.variable, asset_steps.step) for asset_steps in variables.steps.values()]
+    terms.extend((var, float(candidates.mw[position])) for position, var in variables.selected.items())
+    first_mw = sum(asset_steps.first for asset_steps in variables.steps.values())
+    model += LpConstraint(terms, sense=LpConstraintLE, rhs=boa.mw - first_mw)
+
+
+def get_step_solution(model: LpProblem, variables: StepVariables) -> Solution:
+    status = get_status(model=model)
+    if status not in SOLVED:
+        return Solution(status=status)
+
+    chosen = [
+        int(asset_steps.positions[int(round(asset_steps.variable.varValue))])
+        for asset_steps in variables.steps.values()
+    ]
+    chosen.extend(position for position, var in variables.selected.items() if var.varValue > 0)
+    # In candidate order, as the binary formulation gives them
+    instructions = [variables.candidates.get_instruction(n) for n in sorted(chosen)]
+    log.info(f"Got {len(instructions)} instructions choices.")
+
+    return Solution(
+        status=status,
+        objective=value(model.objective),
+        instructions=instructions,
+    )
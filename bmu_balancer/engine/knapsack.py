@@ -0,0 +1,145 @@
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from bmu_balancer.engine.reduction import get_profit_margins
+from bmu_balancer.models.engine import CandidateSet, Solution
+
+log = logging.getLogger(__name__)
+
+# Most partial solutions a single asset may combine before giving up for the model
+MAX_STATES = 1_000_000
+# Bisection steps on the mw price of get_objective_bound
+BOUND_ITERATIONS = 60
+
+
+def solve_knapsack(candidates: CandidateSet, max_states: int = MAX_STATES) -> Optional[Solution]:
+    """Solve the model directly, as the multiple-choice knapsack it is.
+
+    Picks exactly one candidate per asset, keeping the total mw within
+    the boa and maximising the objective, with the same min required
+    profit rule as add_constraints. If each asset's best candidate
+    already fits it's taken straight away. Otherwise the assets are
+    added one at a time, keeping only the Pareto frontier of partial
+    solutions, those no other has both no more mw and no less
+    objective, and dropping any that can't fit whatever the rest
+    choose. Gives None if the frontier grows past max_states, to fall
+    back to the model. Candidate costs must already be set.
+    """
+    allowed = get_allowed(candidates=candidates)
+    objective = candidates.objective
+    groups = [group[allowed[group]] for group in candidates.get_asset_groups()]
+    if any(len(group) == 0 for group in groups):
+        return Solution(status="Infeasible")
+
+    # Fast bound, the best candidate of each asset on its own
+    best = [int(group[np.argmax(objective[group])]) for group in groups]
+    if candidates.mw[best].sum() <= candidates.boa.mw:
+        log.info("Best candidate of every asset fits the boa.")
+        return get_knapsack_solution(candidates=candidates, chosen=best)
+
+    # Least mw the assets still to be added can bring, so partial solutions that can't fit are dropped early
+    lowest = np.array([candidates.mw[group].min() for group in groups] + [0.0])
+    still_to_come = np.cumsum(lowest[::-1])[::-1][1:]
+
+    mw, value = np.zeros(1), np.zeros(1)
+    layers = []
+    for group, remaining in zip(groups, still_to_come):
+        if len(mw) * len(group) > max_states:
+            log.info(f"Knapsack frontier of {len(mw)} states is too large, solving the model instead.")
+            return None
+        # Every frontier state with every candidate of the asset
+        state = np.repeat(np.arange(len(mw)), len(group))
+        option = np.tile(group, len(mw))
+        mw, value = mw[state] + candidates.mw[option], value[state] + objective[option]
+
+        fits = mw + remaining <= candidates.boa.mw
+        if not fits.any():
+            return Solution(status="Infeasible")
+        kept = np.flatnonzero(fits)[get_frontier(mw=mw[fits], value=value[fits])]
+        mw, value = mw[kept], value[kept]
+        layers.append((state[kept], option[kept]))
+
+    # Walk the best state back through the layers for its candidates
+    chosen = []
+    n = int(np.argmax(value))
+    for state, option in reversed(layers):
+        chosen.append(int(option[n]))
+        n = int(state[n])
+    return get_knapsack_solution(candidates=candidates, chosen=chosen)
+
+
+def get_objective_bound(candidates: CandidateSet, iterations: int = BOUND_ITERATIONS) -> Optional[float]:
+    """An upper bound on the objective of any solution, None if none fit the boa.
+
+    For any price on mw, the boa's mw at that price plus each asset's
+    best objective less its mw at that price is a bound, as it's the
+    objective with the mw constraint moved into it. The bound is convex
+    in the price and is minimised by bisection, which tends to the
+    knapsack's LP relaxation. Candidate costs must already be set.
+    """
+    positions = np.flatnonzero(get_allowed(candidates=candidates))
+    positions = positions[np.argsort(candidates.asset_index[positions], kind='stable')]
+    asset_index = candidates.asset_index[positions]
+    if len(np.unique(asset_index)) < len(candidates.assets):
+        return None
+    firsts = np.flatnonzero(np.diff(asset_index, prepend=-1))
+    mw, objective, boa_mw = candidates.mw[positions], candidates.objective[positions], candidates.boa.mw
+    if np.minimum.reduceat(mw, firsts).sum() > boa_mw:
+        return None
+
+    def relax(price: float) -> Tuple[float, float]:
+        """The bound at price, and the mw of the choices giving it."""
+        adjusted = objective - price * mw
+        best = np.maximum.reduceat(adjusted, firsts)
+        best_mw = np.where(adjusted == np.repeat(best, np.diff(np.append(firsts, len(mw)))), mw, np.inf)
+        return price * boa_mw + best.sum(), np.minimum.reduceat(best_mw, firsts).sum()
+
+    bound, used = relax(0.0)
+    if used <= boa_mw:
+        return float(bound)
+
+    # The price is raised until the choices fit, then narrowed down between the two
+    low, high = 0.0, 1.0
+    for _ in range(iterations):
+        high_bound, used = relax(high)
+        bound = min(bound, high_bound)
+        if used <= boa_mw:
+            break
+        low, high = high, high * 2
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        middle_bound, used = relax(middle)
+        bound = min(bound, middle_bound)
+        if used <= boa_mw:
+            high = middle
+        else:
+            low = middle
+    return float(bound)
+
+
+def get_allowed(candidates: CandidateSet) -> np.ndarray:
+    """Mask of the candidates the min required profit rule of add_constraints leaves on."""
+    return ~((candidates.mw != 0) & (get_profit_margins(candidates) < 0))
+
+
+def get_frontier(mw: np.ndarray, value: np.ndarray) -> np.ndarray:
+    """Positions of the states no other has both no more mw and no less value,
+    in order of mw. Of equal states the first is kept."""
+    order = np.lexsort((np.arange(len(mw)), -value, mw))
+    sorted_value = value[order]
+    best_before = np.maximum.accumulate(np.concatenate(([-np.inf], sorted_value[:-1])))
+    return order[sorted_value > best_before]
+
+
+def get_knapsack_solution(candidates: CandidateSet, chosen: List[int]) -> Solution:
+    chosen = sorted(chosen)
+    instructions = [candidates.get_instruction(n) for n in chosen]
+    log.info(f"Got {len(instructions)} instructions choices.")
+    return Solution(
+        status="Optimal",
+        objective=float(candidates.objective[chosen].sum()),
+        instructions=instructions,
+        gap=0.0,
+    )
@@ -1,40 +1,93 @@
 import logging
 import sys
+from dataclasses import replace
 from time import time
-from typing import List
+from typing import List, Optional, Union
 
-from pulp import LpMaximize, LpProblem, LpStatus
+from pulp import PULP_CBC_CMD, LpMaximize, LpProblem
 
 from bmu_balancer.engine.constraints import add_constraints
+from bmu_balancer.engine.integer_steps import (
+    add_step_constraints,
+    create_step_variables,
+    get_step_solution,
+    set_step_objective,
+)
+from bmu_balancer.engine.knapsack import solve_knapsack
 from bmu_balancer.engine.objective import set_objective
-from bmu_balancer.engine.solution import get_solution
+from bmu_balancer.engine.reduction import reduce_candidates
+from bmu_balancer.engine.solution import get_solution, get_status, set_gap
 from bmu_balancer.engine.variables import create_variables
 from bmu_balancer.models import BOA, Rate
-from bmu_balancer.models.engine import Candidate, Solution
+from bmu_balancer.models.engine import Candidate, CandidateSet, Solution, SolverOptions
+from bmu_balancer.operations.instruction_helpers import get_instruction_costs
 from bmu_balancer.operations.key_store import KeyStore
 
 log = logging.getLogger(__name__)
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 
+# A binary per candidate, or an integer number of mw steps per asset, see create_step_variables,
+# or solved directly without a model, see solve_knapsack
+BINARY = "binary"
+INTEGER_STEPS = "integer_steps"
+KNAPSACK = "knapsack"
+FORMULATIONS = (BINARY, INTEGER_STEPS, KNAPSACK)
+
+# Least time CBC is given, even once the time limit has passed, so it can still find a solution
+MIN_SOLVE_SECONDS = 0.1
+
 
 def run_engine(
         boa: BOA,
         rates: KeyStore[Rate],
-        candidates: List[Candidate],
+        candidates: Union[List[Candidate], CandidateSet],
+        reduce: bool = False,
+        formulation: str = BINARY,
+        options: Optional[SolverOptions] = None,
 ) -> Solution:
+    """Choose a candidate per asset to best fulfil the boa.
+
+    reduce drops candidates that can't be in an optimal solution
+    before building the model, see reduce_candidates. formulation is
+    one of FORMULATIONS, each giving the same solutions. KNAPSACK falls
+    back to BINARY if its frontier grows too large. options limits the
+    CBC solve, see SolverOptions, the knapsack solve being exact.
+    """
+    if formulation not in FORMULATIONS:
+        raise RuntimeError(f"Unknown formulation {formulation}, expected one of {FORMULATIONS}")
     start = time()
+    options = options or SolverOptions()
+
+    if not isinstance(candidates, CandidateSet):
+        candidates = CandidateSet.from_candidates(boa=boa, candidates=candidates)
+    if candidates.cost is None:
+        candidates = replace(candidates, cost=get_instruction_costs(candidates=candidates, rates=rates))
+    if reduce:
+        candidates, _ = reduce_candidates(candidates)
+
+    if formulation == KNAPSACK:
+        solution = solve_knapsack(candidates=candidates)
+        if solution is not None:
+            log.info(f"Finished knapsack solve, got status {solution.status}. TOOK: {round(time() - start, 4)} secs.")
+            return solution
 
     # Create model + formulate
     model = LpProblem("BMU-Balancer", LpMaximize)
 
+    if formulation == INTEGER_STEPS:
+        step_variables = create_step_variables(candidates=candidates)
+        set_step_objective(model=model, variables=step_variables)
+        add_step_constraints(model=model, variables=step_variables, boa=boa)
+        solve(model=model, options=options, start=start)
+        solution = get_step_solution(model=model, variables=step_variables)
+        return set_gap(solution=solution, candidates=candidates, proven=is_proven(solution, options))
+
     variables = create_variables(
         candidates=candidates,
     )
     set_objective(
         model=model,
         variables=variables,
-        boa=boa,
-        rates=rates,
     )
     add_constraints(
         model=model,
@@ -43,11 +96,32 @@ def run_engine(
     )
 
     # Solve
-    model.solve()
-    log.info(f"Finished solving, got status {LpStatus[model.status]}. TOOK: {round(time() - start, 4)} secs.")
+    solve(model=model, options=options, start=start)
 
     # Get solution
-    return get_solution(
+    solution = get_solution(
         model=model,
         variables=variables,
     )
+    return set_gap(solution=solution, candidates=candidates, proven=is_proven(solution, options))
+
+
+def solve(model: LpProblem, options: SolverOptions, start: float) -> None:
+    model.solve(get_solver(options=options, start=start))
+    log.info(f"Finished solving, got status {get_status(model)}. TOOK: {round(time() - start, 4)} secs.")
+
+
+def get_solver(options: SolverOptions, start: float) -> PULP_CBC_CMD:
+    """CBC with the options, its time limit being what's left since start."""
+    time_left = options.get_time_left(start)
+    return PULP_CBC_CMD(
+        maxSeconds=None if time_left is None else max(time_left, MIN_SOLVE_SECONDS),
+        fracGap=options.gap_rel,
+        threads=options.threads,
+        options=[] if options.gap_abs is None else [f"allowableGap {options.gap_abs}"],
+    )
+
+
+def is_proven(solution: Solution, options: SolverOptions) -> bool:
+    """Whether CBC proved the solution optimal, rather than stopping within a gap."""
+    return solution.status == "Optimal" and options.gap_rel is None and options.gap_abs is None
@@ -1,18 +1,9 @@
-from pulp import LpProblem
+from pulp import LpAffineExpression, LpProblem
 
-from bmu_balancer.models import BOA, Rate
 from bmu_balancer.models.engine import Variables
-from bmu_balancer.operations.instruction_helpers import get_instruction_cost
-from bmu_balancer.operations.key_store import KeyStore
 
 
-def set_objective(model: LpProblem, variables: Variables, boa: BOA, rates: KeyStore[Rate]) -> None:
-    model += sum(
-        var * (
-            # Profit
-            boa.price_mw_hr * candidate.hours * candidate.mw
-            # Cost
-            - get_instruction_cost(instruction=candidate, rates=rates)
-        )
-        for candidate, var in variables.candidates.items()
-    )
+def set_objective(model: LpProblem, variables: Variables) -> None:
+    # Profit - cost, worked out once for every candidate in the set.
+    # Built from the (variable, coefficient) pairs in one go, as sum() would copy the growing expression per term.
+    model += LpAffineExpression(zip(variables.selected, variables.candidates.objective.tolist()))
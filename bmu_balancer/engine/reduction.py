@@ -0,0 +1,86 @@
+import logging
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+from bmu_balancer.models.engine import CandidateSet
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Reduction:
+    """How much the pre-solve reduction shrank the model."""
+    candidates: int
+    unprofitable: int
+    dominated: int
+    profit_rows: int
+    remaining_profit_rows: int
+
+    @property
+    def remaining(self) -> int:
+        return self.candidates - self.unprofitable - self.dominated
+
+    def __str__(self) -> str:
+        return (
+            f"kept {self.remaining} of {self.candidates} candidates "
+            f"({self.unprofitable} below min required profit, {self.dominated} dominated) "
+            f"and {self.remaining_profit_rows} of {self.profit_rows} min profit rows"
+        )
+
+
+def reduce_candidates(candidates: CandidateSet) -> Tuple[CandidateSet, Reduction]:
+    """Drop the candidates that can't be in an optimal solution.
+
+    A non-zero candidate that can't make its asset's min required profit
+    is forced off by its min profit row, so it's dropped, unless that
+    would leave its asset with none. Then, within each asset, a candidate
+    is dropped if another has no more mw and no less objective, as
+    swapping it in keeps every constraint and the objective. Candidate
+    costs must already be set.
+    """
+    unprofitable = get_profit_margins(candidates) < 0
+    # Keep every candidate of an asset left with none, so it's as infeasible as before
+    n_kept = np.bincount(candidates.asset_index[~unprofitable], minlength=len(candidates.assets))
+    unprofitable &= n_kept[candidates.asset_index] > 0
+
+    profitable = candidates.take(np.flatnonzero(~unprofitable))
+    reduced = profitable.take(np.flatnonzero(get_undominated(profitable)))
+
+    reduction = Reduction(
+        candidates=len(candidates),
+        unprofitable=int(unprofitable.sum()),
+        dominated=len(profitable) - len(reduced),
+        profit_rows=int(np.count_nonzero(candidates.mw)),
+        remaining_profit_rows=int(np.count_nonzero(get_profit_margins(reduced) < 0)),
+    )
+    log.info(f"Pre-solve reduction {reduction}.")
+    return reduced, reduction
+
+
+def get_profit_margins(candidates: CandidateSet) -> np.ndarray:
+    """Coefficient of each candidate's min profit row, price * hours - min required profit,
+    with zero mw candidates, which have no row, given a margin of 0."""
+    min_required_profit = np.array([asset.min_required_profit for asset in candidates.assets], dtype=np.float64)
+    margins = candidates.boa.price_mw_hr * candidates.hours - min_required_profit[candidates.asset_index]
+    return np.where(candidates.mw != 0, margins, 0)
+
+
+def get_undominated(candidates: CandidateSet) -> np.ndarray:
+    """Mask of the candidates that no other candidate for the same asset dominates,
+    having no more mw and no less objective. Of equal candidates the first is kept."""
+    objective = candidates.objective
+    # By asset, then mw, then best objective first, then position
+    order = np.lexsort((np.arange(len(candidates)), -objective, candidates.mw, candidates.asset_index))
+    sorted_objective = objective[order]
+    bounds = np.searchsorted(candidates.asset_index[order], np.arange(len(candidates.assets) + 1))
+
+    keep = np.zeros(len(candidates), dtype=np.bool_)
+    for first, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        if first == stop:
+            continue
+        group = sorted_objective[first:stop]
+        best_before = np.maximum.accumulate(np.concatenate(([-np.inf], group[:-1])))
+        keep[order[first:stop]] = group > best_before
+    return keep
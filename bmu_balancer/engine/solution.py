@@ -1,29 +1,28 @@
 import logging
+from dataclasses import replace
 
-from pulp import LpProblem, LpStatus, value
+from pulp import LpProblem, LpSolutionIntegerFeasible, LpStatus, LpStatusOptimal, value
 
-from bmu_balancer.models.engine import Solution, Variables
-from bmu_balancer.models.outputs import Instruction
+from bmu_balancer.engine.knapsack import get_objective_bound
+from bmu_balancer.models.engine import CandidateSet, Solution, Variables
 
 log = logging.getLogger(__name__)
 
+# Status of a solve stopped by its time limit with a solution, not known to be optimal
+FEASIBLE = "Feasible"
+SOLVED = ("Optimal", FEASIBLE)
+
 
 def get_solution(model: LpProblem, variables: Variables) -> Solution:
-    status = LpStatus[model.status]
+    status = get_status(model=model)
 
-    if status == "Optimal":
+    if status in SOLVED:
         objective = value(model.objective)
 
         instructions = []
-        for candidate, var in variables.candidates.items():
+        for n, var in enumerate(variables.selected):
             if var.varValue > 0:
-                instructions.append(Instruction(
-                    asset=candidate.asset,
-                    boa=candidate.boa,
-                    mw=candidate.mw,
-                    start=candidate.start,
-                    end=candidate.end,
-                ))
+                instructions.append(variables.candidates.get_instruction(n))
 
         log.info(f"Got {len(instructions)} instructions choices.")
 
@@ -35,3 +34,28 @@ def get_solution(model: LpProblem, variables: Variables) -> Solution:
 
     else:
         return Solution(status=status)
+
+
+def get_status(model: LpProblem) -> str:
+    """The model's LpStatus, but FEASIBLE where CBC stopped on its
+    time limit, which PuLP gives as optimal."""
+    if model.status == LpStatusOptimal and model.sol_status == LpSolutionIntegerFeasible:
+        return FEASIBLE
+    return LpStatus[model.status]
+
+
+def set_gap(solution: Solution, candidates: CandidateSet, proven: bool) -> Solution:
+    """Record the solution's gap, 0 if it's proven optimal, otherwise
+    from get_objective_bound, which can overstate it."""
+    if solution.status not in SOLVED:
+        return solution
+    if proven:
+        return replace(solution, gap=0.0)
+
+    bound = get_objective_bound(candidates=candidates)
+    if bound is None:
+        return solution
+    # Relative to the objective, or absolute for objectives under 1 in size
+    gap = max(bound - solution.objective, 0.0) / max(abs(solution.objective), 1.0)
+    log.info(f"Solution is within {gap:.4%} of the best possible.")
+    return replace(solution, gap=gap)
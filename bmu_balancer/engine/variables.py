@@ -1,29 +1,31 @@
-from typing import Dict, List
+from typing import List
 
 from pulp import LpBinary, LpVariable
 
-from bmu_balancer.models.engine import Candidate, Variables
+from bmu_balancer.models.engine import CandidateSet, Variables
 
 
 def create_variables(
-        candidates: List[Candidate],
+        candidates: CandidateSet,
 ) -> Variables:
     """Create a set of problem variables."""
     return Variables(
-        candidates=get_candidate_variables(
+        candidates=candidates,
+        selected=get_candidate_variables(
             candidates=candidates,
         )
     )
 
 
 def get_candidate_variables(
-        candidates: List[Candidate],
-) -> Dict[Candidate, LpVariable]:
-    """Create variables for the assignment of a mw value to an asset."""
-    return {
-        ic: LpVariable(
+        candidates: CandidateSet,
+) -> List[LpVariable]:
+    """Create variables for the assignment of a mw value to an asset,
+    one per candidate in the same order as the candidate set."""
+    return [
+        LpVariable(
             name=f"var__candidate({n})",
             cat=LpBinary,
         )
-        for n, ic in enumerate(candidates)
-    }
+        for n in range(len(candidates))
+    ]
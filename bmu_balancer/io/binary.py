@@ -0,0 +1,145 @@
+import json
+import os
+from dataclasses import fields, replace
+from datetime import timedelta, timezone
+from typing import Callable, Dict, Iterable, Optional, Type, TypeVar
+
+import numpy as np
+
+from bmu_balancer.io.fast_load import fast_load_input_data
+from bmu_balancer.io.io import load_json
+from bmu_balancer.io.streaming import HISTORY_SECTIONS, StreamedInputData
+from bmu_balancer.models import Asset
+from bmu_balancer.operations.columnar import AssetColumns, AssetStateColumns, InstructionColumns
+
+C = TypeVar('C', bound=AssetColumns)
+
+BINARY_FORMAT_VERSION = 1
+INPUT_FILENAME = "input.json"
+META_FILENAME = "meta.json"
+NPY_SUFFIX = ".npy"
+COLUMNS: Dict[str, Type[AssetColumns]] = {
+    'states': AssetStateColumns,
+    'instructions': InstructionColumns,
+}
+BUILDERS: Dict[str, Callable[[Iterable], AssetColumns]] = {
+    'states': AssetStateColumns.from_states,
+    'instructions': InstructionColumns.from_instructions,
+}
+# Fields of the columns that aren't arrays, which are kept in the meta file or input
+NON_ARRAY_FIELDS = ('assets', 'tzinfo')
+
+
+def is_binary_input(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, META_FILENAME))
+
+
+def convert_to_binary(json_filepath: str, directory: str) -> None:
+    """Convert a JSON input file to the binary input format.
+
+    The directory gets the JSON without its states and instructions,
+    plus a sub-directory of .npy arrays for each of those, holding every
+    AssetColumns field including the derived offsets and max_end, so
+    loading them needs no parsing or computation at all.
+    """
+    data_dict = load_json(json_filepath)
+    data = fast_load_input_data(data_dict)
+
+    os.makedirs(directory, exist_ok=True)
+    meta = {'version': BINARY_FORMAT_VERSION, 'utc_offsets': {}}
+    for section, build in BUILDERS.items():
+        columns = build(getattr(data, section))
+        save_columns(columns=columns, directory=os.path.join(directory, section))
+        meta['utc_offsets'][section] = get_utc_offset(columns)
+
+    with open(os.path.join(directory, INPUT_FILENAME), 'w') as file:
+        json.dump({key: value for key, value in data_dict.items() if key not in HISTORY_SECTIONS}, file)
+    # Written last, as it marks the directory as complete
+    with open(os.path.join(directory, META_FILENAME), 'w') as file:
+        json.dump(meta, file)
+
+
+def load_binary_input_data(directory: str, mmap: bool = True) -> StreamedInputData:
+    """Load a directory written by convert_to_binary.
+
+    States and instructions come back as columns memory-mapped read-only
+    from their .npy files, so any number of processes loading the same
+    directory share one copy of them through the page cache. The data's
+    states and instructions are the same columns, which build rows
+    only when iterated.
+    """
+    with open(os.path.join(directory, META_FILENAME)) as file:
+        meta = json.load(file)
+    if meta['version'] != BINARY_FORMAT_VERSION:
+        raise RuntimeError(
+            f"Binary input {directory} is format version {meta['version']}, expected {BINARY_FORMAT_VERSION}"
+        )
+
+    with open(os.path.join(directory, INPUT_FILENAME)) as file:
+        data_dict = json.load(file)
+    data_dict.update({section: [] for section in HISTORY_SECTIONS})
+    data = fast_load_input_data(data_dict)
+
+    stores = {
+        section: load_columns(
+            cls=cls,
+            directory=os.path.join(directory, section),
+            assets=data.assets,
+            utc_offset=meta['utc_offsets'][section],
+            mmap=mmap,
+        )
+        for section, cls in COLUMNS.items()
+    }
+    return StreamedInputData(
+        data=replace(data, **stores),
+        states=stores['states'],
+        instructions=stores['instructions'],
+    )
+
+
+def save_columns(columns: AssetColumns, directory: str) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for field in fields(columns):
+        if field.name not in NON_ARRAY_FIELDS:
+            np.save(os.path.join(directory, field.name + NPY_SUFFIX), getattr(columns, field.name))
+
+
+def load_columns(
+        cls: Type[C],
+        directory: str,
+        assets: Iterable[Asset],
+        utc_offset: Optional[float],
+        mmap: bool = True,
+) -> C:
+    arrays = {
+        field.name: load_array(os.path.join(directory, field.name + NPY_SUFFIX), mmap=mmap)
+        for field in fields(cls)
+        if field.name not in NON_ARRAY_FIELDS
+    }
+    asset_lookup = {asset.id: asset for asset in assets}
+    missing = set(arrays['asset_ids'].tolist()) - set(asset_lookup)
+    if missing:
+        raise RuntimeError(f"Rows in {directory} reference unknown assets {sorted(missing)}")
+
+    return cls(
+        assets=tuple(asset_lookup[asset_id] for asset_id in arrays['asset_ids'].tolist()),
+        tzinfo=None if utc_offset is None else timezone(timedelta(seconds=utc_offset)),
+        **arrays,
+    )
+
+
+def load_array(filepath: str, mmap: bool = True) -> np.ndarray:
+    if not mmap:
+        return np.load(filepath)
+    try:
+        return np.load(filepath, mmap_mode='r')
+    except ValueError:
+        # Older numpy can't map an empty array
+        return np.load(filepath)
+
+
+def get_utc_offset(columns: AssetColumns) -> Optional[float]:
+    """The fixed offset of the columns' times, which are all assumed to share it."""
+    if columns.tzinfo is None:
+        return None
+    return columns.tzinfo.utcoffset(None).total_seconds()
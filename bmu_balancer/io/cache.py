@@ -0,0 +1,78 @@
+import hashlib
+import logging
+import os
+import pickle
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from bmu_balancer.models import InputData
+
+log = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".cache"
+# Packages whose source defines how input is loaded into the models
+CODE_PACKAGES = ("io", "models")
+
+
+def get_cache_filepath(filepath: str) -> str:
+    return filepath + CACHE_SUFFIX
+
+
+@lru_cache(maxsize=None)
+def get_code_version() -> str:
+    """Hash of the loading and model code, so a cache written by
+    a different version of it is never read back."""
+    digest = hashlib.sha256(sys.version.encode())
+    root = Path(__file__).parent.parent
+    for package in CODE_PACKAGES:
+        for path in sorted((root / package).glob("*.py")):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def get_cache_key(content: bytes, **options) -> str:
+    """Key for input parsed from content with options by this code version."""
+    digest = hashlib.sha256(content)
+    digest.update(get_code_version().encode())
+    digest.update(repr(sorted(options.items())).encode())
+    return digest.hexdigest()
+
+
+def read_cache(cache_filepath: str, key: str) -> Optional[InputData]:
+    """Return the InputData cached against key, or None if there's no
+    valid cache for it. The key is stored first, so a stale cache is
+    rejected without unpickling the data."""
+    try:
+        with open(cache_filepath, 'rb') as file:
+            if pickle.load(file) != key:
+                log.info(f"Input cache {cache_filepath} is stale.")
+                return None
+            return pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as error:
+        log.warning(f"Could not read input cache {cache_filepath}, ignoring it: {error!r}")
+        return None
+
+
+def write_cache(cache_filepath: str, key: str, data: InputData) -> None:
+    """Write data to the cache, replacing it atomically so concurrent
+    runs never read a partial file. Failing to write isn't fatal."""
+    tmp_filepath = f"{cache_filepath}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_filepath, 'wb') as file:
+            pickle.dump(key, file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filepath, cache_filepath)
+    except Exception as error:
+        # Such as the data not pickling, as well as OSErrors
+        log.warning(f"Could not write input cache {cache_filepath}: {error!r}")
+    finally:
+        try:
+            os.remove(tmp_filepath)
+        except OSError:
+            # Already replaced the cache, or can't be removed either
+            pass
@@ -0,0 +1,264 @@
+import csv
+import gzip
+import lzma
+import os
+from datetime import tzinfo
+from typing import Callable, Dict, List, Optional, Sequence, TextIO, Tuple
+
+import numpy as np
+
+from bmu_balancer.io.fast_load import FIELDS, MODELS, REQUIRED, SECTIONS, Field, parse_datetime, to_bool
+from bmu_balancer.models import InputData
+from bmu_balancer.operations.columnar import AssetStateColumns, InstructionColumns, get_tzinfo
+from bmu_balancer.operations.utils import to_epoch_us
+
+Columns = Dict[str, np.ndarray]
+
+CSV_SUFFIX = ".csv"
+OPENERS: Dict[str, Callable[..., TextIO]] = {
+    CSV_SUFFIX: open,
+    CSV_SUFFIX + ".gz": gzip.open,
+    CSV_SUFFIX + ".xz": lzma.open,
+}
+# Separates the ids in a list of references, e.g. a BMU's assets
+LIST_SEPARATOR = ";"
+# Rows read before their cells are moved into arrays
+CHUNK_ROWS = 65536
+
+
+def load_csv_input_data(directory: str) -> InputData:
+    """Load input data from a directory with a CSV file per section.
+
+    Each file is named after its section (assets.csv, boa.csv, ...) and
+    may be gzip or xz compressed (assets.csv.gz), with a header row of
+    the field names used in the JSON input. Empty cells are treated as
+    missing, and a BMU's assets are listed as ids separated by
+    semicolons. parameters.csv is optional.
+
+    Every column is converted in one go, timestamps by parsing each
+    distinct value once, and references are resolved by joining sorted
+    id arrays. States and instructions are returned as columns, without
+    building a row object each.
+    """
+    context: Dict[str, Tuple[np.ndarray, List]] = {}
+    data = {}
+    for section in SECTIONS:
+        columns = read_csv_columns(get_section_filepath(directory=directory, section=section))
+        if section == 'states':
+            data[section] = load_state_columns(columns=columns, context=context)
+        elif section == 'instructions':
+            data[section] = load_instruction_columns(columns=columns, context=context)
+        else:
+            data[section] = load_objects(section=section, columns=columns, context=context)
+            context[section] = get_id_index(section=section, objects=data[section])
+
+    # Unpacking checks there's exactly one row
+    boa, = load_objects(
+        section='boa',
+        columns=read_csv_columns(get_section_filepath(directory=directory, section='boa')),
+        context=context,
+    )
+    parameters_filepath = get_section_filepath(directory=directory, section='parameters', required=False)
+    if parameters_filepath is None:
+        # All defaults, as for an empty parameters object in JSON
+        parameters, = load_objects(section='parameters', columns={}, context=context, n_rows=1)
+    else:
+        columns = read_csv_columns(parameters_filepath)
+        parameters, = load_objects(section='parameters', columns=columns, context=context)
+
+    return InputData(parameters=parameters, boa=boa, **data)
+
+
+def get_section_filepath(directory: str, section: str, required: bool = True) -> Optional[str]:
+    for suffix in OPENERS:
+        filepath = os.path.join(directory, section + suffix)
+        if os.path.isfile(filepath):
+            return filepath
+    if required:
+        raise RuntimeError(f"No CSV file for {section} in {directory}")
+    return None
+
+
+def read_csv_columns(filepath: str, chunk_rows: int = CHUNK_ROWS) -> Columns:
+    """Read a CSV file, decompressing it as it's read,
+    into an array of strings per column.
+
+    Cells are gathered by column and moved into arrays every chunk_rows
+    rows, so at most a chunk of the file is held as python strings.
+    """
+    opener = next(opener for suffix, opener in OPENERS.items() if filepath.endswith(suffix))
+    with opener(filepath, 'rt', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return {}
+        cells: List[List[str]] = [[] for _ in header]
+        chunks: List[List[np.ndarray]] = [[] for _ in header]
+        for n, row in enumerate(reader, start=1):
+            if len(row) != len(header):
+                raise RuntimeError(f"Rows in {filepath} don't all have {len(header)} columns")
+            for column, cell in zip(cells, row):
+                column.append(cell)
+            if n % chunk_rows == 0:
+                add_chunk(cells=cells, chunks=chunks)
+        add_chunk(cells=cells, chunks=chunks)
+
+    return {name: np.concatenate(column_chunks) for name, column_chunks in zip(header, chunks)}
+
+
+def add_chunk(cells: List[List[str]], chunks: List[List[np.ndarray]]) -> None:
+    """Move each column's cells into a new array chunk."""
+    for column, column_chunks in zip(cells, chunks):
+        column_chunks.append(np.array(column, dtype=str))
+        column.clear()
+
+
+def get_n_rows(columns: Columns) -> int:
+    return len(next(iter(columns.values()))) if columns else 0
+
+
+def get_id_index(section: str, objects: Sequence) -> Tuple[np.ndarray, List]:
+    """Sorted ids and the objects in the same order, to join references against."""
+    ids = np.array([obj.id for obj in objects], dtype=np.int64)
+    order = np.argsort(ids, kind='stable')
+    ids = ids[order]
+    if len(ids) > 1 and np.any(ids[1:] == ids[:-1]):
+        raise RuntimeError(f"Duplicate ids in {section}")
+    return ids, [objects[n] for n in order.tolist()]
+
+
+def resolve_references(ids: np.ndarray, index: Tuple[np.ndarray, List], section: str) -> np.ndarray:
+    """Positions of ids in a section's id index, via a sorted search."""
+    sorted_ids, _ = index
+    positions = np.minimum(np.searchsorted(sorted_ids, ids), max(len(sorted_ids) - 1, 0))
+    found = sorted_ids[positions] == ids if len(sorted_ids) else np.zeros(len(ids), dtype=np.bool_)
+    if not np.all(found):
+        raise RuntimeError(f"References to unknown {section} {sorted(set(ids[~found].tolist()))}")
+    return positions
+
+
+def load_objects(section: str, columns: Columns, context: Dict, n_rows: Optional[int] = None) -> List:
+    n_rows = get_n_rows(columns) if n_rows is None else n_rows
+    values = {field.name: get_values(section, field, columns, n_rows, context) for field in FIELDS[section]}
+    model = MODELS[section]
+    return [model(**dict(zip(values, row))) for row in zip(*values.values())]
+
+
+def get_values(section: str, field: Field, columns: Columns, n_rows: int, context: Dict) -> List:
+    """A field's values for every row as python objects,
+    with the field's default wherever a cell is empty."""
+    column = columns.get(field.name)
+    blank = np.ones(n_rows, dtype=np.bool_) if column is None else column == ''
+    if np.any(blank) and field.missing is REQUIRED:
+        raise RuntimeError(f"Missing values for required field {section}.{field.name}")
+
+    values = [field.missing] * n_rows
+    if np.all(blank):
+        return values
+
+    present = np.flatnonzero(~blank)
+    converted = convert_column(section=section, field=field, values=column[present], context=context)
+    for n, value in zip(present.tolist(), converted):
+        values[n] = value
+    return values
+
+
+def convert_column(section: str, field: Field, values: np.ndarray, context: Dict) -> List:
+    try:
+        if field.many:
+            index = context[field.reference]
+            return [
+                tuple(index[1][n] for n in resolve_references(to_ids(items), index, field.reference).tolist())
+                for items in np.char.split(values, LIST_SEPARATOR).tolist()
+            ]
+        elif field.reference is not None:
+            index = context[field.reference]
+            positions = resolve_references(to_ids(values), index, field.reference)
+            return [index[1][n] for n in positions.tolist()]
+        elif field.convert is int:
+            return to_ids(values).tolist()
+        elif field.convert is float:
+            return values.astype(np.float64).tolist()
+        elif field.convert is str:
+            return values.tolist()
+        return convert_distinct(values=values, convert=field.convert).tolist()
+    except ValueError as error:
+        raise RuntimeError(f"Could not load {section}.{field.name}: {error!r}")
+
+
+def convert_distinct(values: np.ndarray, convert: Callable) -> np.ndarray:
+    """Apply convert once per distinct value, e.g. to parse timestamps,
+    which repeat across the rows of a history."""
+    distinct, inverse = np.unique(values, return_inverse=True)
+    converted = np.empty(len(distinct), dtype=object)
+    converted[:] = [convert(value) for value in distinct.tolist()]
+    return converted[inverse.reshape(-1)]
+
+
+def to_ids(values) -> np.ndarray:
+    """Parse integer ids, rejecting anything but whole numbers. Parsed
+    straight to int64, so ids beyond float64's precision are kept."""
+    return np.asarray(values, dtype=str).astype(np.int64)
+
+
+def to_epoch_column(values: np.ndarray) -> Tuple[np.ndarray, Optional[tzinfo]]:
+    """Parse a timestamp column to epoch microseconds, and the time zone."""
+    distinct, inverse = np.unique(values, return_inverse=True)
+    times = [parse_datetime(value) for value in distinct.tolist()]
+    epoch = np.array([to_epoch_us(time) for time in times], dtype=np.int64)
+    return epoch[inverse.reshape(-1)], get_tzinfo(times)
+
+
+def get_history_columns(section: str, columns: Columns, context: Dict) -> Dict:
+    """The columns shared by the per-asset history sections."""
+    for name in ('id', 'asset', 'start', 'end'):
+        if name not in columns or np.any(columns[name] == ''):
+            raise RuntimeError(f"Missing values for required field {section}.{name}")
+
+    try:
+        asset_id = to_ids(columns['asset'])
+        resolve_references(asset_id, context['assets'], 'assets')
+        start, tzinfo = to_epoch_column(columns['start'])
+        end, _ = to_epoch_column(columns['end'])
+        return dict(
+            assets=context['assets'][1],
+            asset_id=asset_id,
+            id=to_ids(columns['id']),
+            start=start,
+            end=end,
+            tzinfo=tzinfo,
+        )
+    except ValueError as error:
+        raise RuntimeError(f"Could not load {section}: {error!r}")
+
+
+def get_column(section: str, columns: Columns, name: str, missing, convert: Callable) -> np.ndarray:
+    column = columns.get(name)
+    if column is None:
+        column = np.full(get_n_rows(columns), '', dtype=str)
+    blank = column == ''
+    if np.any(blank) and missing is REQUIRED:
+        raise RuntimeError(f"Missing values for required field {section}.{name}")
+    try:
+        values = convert(np.where(blank, '0', column))
+    except ValueError as error:
+        raise RuntimeError(f"Could not load {section}.{name}: {error!r}")
+    return np.where(blank, missing, values) if np.any(blank) else values
+
+
+def load_state_columns(columns: Columns, context: Dict) -> AssetStateColumns:
+    return AssetStateColumns.from_columns(
+        charge=get_column('states', columns, 'charge', missing=0, convert=lambda x: x.astype(np.float64)),
+        available=get_column(
+            'states', columns, 'available', missing=False,
+            convert=lambda x: convert_distinct(values=x, convert=to_bool).astype(np.bool_),
+        ),
+        **get_history_columns(section='states', columns=columns, context=context),
+    )
+
+
+def load_instruction_columns(columns: Columns, context: Dict) -> InstructionColumns:
+    return InstructionColumns.from_columns(
+        mw=get_column('instructions', columns, 'mw', missing=REQUIRED, convert=lambda x: x.astype(np.float64)),
+        **get_history_columns(section='instructions', columns=columns, context=context),
+    )
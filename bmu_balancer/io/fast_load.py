@@ -0,0 +1,294 @@
+from datetime import datetime
+from functools import lru_cache
+from math import isfinite
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from marshmallow import fields
+from marshmallow.utils import from_iso_datetime
+
+from bmu_balancer.io.input_schemas import DEFAULT_EXECUTION_TIME
+from bmu_balancer.models import Asset, AssetState, BMU, BOA, InputData, Instruction, Offer, Rate
+from bmu_balancer.models.inputs import Parameters
+
+REQUIRED = object()
+DATETIME_CACHE_SIZE = 4096
+
+
+class Field(NamedTuple):
+    """How to load one field of a model from JSON, mirroring the
+    marshmallow field of the same name in input_schemas."""
+    name: str
+    convert: Callable[[Any], Any]
+    missing: Any = REQUIRED
+    allow_none: bool = False
+    # Name of the loaded section the value is an id in
+    reference: Optional[str] = None
+    many: bool = False
+
+
+@lru_cache(maxsize=DATETIME_CACHE_SIZE)
+def parse_datetime(value: str) -> datetime:
+    """Parse an aware ISO 8601 timestamp.
+
+    Input files repeat the same few timestamps across many rows, so
+    results are cached. Formats datetime.fromisoformat can't handle fall
+    back to the parser marshmallow uses.
+    """
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = from_iso_datetime(value)
+    if parsed.tzinfo is None:
+        raise ValueError(f"Not a valid aware datetime, got {value}")
+    return parsed
+
+
+def to_bool(value: Any) -> bool:
+    if value in fields.Boolean.truthy:
+        return True
+    elif value in fields.Boolean.falsy:
+        return False
+    raise ValueError(f"Not a valid boolean, got {value}")
+
+
+def reference(name: str, section: str, many: bool = False, missing: Any = REQUIRED) -> Field:
+    return Field(name=name, convert=None, missing=missing, reference=section, many=many)
+
+
+FIELDS: Dict[str, Tuple[Field, ...]] = {
+    'assets': (
+        Field('id', int),
+        Field('name', str, missing=None, allow_none=True),
+        Field('capacity', float),
+        Field('running_cost_per_mw_hr', float, missing=0),
+        Field('min_required_profit', float, missing=0),
+        Field('max_import_mw_hr', float, missing=0),
+        Field('max_export_mw_hr', float, missing=0),
+        Field('single_import_mw_hr', float, missing=None, allow_none=True),
+        Field('single_export_mw_hr', float, missing=None, allow_none=True),
+        Field('min_zero_time', float, missing=0),
+        Field('min_non_zero_time', float, missing=0),
+        Field('notice_to_deviate_from_zero', float, missing=0),
+        Field('notice_to_deliver_bid', float, missing=0),
+        Field('max_delivery_period', float, missing=None, allow_none=True),
+    ),
+    'rates': (
+        Field('id', int),
+        reference('asset', 'assets'),
+        Field('ramp_up_import', float),
+        Field('ramp_up_export', float),
+        Field('ramp_down_import', float),
+        Field('ramp_down_export', float),
+        Field('min_mw', int, missing=0),
+        Field('max_mw', int, missing=None, allow_none=True),
+    ),
+    'states': (
+        Field('id', int),
+        reference('asset', 'assets'),
+        Field('start', parse_datetime),
+        Field('end', parse_datetime),
+        Field('charge', float, missing=0),
+        Field('available', to_bool, missing=False),
+    ),
+    'bmus': (
+        Field('id', int),
+        Field('name', str, missing=None, allow_none=True),
+        reference('assets', 'assets', many=True, missing=()),
+    ),
+    'offers': (
+        Field('id', int),
+        reference('bmu', 'bmus'),
+        Field('start', parse_datetime, missing=None, allow_none=True),
+        Field('end', parse_datetime, missing=None, allow_none=True),
+        Field('price_mw_hr', float, missing=0),
+    ),
+    'instructions': (
+        Field('id', int),
+        reference('asset', 'assets'),
+        Field('mw', float),
+        Field('start', parse_datetime),
+        Field('end', parse_datetime),
+    ),
+    'boa': (
+        Field('id', int),
+        Field('start', parse_datetime),
+        Field('end', parse_datetime),
+        Field('mw', float),
+        reference('offer', 'offers'),
+    ),
+    'parameters': (
+        Field('execution_time', parse_datetime, missing=DEFAULT_EXECUTION_TIME),
+    ),
+}
+
+MODELS = {
+    'assets': Asset,
+    'rates': Rate,
+    'states': AssetState,
+    'bmus': BMU,
+    'offers': Offer,
+    'instructions': Instruction,
+    'boa': BOA,
+    'parameters': Parameters,
+}
+
+# Sections in the order they need loading to resolve references
+SECTIONS = ('assets', 'rates', 'states', 'bmus', 'offers', 'instructions')
+
+
+def fast_load_input_data(data_dict: Dict, validate: bool = False) -> InputData:
+    """Build the same InputData as the schemas in input_schemas,
+    but directly from the parsed JSON.
+
+    Values are converted and defaulted as the schemas do, and references
+    are resolved with plain dict lookups. Missing required fields,
+    unconvertible values and unknown references raise a RuntimeError.
+    The schemas check more than that, and validate runs a pass doing
+    those checks first, e.g. for unknown fields and booleans given as
+    numbers.
+    """
+    if validate:
+        validate_input_data(data_dict)
+
+    context: Dict[str, Dict] = {}
+    for section in SECTIONS:
+        context[section] = {
+            item.id: item for item in (load_row(section, row, context) for row in data_dict[section])
+        }
+
+    return InputData(
+        parameters=load_row('parameters', data_dict['parameters'], context),
+        boa=load_row('boa', data_dict['boa'], context),
+        **{
+            section: [context[section][row['id']] for row in data_dict[section]]
+            for section in SECTIONS
+        },
+    )
+
+
+def load_row(section: str, row: Dict, context: Dict[str, Dict]):
+    kwargs = {}
+    for field in FIELDS[section]:
+        try:
+            value = row[field.name]
+        except KeyError:
+            if field.missing is REQUIRED:
+                raise RuntimeError(f"Missing required field {section}.{field.name} in {row}")
+            kwargs[field.name] = field.missing
+            continue
+
+        try:
+            if value is None and field.allow_none:
+                kwargs[field.name] = None
+            elif field.many:
+                kwargs[field.name] = tuple(context[field.reference][item] for item in value)
+            elif field.reference is not None:
+                kwargs[field.name] = context[field.reference][value]
+            else:
+                kwargs[field.name] = field.convert(value)
+        except (AttributeError, KeyError, TypeError, ValueError) as error:
+            raise RuntimeError(f"Could not load {section}.{field.name} from {row}: {error!r}")
+
+    return MODELS[section](**kwargs)
+
+
+def validate_input_data(data_dict: Dict) -> None:
+    """Check the parsed JSON as strictly as the schemas, raising a
+    RuntimeError listing every problem found."""
+    errors = []
+    ids: Dict[str, set] = {}
+
+    for section in SECTIONS + ('boa', 'parameters'):
+        if section not in data_dict:
+            errors.append(f"Missing section {section}")
+            continue
+        if section in SECTIONS:
+            if not isinstance(data_dict[section], list):
+                errors.append(f"{section} must be a list")
+                continue
+            rows = [(f"{section}[{n}]", row) for n, row in enumerate(data_dict[section])]
+        else:
+            rows = [(section, data_dict[section])]
+
+        section_ids = ids.setdefault(section, set())
+        for label, row in rows:
+            if not isinstance(row, dict):
+                errors.append(f"{label} must be an object")
+                continue
+            errors.extend(
+                f"{label}: {error}"
+                for error in get_row_errors(section=section, row=row, ids=ids)
+            )
+            if 'id' in row:
+                if row['id'] in section_ids:
+                    errors.append(f"{label}: duplicate id {row['id']}")
+                section_ids.add(row['id'])
+
+    if errors:
+        raise RuntimeError("Invalid input data:\n" + "\n".join(errors))
+
+
+def get_row_errors(section: str, row: Dict, ids: Dict[str, set]) -> List[str]:
+    section_fields = FIELDS[section]
+    known = {field.name for field in section_fields}
+    errors = [f"unknown field {name}" for name in row if name not in known]
+
+    for field in section_fields:
+        if field.name not in row:
+            if field.missing is REQUIRED:
+                errors.append(f"missing required field {field.name}")
+            continue
+
+        value = row[field.name]
+        if value is None:
+            if not field.allow_none:
+                errors.append(f"{field.name} may not be null")
+            continue
+
+        if field.reference is not None:
+            values = value if field.many else [value]
+            if field.many and not isinstance(value, list):
+                errors.append(f"{field.name} must be a list")
+                continue
+            errors.extend(
+                f"{field.name} references unknown {field.reference} {item}"
+                for item in values
+                if item not in ids.get(field.reference, ())
+            )
+            continue
+
+        error = get_value_error(field=field, value=value)
+        if error is not None:
+            errors.append(f"{field.name} {error}, got {value!r}")
+
+    return errors
+
+
+def get_value_error(field: Field, value: Any) -> Optional[str]:
+    if field.convert in (int, float):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            return "is not a number"
+        try:
+            number = float(value)
+        except ValueError:
+            return "is not a number"
+        if not isfinite(number):
+            return "is not finite"
+        if field.convert is int and not number.is_integer():
+            return "is not an integer"
+    elif field.convert is str:
+        if not isinstance(value, str):
+            return "is not a string"
+    elif field.convert is parse_datetime:
+        try:
+            parse_datetime(value)
+        except (TypeError, ValueError, AttributeError):
+            return "is not an aware ISO 8601 datetime"
+    elif field.convert is to_bool:
+        try:
+            to_bool(value)
+        except (TypeError, ValueError):
+            return "is not a boolean"
+    return None
@@ -7,12 +7,14 @@ from bmu_balancer.io.utils import PostLoadObjMixin
 from bmu_balancer.models import Asset, AssetState, BMU, BOA, InputData, Instruction, Offer, Rate
 from bmu_balancer.models.inputs import Parameters
 
+DEFAULT_EXECUTION_TIME = datetime.utcnow()
+
 
 class ParametersSchema(PostLoadObjMixin):
 
     __model__ = Parameters
 
-    execution_time = fields.AwareDateTime(missing=datetime.utcnow())
+    execution_time = fields.AwareDateTime(missing=DEFAULT_EXECUTION_TIME)
 
 
 class AssetSchema(PostLoadObjMixin):
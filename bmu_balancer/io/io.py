@@ -1,7 +1,11 @@
 import json
+import os
 from datetime import date, datetime
 from typing import Dict, List
 
+from bmu_balancer.io.cache import get_cache_filepath, get_cache_key, read_cache, write_cache
+from bmu_balancer.io.csv_load import load_csv_input_data
+from bmu_balancer.io.fast_load import fast_load_input_data
 from bmu_balancer.io.input_schemas import (
     AssetSchema, AssetStateSchema,
     BMUSchema,
@@ -10,18 +14,44 @@ from bmu_balancer.io.input_schemas import (
     OfferSchema,
     RateSchema,
 )
-from bmu_balancer.io.output_schemas import SolutionSchema
+from bmu_balancer.io.solution_writer import JSON_LINES_SUFFIX, SolutionWriter, write_solution
 from bmu_balancer.models import InputData
 from bmu_balancer.models.engine import Solution
 
 JSON_SUFFIX = ".json"
 
 
-def load_input_data(filepath: str) -> InputData:
+def load_input_data(filepath: str, fast: bool = False, validate: bool = False, cache: bool = False) -> InputData:
     """Given a file, load the data in it into an input object.
+
+    fast skips the marshmallow schemas and builds the objects directly,
+    see fast_load_input_data, with validate adding a strict check of the
+    input first.
+    cache keeps the loaded data in a binary file next to the input, which
+    later loads read instead while the input and loading code are unchanged.
+    A directory is loaded as a CSV file per section, see load_csv_input_data,
+    which ignores the other options.
     Todo: Would be nice for this to be able to take excel.
     """
-    data_dict = load_json(filepath)
+    if os.path.isdir(filepath):
+        return load_csv_input_data(filepath)
+    if not cache:
+        return parse_input_data(data_dict=load_json(filepath), fast=fast, validate=validate)
+
+    content = load_bytes(filepath)
+    cache_filepath = get_cache_filepath(filepath)
+    key = get_cache_key(content, fast=fast, validate=validate)
+
+    data = read_cache(cache_filepath=cache_filepath, key=key)
+    if data is None:
+        data = parse_input_data(data_dict=json.loads(content), fast=fast, validate=validate)
+        write_cache(cache_filepath=cache_filepath, key=key, data=data)
+    return data
+
+
+def parse_input_data(data_dict: Dict, fast: bool = False, validate: bool = False) -> InputData:
+    if fast:
+        return fast_load_input_data(data_dict, validate=validate)
 
     context = {}
     for name, schema in {
@@ -38,9 +68,20 @@ def load_input_data(filepath: str) -> InputData:
     return InputDataSchema(context=context).load(data_dict)
 
 
-def dump_solution(filepath: str, solution: Solution) -> None:
-    data = SolutionSchema(strict=True).dump(solution).data
-    dump_json(filepath=filepath, data=data)
+def dump_solution(filepath: str, solution: Solution, append: bool = False) -> None:
+    """Write a solution to a file, as a JSON object or, given
+    a .jsonl file, as a line of JSON Lines, which append
+    adds to the end of the file."""
+    if append or filepath.endswith(JSON_LINES_SUFFIX):
+        with SolutionWriter.open(filepath=filepath, append=append) as writer:
+            writer.write(solution)
+        return
+
+    if JSON_SUFFIX not in filepath:
+        raise RuntimeError(f"Can currently only handle excel, got {filepath}")
+
+    with open(filepath, 'w') as file:
+        write_solution(file=file, solution=solution)
 
 
 def load_json(filepath: str) -> Dict:
@@ -51,6 +92,14 @@ def load_json(filepath: str) -> Dict:
         return json.load(file)
 
 
+def load_bytes(filepath: str) -> bytes:
+    if JSON_SUFFIX not in filepath:
+        raise RuntimeError(f"Can currently only handle excel, got {filepath}")
+
+    with open(filepath, 'rb') as file:
+        return file.read()
+
+
 def dump_json(filepath: str, data: Dict) -> None:
     if JSON_SUFFIX not in filepath:
         raise RuntimeError(f"Can currently only handle excel, got {filepath}")
@@ -62,7 +111,7 @@ def dump_json(filepath: str, data: Dict) -> None:
 def json_serial(obj):
     """JSON serializer for objects not serializable by default json code"""
     if isinstance(obj, datetime):
-        return obj.date().isoformat()
+        return obj.isoformat()
     elif isinstance(obj, date):
         return obj.isoformat()
     raise TypeError("Type %s not serializable" % type(obj))
\ No newline at end of file
@@ -1,7 +0,0 @@
-from bmu_balancer.io.utils import PostLoadObjMixin
-from bmu_balancer.models.engine import Solution
-
-
-class SolutionSchema(PostLoadObjMixin):
-
-    __model__ = Solution
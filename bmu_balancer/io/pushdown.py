@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+
+from bmu_balancer.io.fast_load import SECTIONS, load_row, parse_datetime
+from bmu_balancer.io.streaming import (
+    CHUNK_SIZE,
+    HISTORY_SECTIONS,
+    JsonStreamReader,
+    StreamedInputData,
+    load_sections,
+)
+from bmu_balancer.models import AssetState, InputData, Instruction
+from bmu_balancer.operations.key_store import Index, get_keys
+from bmu_balancer.operations.mutable_key_store import MutableKeyStore
+
+
+def load_boa_input_data(
+        filepath: str,
+        state_window: timedelta = timedelta(0),
+        indexes: Tuple[Index, ...] = (),
+        chunk_size: int = CHUNK_SIZE,
+) -> StreamedInputData:
+    """Load only the input data a solve of the file's BOA can use.
+
+    The BOA is resolved to its offer and BMU first, then only the BMU's
+    assets and their rates are loaded. States are kept if they overlap
+    the BOA extended by state_window either side, and instructions if
+    they are in progress at the BOA start or are the last to end before
+    it, which is all the current and prior instruction lookups need.
+    Like stream_input_data, the history sections are streamed a record
+    at a time, and anything outside the BMU is never built.
+    """
+    with open(filepath) as file:
+        data_dict = load_sections(reader=JsonStreamReader(file, chunk_size=chunk_size))
+
+    boa_row = data_dict['boa']
+    offer_row = get_row(rows=data_dict['offers'], id=boa_row['offer'], section='offers')
+    bmu_row = get_row(rows=data_dict['bmus'], id=offer_row['bmu'], section='bmus')
+    asset_ids = set(bmu_row.get('assets', ()))
+
+    rows = {
+        'assets': [row for row in data_dict['assets'] if row['id'] in asset_ids],
+        'rates': [row for row in data_dict['rates'] if row.get('asset') in asset_ids],
+        'bmus': [bmu_row],
+        'offers': [offer_row],
+    }
+    context: Dict[str, Dict] = {}
+    for section in SECTIONS:
+        if section not in HISTORY_SECTIONS:
+            context[section] = {row['id']: load_row(section, row, context) for row in rows[section]}
+    boa = load_row('boa', boa_row, context)
+
+    states = MutableKeyStore(keys=get_keys(AssetState), indexes=indexes)
+    instructions = MutableKeyStore(keys=get_keys(Instruction), indexes=indexes)
+    with open(filepath) as file:
+        reader = JsonStreamReader(file, chunk_size=chunk_size)
+        for key in reader.iter_object():
+            if key == 'states':
+                for state in select_states(
+                        rows=reader.iter_array(),
+                        asset_ids=asset_ids,
+                        start=boa.start - state_window,
+                        end=boa.end + state_window,
+                        context=context,
+                        filepath=filepath,
+                ):
+                    states.insert(state)
+            elif key == 'instructions':
+                for instruction in select_instructions(
+                        rows=reader.iter_array(),
+                        asset_ids=asset_ids,
+                        time=boa.start,
+                        context=context,
+                ):
+                    instructions.insert(instruction)
+            else:
+                reader.decode()
+
+    states, instructions = states.snapshot(), instructions.snapshot()
+    data = InputData(
+        parameters=load_row('parameters', data_dict['parameters'], context),
+        boa=boa,
+        states=states.objects,
+        instructions=instructions.objects,
+        **{section: list(context[section].values()) for section in rows},
+    )
+    return StreamedInputData(data=data, states=states, instructions=instructions)
+
+
+def get_row(rows: List[Dict], id: int, section: str) -> Dict:
+    """Return the row with id, the last one if there are
+    several, as references resolve to when loading everything."""
+    matches = [row for row in rows if row['id'] == id]
+    if not matches:
+        raise RuntimeError(f"No {section} with id {id} in input.")
+    return matches[-1]
+
+
+def select_states(
+        rows: Iterable[Dict],
+        asset_ids: Set[int],
+        start: datetime,
+        end: datetime,
+        context: Dict[str, Dict],
+        filepath: str,
+) -> Iterable[AssetState]:
+    """Load the states for asset_ids that overlap start to end,
+    checking the times before building the state."""
+    for row in rows:
+        if (
+                row.get('asset') in asset_ids
+                and get_row_time(row=row, name='start', filepath=filepath) <= end
+                and get_row_time(row=row, name='end', filepath=filepath) >= start
+        ):
+            yield load_row('states', row, context)
+
+
+def get_row_time(row: Dict, name: str, filepath: str) -> datetime:
+    """Parse a state's time, with the errors load_row would give."""
+    try:
+        value = row[name]
+    except KeyError:
+        raise RuntimeError(f"Missing required field states.{name} in {row} in {filepath}")
+    try:
+        return parse_datetime(value)
+    except (AttributeError, TypeError, ValueError) as error:
+        raise RuntimeError(f"Could not load states.{name} from {row} in {filepath}: {error!r}")
+
+
+def select_instructions(
+        rows: Iterable[Dict],
+        asset_ids: Set[int],
+        time: datetime,
+        context: Dict[str, Dict],
+) -> List[Instruction]:
+    """Load the instructions for asset_ids in progress at time, and per
+    asset those that ended last before it, in their original order.
+
+    Instructions tying for the last end are all kept, so the prior
+    lookup breaks the tie as it would with everything loaded.
+    """
+    current: List[Tuple[int, Instruction]] = []
+    prior: Dict[int, Tuple[datetime, List[Tuple[int, Instruction]]]] = {}
+
+    for position, row in enumerate(rows):
+        asset_id = row.get('asset')
+        if asset_id not in asset_ids:
+            continue
+
+        instruction = load_row('instructions', row, context)
+        if instruction.start <= time <= instruction.end:
+            current.append((position, instruction))
+        elif instruction.end < time:
+            last_end, last = prior.get(asset_id, (None, []))
+            if last_end is None or instruction.end > last_end:
+                prior[asset_id] = (instruction.end, [(position, instruction)])
+            elif instruction.end == last_end:
+                last.append((position, instruction))
+
+    selected = current + [item for _, items in prior.values() for item in items]
+    return [instruction for _, instruction in sorted(selected, key=lambda x: x[0])]
@@ -0,0 +1,79 @@
+import json
+from typing import Dict, Optional, TextIO
+
+from bmu_balancer.models import Instruction
+from bmu_balancer.models.engine import Solution
+
+JSON_LINES_SUFFIX = ".jsonl"
+
+# Shared, as building an encoder per call is a noticeable part of small dumps
+ENCODER = json.JSONEncoder(check_circular=False)
+
+
+def instruction_to_dict(instruction: Instruction) -> Dict:
+    """Instructions reference their asset and boa by id, and keep full ISO 8601 timestamps."""
+    return {
+        'id': instruction.id,
+        'asset': instruction.asset.id,
+        'boa': None if instruction.boa is None else instruction.boa.id,
+        'mw': instruction.mw,
+        'start': instruction.start.isoformat(),
+        'end': instruction.end.isoformat(),
+    }
+
+
+def write_solution(file: TextIO, solution: Solution) -> None:
+    """Write a solution as a single line JSON object, encoding and
+    writing its instructions one at a time rather than building
+    the whole document in memory first."""
+    file.write(f'{{"status": {ENCODER.encode(solution.status)}, ')
+    file.write(f'"objective": {ENCODER.encode(solution.objective)}, "gap": {ENCODER.encode(solution.gap)}, ')
+    file.write('"instructions": [')
+    for n, instruction in enumerate(solution.instructions or ()):
+        if n:
+            file.write(', ')
+        file.write(ENCODER.encode(instruction_to_dict(instruction)))
+    file.write(']}')
+
+
+class SolutionWriter:
+    """Writes solutions one after another to a stream.
+
+    As JSON Lines each solution is a line of its own, so a batch run can
+    append to the same file across runs. Otherwise the solutions are
+    written as the items of a JSON array, which is closed by close().
+    """
+
+    def __init__(self, file: TextIO, json_lines: bool = False):
+        self.file = file
+        self.json_lines = json_lines
+        self.count = 0
+
+    @classmethod
+    def open(cls, filepath: str, append: bool = False, json_lines: Optional[bool] = None) -> "SolutionWriter":
+        """Open a writer on filepath, writing JSON Lines if json_lines
+        or, when that isn't given, if the file has a .jsonl suffix."""
+        if json_lines is None:
+            json_lines = filepath.endswith(JSON_LINES_SUFFIX)
+        if append and not json_lines:
+            raise RuntimeError(f"Can only append solutions to JSON Lines, got {filepath}")
+        return cls(file=open(filepath, 'a' if append else 'w'), json_lines=json_lines)
+
+    def write(self, solution: Solution) -> None:
+        if not self.json_lines:
+            self.file.write(',\n' if self.count else '[\n')
+        write_solution(file=self.file, solution=solution)
+        if self.json_lines:
+            self.file.write('\n')
+        self.count += 1
+
+    def close(self) -> None:
+        if not self.json_lines:
+            self.file.write('\n]\n' if self.count else '[]\n')
+        self.file.close()
+
+    def __enter__(self) -> "SolutionWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,322 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone, tzinfo
+from queue import Empty, Queue
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from bmu_balancer.io.fast_load import fast_load_input_data
+from bmu_balancer.io.io import load_json
+from bmu_balancer.io.streaming import HISTORY_SECTIONS, StreamedInputData
+from bmu_balancer.models import Asset, AssetState, InputData, Instruction
+from bmu_balancer.operations.columnar import get_tzinfo
+from bmu_balancer.operations.utils import from_epoch_us, to_epoch_us
+
+SQLITE_SUFFIXES = (".sqlite", ".db")
+SQLITE_FORMAT_VERSION = 2
+POOL_SIZE = 4
+# How often a thread waiting on a full pool checks whether it's been closed
+POLL_SECONDS = 0.1
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE states (
+    id INTEGER NOT NULL,
+    asset_id INTEGER NOT NULL,
+    start_us INTEGER NOT NULL,
+    end_us INTEGER NOT NULL,
+    charge REAL NOT NULL,
+    available INTEGER NOT NULL
+);
+CREATE TABLE instructions (
+    id INTEGER NOT NULL,
+    asset_id INTEGER NOT NULL,
+    mw REAL NOT NULL,
+    start_us INTEGER NOT NULL,
+    end_us INTEGER NOT NULL
+);
+CREATE INDEX states_asset_time ON states (asset_id, start_us, end_us);
+CREATE INDEX instructions_asset_time ON instructions (asset_id, start_us, end_us);
+"""
+
+# Columns of each history table after the shared id, asset_id, start_us and end_us
+COLUMNS: Dict[str, Tuple[str, ...]] = {
+    'states': ('charge', 'available'),
+    'instructions': ('mw',),
+}
+
+
+class ConnectionPool:
+    """Pool of read-only connections to a SQLite file.
+
+    Connections are opened as they are first needed, up to size, and
+    handed to one thread at a time. Once closed, connections in use are
+    closed as they're returned and no more can be taken.
+    """
+
+    def __init__(self, filepath: str, size: int = POOL_SIZE):
+        if size < 1:
+            raise RuntimeError(f"Pool size must be at least 1, got {size}")
+        self.filepath = filepath
+        self.size = size
+        self._idle: Queue = Queue()
+        self._opened = 0
+        self._closed = False
+        self._lock = Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            with self._lock:
+                if self._closed:
+                    connection.close()
+                else:
+                    self._idle.put(connection)
+
+    def close(self) -> None:
+        """Close the idle connections, any in use are closed as they're returned."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                return
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Connection pool for {self.filepath} is closed.")
+            try:
+                return self._idle.get_nowait()
+            except Empty:
+                pass
+            if self._opened < self.size:
+                self._opened += 1
+                return sqlite3.connect(f"file:{self.filepath}?mode=ro", uri=True, check_same_thread=False)
+        while True:
+            try:
+                return self._idle.get(timeout=POLL_SECONDS)
+            except Empty:
+                if self._closed:
+                    raise RuntimeError(f"Connection pool for {self.filepath} is closed.")
+
+
+class SqliteStore:
+    """States or instructions queried from a SQLite table.
+
+    Supports the asset lookups the pre-solve makes on a KeyStore (get,
+    get_one_or_none, get_at_time and get_for_period), as AssetColumns
+    does, each one a query on the (asset_id, start_us, end_us) index that
+    builds only the rows it returns. max_duration_us, the longest any row
+    in the table lasts, bounds a period query's start_us range from below
+    as well as above, so it only reads the index entries near the period.
+    """
+
+    def __init__(
+            self,
+            pool: ConnectionPool,
+            table: str,
+            assets: Iterable[Asset],
+            max_duration_us: int,
+            tz: Optional[tzinfo] = None,
+    ):
+        if table not in COLUMNS:
+            raise RuntimeError(f"No table {table} in SQLite store")
+        self.pool = pool
+        self.table = table
+        self.max_duration_us = max_duration_us
+        self.tzinfo = tz
+        self._assets = {asset.id: asset for asset in assets}
+        self._select = f"SELECT {', '.join(('id', 'asset_id', 'start_us', 'end_us') + COLUMNS[table])} FROM {table}"
+
+    def get(self, asset: Asset, **kwargs) -> List:
+        self._check_kwargs(**kwargs)
+        return self._query("WHERE asset_id = ?", (asset.id,))
+
+    def get_one_or_none(self, **kwargs):
+        values = self.get(**kwargs)
+        if len(values) == 0:
+            return None
+        elif len(values) > 1:
+            raise RuntimeError
+        return values[0]
+
+    def get_at_time(self, time: datetime, asset: Asset, **kwargs) -> List:
+        return self.get_for_period(start=time, end=time, asset=asset, **kwargs)
+
+    def get_for_period(self, start: datetime, end: datetime, asset: Asset, **kwargs) -> List:
+        self._check_kwargs(**kwargs)
+        start_us = self._to_epoch(start)
+        return self._query(
+            "WHERE asset_id = ? AND start_us BETWEEN ? AND ? AND end_us >= ?",
+            (asset.id, start_us - self.max_duration_us, self._to_epoch(end), start_us),
+        )
+
+    def __len__(self) -> int:
+        with self.pool.connection() as connection:
+            return connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def __iter__(self) -> Iterator:
+        """Build every row, in asset then start order."""
+        return iter(self._query("", ()))
+
+    def _query(self, where: str, parameters: Tuple) -> List:
+        query = f"{self._select} {where} ORDER BY asset_id, start_us, rowid"
+        with self.pool.connection() as connection:
+            rows = connection.execute(query, parameters).fetchall()
+        return [self._make_row(row) for row in rows]
+
+    def _make_row(self, row: Tuple):
+        id, asset_id, start, end, *values = row
+        asset = self._assets.get(asset_id)
+        if asset is None:
+            raise RuntimeError(f"Row in {self.table} references unknown asset {asset_id}")
+        if self.table == 'states':
+            charge, available = values
+            return AssetState(
+                id=id,
+                asset=asset,
+                start=from_epoch_us(start, tz=self.tzinfo),
+                end=from_epoch_us(end, tz=self.tzinfo),
+                charge=charge,
+                available=bool(available),
+            )
+        mw, = values
+        return Instruction(
+            id=id,
+            asset=asset,
+            mw=mw,
+            start=from_epoch_us(start, tz=self.tzinfo),
+            end=from_epoch_us(end, tz=self.tzinfo),
+        )
+
+    def _to_epoch(self, time: datetime) -> int:
+        # An empty table has no time zone to compare with, and nothing to return whatever the time
+        if (time.tzinfo is None) != (self.tzinfo is None) and len(self) > 0:
+            raise TypeError("can't compare offset-naive and offset-aware datetimes")
+        return to_epoch_us(time)
+
+    @staticmethod
+    def _check_kwargs(**kwargs) -> None:
+        if kwargs:
+            raise RuntimeError(f"SQLite stores can only be queried by asset, got {kwargs}")
+
+
+def is_sqlite_input(path: str) -> bool:
+    return os.path.isfile(path) and path.endswith(SQLITE_SUFFIXES)
+
+
+def convert_to_sqlite(json_filepath: str, sqlite_filepath: str) -> None:
+    """Write a JSON input file to a new SQLite file. The history sections
+    go in indexed tables, the rest is kept as JSON in the meta table."""
+    if os.path.exists(sqlite_filepath):
+        raise RuntimeError(f"{sqlite_filepath} already exists.")
+
+    data_dict = load_json(json_filepath)
+    data = fast_load_input_data(data_dict)
+
+    connection = sqlite3.connect(sqlite_filepath)
+    try:
+        with connection:
+            connection.executescript(SCHEMA)
+            write_states(connection=connection, states=data.states)
+            write_instructions(connection=connection, instructions=data.instructions)
+            meta = {
+                'version': SQLITE_FORMAT_VERSION,
+                'input': {key: value for key, value in data_dict.items() if key not in HISTORY_SECTIONS},
+                'utc_offsets': {
+                    'states': get_utc_offset(state.start for state in data.states),
+                    'instructions': get_utc_offset(instruction.start for instruction in data.instructions),
+                },
+                'max_durations_us': {
+                    table: get_max_duration_us(connection=connection, table=table) for table in COLUMNS
+                },
+            }
+            connection.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in meta.items()],
+            )
+    finally:
+        connection.close()
+
+
+def write_states(connection: sqlite3.Connection, states: Sequence[AssetState]) -> None:
+    connection.executemany(
+        "INSERT INTO states (id, asset_id, start_us, end_us, charge, available) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (state.id, state.asset.id, to_epoch_us(state.start), to_epoch_us(state.end), state.charge, state.available)
+            for state in states
+        ),
+    )
+
+
+def write_instructions(connection: sqlite3.Connection, instructions: Sequence[Instruction]) -> None:
+    if any(instruction.id is None for instruction in instructions):
+        raise RuntimeError("Can only store instructions with ids in SQLite.")
+    connection.executemany(
+        "INSERT INTO instructions (id, asset_id, mw, start_us, end_us) VALUES (?, ?, ?, ?, ?)",
+        (
+            (
+                instruction.id,
+                instruction.asset.id,
+                instruction.mw,
+                to_epoch_us(instruction.start),
+                to_epoch_us(instruction.end),
+            )
+            for instruction in instructions
+        ),
+    )
+
+
+def get_max_duration_us(connection: sqlite3.Connection, table: str) -> int:
+    return connection.execute(f"SELECT COALESCE(MAX(end_us - start_us), 0) FROM {table}").fetchone()[0]
+
+
+def load_sqlite_input_data(filepath: str, pool_size: int = POOL_SIZE) -> StreamedInputData:
+    """Load the input in a file written by convert_to_sqlite.
+
+    Only the small sections are read up front. States and instructions
+    are SqliteStores sharing a pool of pool_size read connections, so
+    each query reads just the rows it needs.
+    """
+    pool = ConnectionPool(filepath=filepath, size=pool_size)
+    with pool.connection() as connection:
+        meta = {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM meta")}
+    if meta['version'] != SQLITE_FORMAT_VERSION:
+        raise RuntimeError(
+            f"SQLite input {filepath} is format version {meta['version']}, expected {SQLITE_FORMAT_VERSION}"
+        )
+
+    data: InputData = fast_load_input_data({**meta['input'], **{section: [] for section in HISTORY_SECTIONS}})
+    stores = {
+        section: SqliteStore(
+            pool=pool,
+            table=section,
+            assets=data.assets,
+            max_duration_us=meta['max_durations_us'][section],
+            tz=to_tzinfo(meta['utc_offsets'][section]),
+        )
+        for section in HISTORY_SECTIONS
+    }
+    return StreamedInputData(
+        data=replace(data, **stores),
+        states=stores['states'],
+        instructions=stores['instructions'],
+    )
+
+
+def get_utc_offset(times: Iterable[datetime]) -> Optional[float]:
+    """The fixed offset shared by times, None if they're naive."""
+    tz = get_tzinfo(times)
+    return None if tz is None else tz.utcoffset(None).total_seconds()
+
+
+def to_tzinfo(utc_offset: Optional[float]) -> Optional[tzinfo]:
+    return None if utc_offset is None else timezone(timedelta(seconds=utc_offset))
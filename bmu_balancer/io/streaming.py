@@ -0,0 +1,198 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Set, TextIO, Tuple, Union
+
+from bmu_balancer.io.fast_load import SECTIONS, load_row
+from bmu_balancer.models import AssetState, InputData, Instruction
+from bmu_balancer.operations.columnar import AssetStateColumns, InstructionColumns
+from bmu_balancer.operations.key_store import Index, KeyStore, get_keys
+from bmu_balancer.operations.mutable_key_store import MutableKeyStore
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = ' \t\n\r'
+NUMBER_CHARS = '0123456789.eE+-'
+# Per-asset history sections, which are streamed rather than loaded whole
+HISTORY_SECTIONS = ('states', 'instructions')
+
+
+class JsonStreamReader:
+    """Reads a JSON document from a file a chunk at a time.
+
+    Only the current chunk and any value being decoded are held in
+    memory. Values are decoded with json.JSONDecoder.raw_decode, reading
+    more of the file whenever one runs past the end of the buffer.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def iter_object(self) -> Iterator[str]:
+        """Yield each key of the object at the current position. The
+        caller must consume its value before asking for the next key."""
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.decode()
+            self._expect(':')
+            yield key
+            if self._next_delimiter('}'):
+                return
+
+    def iter_array(self) -> Iterator[Any]:
+        """Yield each decoded item of the array at the current position."""
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.decode()
+            if self._next_delimiter(']'):
+                return
+
+    def decode(self) -> Any:
+        """Decode the value at the current position."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # A number cut off by the end of the buffer still decodes
+                if self._eof or (end < len(self._buffer) and self._buffer[end] not in NUMBER_CHARS):
+                    self._pos = end
+                    return value
+            self._read()
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise RuntimeError(f"Expected {char!r} in JSON stream, got {found!r}")
+        self._pos += 1
+
+    def _next_delimiter(self, close: str) -> bool:
+        """Consume a comma or close, returning whether it was close."""
+        found = self._peek()
+        self._pos += 1
+        if found == close:
+            return True
+        elif found != ',':
+            raise RuntimeError(f"Expected ',' or {close!r} in JSON stream, got {found!r}")
+        return False
+
+    def _peek(self) -> str:
+        """Return the next non-whitespace character, reading more if needed."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._eof:
+                return ''
+            self._read()
+
+    def _read(self) -> None:
+        # Read at least as much as is buffered, so decoding a
+        # value that spans many chunks is re-tried O(log n) times
+        chunk = self.file.read(max(self.chunk_size, len(self._buffer) - self._pos))
+        if not chunk:
+            self._eof = True
+        # Drop what has been consumed so the buffer stays one chunk or so long
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+
+
+@dataclass(frozen=True)
+class StreamedInputData:
+    """Input data with the history sections already in queryable stores."""
+    data: InputData
+    states: Union[KeyStore[AssetState], AssetStateColumns]
+    instructions: Union[KeyStore[Instruction], InstructionColumns]
+
+
+def stream_input_data(
+        filepath: str,
+        indexes: Tuple[Index, ...] = (),
+        chunk_size: int = CHUNK_SIZE,
+) -> StreamedInputData:
+    """Load input data without holding the whole file in memory.
+
+    The first pass loads every section except states and instructions,
+    skipping over those a record at a time. The second pass streams
+    their records straight into KeyStores indexed on indexes, dropping
+    any for assets outside the BOA's BMU, so memory grows with the
+    history of the BMU rather than with the file. Records are loaded as
+    fast_load_input_data would, without its validate pass.
+    """
+    with open(filepath) as file:
+        data_dict = load_sections(reader=JsonStreamReader(file, chunk_size=chunk_size))
+
+    context: Dict[str, Dict] = {}
+    for section in SECTIONS:
+        if section not in HISTORY_SECTIONS:
+            items = [load_row(section, row, context) for row in data_dict[section]]
+            context[section] = {item.id: item for item in items}
+    boa = load_row('boa', data_dict['boa'], context)
+
+    with open(filepath) as file:
+        stores = load_history(
+            reader=JsonStreamReader(file, chunk_size=chunk_size),
+            context=context,
+            asset_ids={asset.id for asset in boa.assets},
+            indexes=indexes,
+        )
+
+    data = InputData(
+        parameters=load_row('parameters', data_dict['parameters'], context),
+        boa=boa,
+        states=stores['states'].objects,
+        instructions=stores['instructions'].objects,
+        **{
+            section: [context[section][row['id']] for row in data_dict[section]]
+            for section in SECTIONS
+            if section not in HISTORY_SECTIONS
+        },
+    )
+    return StreamedInputData(data=data, states=stores['states'], instructions=stores['instructions'])
+
+
+def load_sections(reader: JsonStreamReader) -> Dict[str, Any]:
+    """Decode every top level section except the history ones."""
+    data_dict = {}
+    for key in reader.iter_object():
+        if key in HISTORY_SECTIONS:
+            for _ in reader.iter_array():
+                pass
+        else:
+            data_dict[key] = reader.decode()
+    return data_dict
+
+
+def load_history(
+        reader: JsonStreamReader,
+        context: Dict[str, Dict],
+        asset_ids: Set[int],
+        indexes: Tuple[Index, ...],
+) -> Dict[str, KeyStore]:
+    stores = {
+        'states': MutableKeyStore(keys=get_keys(AssetState), indexes=indexes),
+        'instructions': MutableKeyStore(keys=get_keys(Instruction), indexes=indexes),
+    }
+    for key in reader.iter_object():
+        store: Optional[MutableKeyStore] = stores.get(key)
+        if store is None:
+            reader.decode()
+            continue
+        for row in reader.iter_array():
+            if row.get('asset') in asset_ids:
+                store.insert(load_row(key, row, context))
+
+    return {key: store.snapshot() for key, store in stores.items()}
@@ -1,14 +1,20 @@
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, List, Optional
+from dataclasses import dataclass, replace
+from datetime import datetime, tzinfo
+from time import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 from pulp import LpVariable
 
 from bmu_balancer.models.inputs import Asset, BOA
 from bmu_balancer.models.outputs import Instruction
-from bmu_balancer.operations.utils import SEC_IN_HOUR
+from bmu_balancer.models.utils import compact
+from bmu_balancer.operations.utils import SEC_IN_HOUR, US_IN_SEC, from_epoch_us, to_epoch_us
 
+SEC_IN_DAY = 86400
 
+
+@compact()
 @dataclass(frozen=True)
 class Candidate:
     asset: Asset
@@ -34,17 +40,210 @@ class Candidate:
         return self.boa.is_import
 
 
+@dataclass(frozen=True)
+class AssetCandidates:
+    """The candidate parameters worked out for a single asset."""
+    asset: Asset
+    mw_options: Tuple[float, ...]
+    adjusted_start: Optional[datetime] = None
+    adjusted_end: Optional[datetime] = None
+
+
+@dataclass(frozen=True)
+class CandidateSet:
+    """All the candidates for a BOA held as parallel arrays.
+
+    Each candidate is a position in the arrays. Its asset is looked up
+    through asset_index in the assets table, and start and end are int64
+    microseconds since the epoch. Properties the engine needs, such as
+    hours, are computed once here rather than per candidate per use.
+    cost, the cost of delivering each candidate, is filled in once
+    rates are known.
+    """
+    boa: BOA
+    assets: Tuple[Asset, ...]
+    asset_index: np.ndarray
+    mw: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    hours: np.ndarray
+    cost: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_asset_candidates(cls, boa: BOA, asset_candidates: Sequence[AssetCandidates]) -> "CandidateSet":
+        counts = [len(item.mw_options) for item in asset_candidates]
+        start = np.repeat(
+            np.array([to_epoch_us(item.adjusted_start or boa.start) for item in asset_candidates], dtype=np.int64),
+            counts,
+        )
+        end = np.repeat(
+            np.array([to_epoch_us(item.adjusted_end or boa.end) for item in asset_candidates], dtype=np.int64),
+            counts,
+        )
+        return cls(
+            boa=boa,
+            assets=tuple(item.asset for item in asset_candidates),
+            asset_index=np.repeat(np.arange(len(asset_candidates), dtype=np.int64), counts),
+            mw=np.array([mw for item in asset_candidates for mw in item.mw_options], dtype=np.float64),
+            start=start,
+            end=end,
+            hours=get_hours(start=start, end=end),
+        )
+
+    @classmethod
+    def from_candidates(cls, boa: BOA, candidates: Sequence[Candidate]) -> "CandidateSet":
+        asset_positions: Dict[Asset, int] = {}
+        for candidate in candidates:
+            asset_positions.setdefault(candidate.asset, len(asset_positions))
+
+        start = np.array([to_epoch_us(candidate.start) for candidate in candidates], dtype=np.int64)
+        end = np.array([to_epoch_us(candidate.end) for candidate in candidates], dtype=np.int64)
+        return cls(
+            boa=boa,
+            assets=tuple(asset_positions),
+            asset_index=np.array([asset_positions[candidate.asset] for candidate in candidates], dtype=np.int64),
+            mw=np.array([candidate.mw for candidate in candidates], dtype=np.float64),
+            start=start,
+            end=end,
+            hours=get_hours(start=start, end=end),
+        )
+
+    @property
+    def profit(self) -> np.ndarray:
+        return self.boa.price_mw_hr * self.hours * self.mw
+
+    @property
+    def objective(self) -> np.ndarray:
+        """Objective coefficient of each candidate, profit less cost."""
+        if self.cost is None:
+            raise RuntimeError("Candidate costs have not been set.")
+        return self.profit - self.cost
+
+    def get_asset_groups(self) -> List[np.ndarray]:
+        """Candidate positions for each asset in the assets table."""
+        order = np.argsort(self.asset_index, kind='stable')
+        bounds = np.searchsorted(self.asset_index[order], np.arange(len(self.assets) + 1))
+        return [order[first:stop] for first, stop in zip(bounds[:-1], bounds[1:])]
+
+    def take(self, positions: np.ndarray) -> "CandidateSet":
+        """The candidates at positions, keeping the same assets table."""
+        return replace(
+            self,
+            asset_index=self.asset_index[positions],
+            mw=self.mw[positions],
+            start=self.start[positions],
+            end=self.end[positions],
+            hours=self.hours[positions],
+            cost=None if self.cost is None else self.cost[positions],
+        )
+
+    def get_candidate(self, n: int) -> Candidate:
+        start = self._to_datetime(self.start[n])
+        end = self._to_datetime(self.end[n])
+        return Candidate(
+            asset=self.assets[self.asset_index[n]],
+            boa=self.boa,
+            mw=to_mw(self.mw[n]),
+            adjusted_start=None if start == self.boa.start else start,
+            adjusted_end=None if end == self.boa.end else end,
+        )
+
+    def get_instruction(self, n: int) -> Instruction:
+        return Instruction(
+            asset=self.assets[self.asset_index[n]],
+            boa=self.boa,
+            mw=to_mw(self.mw[n]),
+            start=self._to_datetime(self.start[n]),
+            end=self._to_datetime(self.end[n]),
+        )
+
+    def to_candidates(self) -> List[Candidate]:
+        return [self.get_candidate(n) for n in range(len(self))]
+
+    def _to_datetime(self, value: int) -> datetime:
+        return from_epoch_us(value, tz=self.tzinfo)
+
+    @property
+    def tzinfo(self) -> Optional[tzinfo]:
+        return self.boa.start.tzinfo
+
+    def __len__(self) -> int:
+        return len(self.mw)
+
+
 @dataclass(frozen=True)
 class Variables:
-    candidates: Dict[Candidate, LpVariable]
+    candidates: CandidateSet
+    selected: List[LpVariable]
+
+    @property
+    def count(self) -> int:
+        return len(self.selected)
+
+
+@dataclass(frozen=True)
+class AssetSteps:
+    """An asset's mw options as an integer number of steps,
+    mw = first + step * steps, with steps from 0 to count - 1."""
+    positions: np.ndarray
+    first: float
+    step: float
+    variable: LpVariable
+
+    @property
+    def count(self) -> int:
+        return len(self.positions)
+
+
+@dataclass(frozen=True)
+class StepVariables:
+    """Variables of the integer step formulation. Assets whose options
+    aren't an evenly spaced grid keep a binary per candidate in selected,
+    keyed by candidate position."""
+    candidates: CandidateSet
+    steps: Dict[int, AssetSteps]
+    selected: Dict[int, LpVariable]
 
     @property
     def count(self) -> int:
-        return len(self.candidates)
+        return len(self.steps) + len(self.selected)
+
+
+@dataclass(frozen=True)
+class SolverOptions:
+    """Limits on a solve. time_limit is the seconds run_engine has in
+    all, after which CBC gives back its best solution so far. CBC stops
+    once that is within gap_rel, relative to the objective, or gap_abs
+    of the best possible, and uses up to threads threads."""
+    time_limit: Optional[float] = None
+    gap_rel: Optional[float] = None
+    gap_abs: Optional[float] = None
+    threads: Optional[int] = None
+
+    def get_time_left(self, start: float) -> Optional[float]:
+        """Seconds left of time_limit since start, a time() value."""
+        if self.time_limit is None:
+            return None
+        return self.time_limit - (time() - start)
 
 
 @dataclass(frozen=True)
 class Solution:
+    """gap is how far objective could be below the best possible,
+    relative to the objective, 0 when it's known to be optimal."""
     status: str
     objective: Optional[int] = None
     instructions: Optional[List[Instruction]] = ()
+    gap: Optional[float] = None
+
+
+def get_hours(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Vectorised Candidate.hours, which like timedelta.seconds
+    ignores any whole days in the duration."""
+    return ((end - start) // US_IN_SEC % SEC_IN_DAY) / SEC_IN_HOUR
+
+
+def to_mw(value: float) -> Union[int, float]:
+    """Give back whole mw values as ints, as the candidate grids are."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
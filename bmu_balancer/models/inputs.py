@@ -2,12 +2,16 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional, Tuple
 
+from bmu_balancer.models.utils import compact
 
+
+@compact()
 @dataclass(frozen=True)
 class Parameters:
     execution_time: datetime
 
 
+@compact(hash_fields=("id",))
 @dataclass(frozen=True)
 class Asset:
     """An asset is any item that has the ability
@@ -33,6 +37,7 @@ class Asset:
         return f"Asset({self.name or self.id})"
 
 
+@compact(hash_fields=("id",))
 @dataclass(frozen=True)
 class Rate:
     id: int
@@ -45,6 +50,7 @@ class Rate:
     max_mw: Optional[int]
 
 
+@compact(hash_fields=("id",))
 @dataclass(frozen=True)
 class AssetState:
     id: int
@@ -55,6 +61,7 @@ class AssetState:
     available: bool
 
 
+@compact(hash_fields=("id",))
 @dataclass(frozen=True)
 class BMU:
     """A BM Unit is a collection of assets which respond together
@@ -67,6 +74,7 @@ class BMU:
         return f"BMU({self.name or self.id})"
 
 
+@compact(hash_fields=("id",))
 @dataclass(frozen=True)
 class Offer:
     id: int
@@ -79,6 +87,7 @@ class Offer:
         return f"Offer(start: {self.start.isoformat()}, end: {self.end.isoformat()}, price: {self.price_mw_hr})"
 
 
+@compact(hash_fields=("id",))
 @dataclass(frozen=True)
 class BOA:
     id: int
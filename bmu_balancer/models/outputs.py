@@ -3,9 +3,11 @@ from datetime import datetime
 from typing import Optional
 
 from bmu_balancer.models.inputs import Asset, BOA
+from bmu_balancer.models.utils import compact
 from bmu_balancer.operations.utils import SEC_IN_HOUR
 
 
+@compact()
 @dataclass(frozen=True)
 class Instruction:
     asset: Asset
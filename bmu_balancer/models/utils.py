@@ -0,0 +1,51 @@
+from dataclasses import fields
+from typing import Callable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar('T')
+
+HASH_SLOT = '_hash'
+
+
+def compact(hash_fields: Optional[Tuple[str, ...]] = None) -> Callable[[Type[T]], Type[T]]:
+    """Rebuild a frozen dataclass with __slots__ and a cached hash.
+
+    Instances have no __dict__, and the hash is worked out on first use
+    then stored, so objects nested in dict keys aren't re-hashed field
+    by field on every lookup. hash_fields restricts the hash to a subset
+    of fields, e.g. just the id, which is valid as equal objects always
+    share them. Apply above @dataclass(frozen=True).
+    """
+    def wrap(cls: Type[T]) -> Type[T]:
+        field_names = tuple(f.name for f in fields(cls))
+        hashed = hash_fields or field_names
+
+        cls_dict = {
+            key: value
+            for key, value in cls.__dict__.items()
+            # Defaults are already baked into __init__ and would clash with the slots
+            if key not in field_names + ('__dict__', '__weakref__')
+        }
+        cls_dict['__slots__'] = field_names + (HASH_SLOT,)
+
+        def __hash__(self) -> int:
+            try:
+                return getattr(self, HASH_SLOT)
+            except AttributeError:
+                value = hash((cls.__name__,) + tuple(getattr(self, name) for name in hashed))
+                object.__setattr__(self, HASH_SLOT, value)
+                return value
+
+        def __getstate__(self) -> Tuple:
+            return tuple(getattr(self, name) for name in field_names)
+
+        def __setstate__(self, state: Tuple) -> None:
+            for name, value in zip(field_names, state):
+                object.__setattr__(self, name, value)
+
+        cls_dict.update(__hash__=__hash__, __getstate__=__getstate__, __setstate__=__setstate__)
+
+        compact_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+        compact_cls.__qualname__ = cls.__qualname__
+        return compact_cls
+
+    return wrap
@@ -0,0 +1,323 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, tzinfo
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bmu_balancer.models import Asset, AssetState, Instruction
+from bmu_balancer.operations.utils import from_epoch_us, to_epoch_us
+
+
+@dataclass(frozen=True)
+class AssetColumns(ABC):
+    """Rows of per-asset time series held as numpy columns.
+
+    Rows are sorted by asset then start, so each asset's rows are a
+    contiguous slice given by offsets. Times are int64 microseconds since
+    the epoch. max_end is the running maximum of end within each asset,
+    which lets period queries bisect rather than scan.
+
+    Supports the asset lookups the pre-solve makes on a KeyStore
+    (get, get_one_or_none, get_at_time and get_for_period),
+    building row objects only for the rows returned.
+    """
+    assets: Tuple[Asset, ...]
+    asset_ids: np.ndarray
+    offsets: np.ndarray
+    asset_index: np.ndarray
+    id: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    max_end: np.ndarray
+    tzinfo: Optional[tzinfo]
+
+    def get(self, asset: Asset, **kwargs) -> List:
+        self._check_kwargs(**kwargs)
+        first, stop = self._get_asset_rows(asset=asset)
+        return self._make_rows(np.arange(first, stop))
+
+    def get_one_or_none(self, **kwargs):
+        values = self.get(**kwargs)
+        if len(values) == 0:
+            return None
+        elif len(values) > 1:
+            raise RuntimeError
+        return values[0]
+
+    def get_at_time(self, time: datetime, asset: Asset, **kwargs) -> List:
+        return self.get_for_period(start=time, end=time, asset=asset, **kwargs)
+
+    def get_for_period(self, start: datetime, end: datetime, asset: Asset, **kwargs) -> List:
+        self._check_kwargs(**kwargs)
+        return self._make_rows(self._get_period_rows(asset=asset, start=start, end=end))
+
+    def overlap_mask(self, start: datetime, end: datetime) -> np.ndarray:
+        """Mask of the rows, across all assets, that overlap the period."""
+        return (self.start <= self._to_epoch(end)) & (self.end >= self._to_epoch(start))
+
+    def _get_period_rows(self, asset: Asset, start: datetime, end: datetime) -> np.ndarray:
+        first, stop = self._get_asset_rows(asset=asset)
+        stop = first + np.searchsorted(self.start[first:stop], self._to_epoch(end), side='right')
+        start_us = self._to_epoch(start)
+        first = first + np.searchsorted(self.max_end[first:stop], start_us, side='left')
+        rows = np.arange(first, stop)
+        return rows[self.end[first:stop] >= start_us]
+
+    def _get_asset_rows(self, asset: Asset) -> Tuple[int, int]:
+        n = int(np.searchsorted(self.asset_ids, asset.id))
+        if n == len(self.asset_ids) or self.asset_ids[n] != asset.id:
+            return 0, 0
+        return int(self.offsets[n]), int(self.offsets[n + 1])
+
+    def _get_asset_positions(self, assets: Sequence[Asset]) -> np.ndarray:
+        """Position of each asset in the asset table, -1 if it has no rows."""
+        ids = np.array([asset.id for asset in assets], dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.asset_ids, ids), max(len(self.asset_ids) - 1, 0))
+        found = len(self.asset_ids) > 0 and self.asset_ids[positions] == ids
+        return np.where(found, positions, -1)
+
+    def _to_epoch(self, time: datetime) -> int:
+        # An empty store has no time zone to compare with, and nothing to return whatever the time
+        if (time.tzinfo is None) != (self.tzinfo is None) and len(self) > 0:
+            raise TypeError("can't compare offset-naive and offset-aware datetimes")
+        return to_epoch_us(time)
+
+    def _to_datetime(self, value: int) -> datetime:
+        return from_epoch_us(value, tz=self.tzinfo)
+
+    def _make_rows(self, rows: np.ndarray) -> List:
+        return [self._make_row(int(row)) for row in rows]
+
+    @abstractmethod
+    def _make_row(self, row: int):
+        """Build the row object at position row."""
+
+    @staticmethod
+    def _check_kwargs(**kwargs) -> None:
+        if kwargs:
+            raise RuntimeError(f"Columnar stores can only be queried by asset, got {kwargs}")
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def __iter__(self) -> Iterator:
+        """Build every row, in asset then start order."""
+        return (self._make_row(row) for row in range(len(self)))
+
+
+@dataclass(frozen=True)
+class AssetStateColumns(AssetColumns):
+    """AssetState rows stored as columns, with vectorised availability."""
+    charge: np.ndarray
+    available: np.ndarray
+
+    @classmethod
+    def from_states(cls, states: Iterable[AssetState]) -> "AssetStateColumns":
+        states = list(states)
+        return cls.from_columns(
+            assets=get_unique_assets(state.asset for state in states),
+            asset_id=np.array([state.asset.id for state in states], dtype=np.int64),
+            id=np.array([state.id for state in states], dtype=np.int64),
+            start=np.array([to_epoch_us(state.start) for state in states], dtype=np.int64),
+            end=np.array([to_epoch_us(state.end) for state in states], dtype=np.int64),
+            charge=np.array([state.charge for state in states], dtype=np.float64),
+            available=np.array([state.available for state in states], dtype=np.bool_),
+            tzinfo=get_tzinfo(state.start for state in states),
+        )
+
+    @classmethod
+    def from_columns(
+            cls,
+            assets: Iterable[Asset],
+            asset_id: np.ndarray,
+            id: np.ndarray,
+            start: np.ndarray,
+            end: np.ndarray,
+            charge: np.ndarray,
+            available: np.ndarray,
+            tzinfo: Optional[tzinfo] = None,
+    ) -> "AssetStateColumns":
+        """Build from raw columns, which are only copied if they need sorting."""
+        order = get_sort_order(asset_id=asset_id, start=start)
+        if order is not None:
+            asset_id, id, start, end, charge, available = (
+                column[order] for column in (asset_id, id, start, end, charge, available)
+            )
+        return cls(
+            charge=charge,
+            available=available,
+            tzinfo=tzinfo,
+            **get_asset_columns(assets=assets, asset_id=asset_id, id=id, start=start, end=end),
+        )
+
+    def get_availability(self, assets: Sequence[Asset], start: datetime, end: datetime) -> np.ndarray:
+        """For each asset, whether it has state data for the period
+        and is available in all of it, computed for all assets at once."""
+        overlapping = self.overlap_mask(start=start, end=end)
+        size = len(self.assets)
+        n_states = np.bincount(self.asset_index[overlapping], minlength=size)
+        n_unavailable = np.bincount(self.asset_index[overlapping & ~self.available], minlength=size)
+
+        positions = self._get_asset_positions(assets)
+        known = positions >= 0
+        availability = np.zeros(len(positions), dtype=np.bool_)
+        availability[known] = (n_states[positions[known]] > 0) & (n_unavailable[positions[known]] == 0)
+        return availability
+
+    def _make_row(self, row: int) -> AssetState:
+        return AssetState(
+            id=int(self.id[row]),
+            asset=self.assets[self.asset_index[row]],
+            start=self._to_datetime(self.start[row]),
+            end=self._to_datetime(self.end[row]),
+            charge=float(self.charge[row]),
+            available=bool(self.available[row]),
+        )
+
+
+@dataclass(frozen=True)
+class InstructionColumns(AssetColumns):
+    """Instruction rows stored as columns."""
+    mw: np.ndarray
+
+    @classmethod
+    def from_instructions(cls, instructions: Iterable[Instruction]) -> "InstructionColumns":
+        instructions = list(instructions)
+        if any(instruction.id is None for instruction in instructions):
+            raise RuntimeError("Can only store instructions with ids as columns.")
+        return cls.from_columns(
+            assets=get_unique_assets(instruction.asset for instruction in instructions),
+            asset_id=np.array([instruction.asset.id for instruction in instructions], dtype=np.int64),
+            id=np.array([instruction.id for instruction in instructions], dtype=np.int64),
+            start=np.array([to_epoch_us(instruction.start) for instruction in instructions], dtype=np.int64),
+            end=np.array([to_epoch_us(instruction.end) for instruction in instructions], dtype=np.int64),
+            mw=np.array([instruction.mw for instruction in instructions], dtype=np.float64),
+            tzinfo=get_tzinfo(instruction.start for instruction in instructions),
+        )
+
+    @classmethod
+    def from_columns(
+            cls,
+            assets: Iterable[Asset],
+            asset_id: np.ndarray,
+            id: np.ndarray,
+            start: np.ndarray,
+            end: np.ndarray,
+            mw: np.ndarray,
+            tzinfo: Optional[tzinfo] = None,
+    ) -> "InstructionColumns":
+        """Build from raw columns, which are only copied if they need sorting."""
+        order = get_sort_order(asset_id=asset_id, start=start)
+        if order is not None:
+            asset_id, id, start, end, mw = (column[order] for column in (asset_id, id, start, end, mw))
+        return cls(
+            mw=mw,
+            tzinfo=tzinfo,
+            **get_asset_columns(assets=assets, asset_id=asset_id, id=id, start=start, end=end),
+        )
+
+    def get_current(self, assets: Sequence[Asset], time: datetime) -> np.ndarray:
+        """For each asset, the row of the instruction in progress at time,
+        or -1 if there isn't one, computed for all assets at once."""
+        current = np.full(len(assets), -1, dtype=np.int64)
+        if len(self) == 0:
+            return current
+        rows = np.flatnonzero(self.overlap_mask(start=time, end=time))
+        positions = self._get_asset_positions(assets)
+        known = positions >= 0
+        # Only the assets asked about, as InstructionTimeline.current only checks the one it's asked about
+        counts = np.bincount(self.asset_index[rows], minlength=len(self.assets))[positions[known]]
+        if np.any(counts > 1):
+            raise RuntimeError(f"Only expected one instruction at {time} got {counts.max()} for an asset")
+
+        row_lookup = np.full(len(self.assets), -1, dtype=np.int64)
+        row_lookup[self.asset_index[rows]] = rows
+        current[known] = row_lookup[positions[known]]
+        return current
+
+    def get_prior_end(self, assets: Sequence[Asset], time: datetime) -> Tuple[np.ndarray, np.ndarray]:
+        """For each asset, the end of the instruction that most recently
+        ended before time, and a mask of the assets that have one."""
+        prior_end = np.zeros(len(assets), dtype=np.int64)
+        found = np.zeros(len(assets), dtype=np.bool_)
+        if len(self) == 0:
+            return prior_end, found
+        time_us = self._to_epoch(time)
+        ended = self.end < time_us
+        missing = np.iinfo(np.int64).min
+        latest = np.maximum.reduceat(np.where(ended, self.end, missing), self.offsets[:-1])
+        has_prior = np.bincount(self.asset_index[ended], minlength=len(self.assets)) > 0
+
+        positions = self._get_asset_positions(assets)
+        known = positions >= 0
+        prior_end[known] = latest[positions[known]]
+        found[known] = has_prior[positions[known]]
+        return prior_end, found
+
+    def _make_row(self, row: int) -> Instruction:
+        return Instruction(
+            id=int(self.id[row]),
+            asset=self.assets[self.asset_index[row]],
+            mw=float(self.mw[row]),
+            start=self._to_datetime(self.start[row]),
+            end=self._to_datetime(self.end[row]),
+        )
+
+
+def get_unique_assets(assets: Iterable[Asset]) -> List[Asset]:
+    unique: Dict[int, Asset] = {}
+    for asset in assets:
+        unique.setdefault(asset.id, asset)
+    return list(unique.values())
+
+
+def get_tzinfo(times: Iterable[datetime]) -> Optional[tzinfo]:
+    """Return the time zone shared by times, which must
+    either all be aware or all naive."""
+    tzinfos = {time.tzinfo is None: time.tzinfo for time in times}
+    if len(tzinfos) > 1:
+        raise RuntimeError("Cannot store a mix of offset-naive and offset-aware times.")
+    return next(iter(tzinfos.values()), None)
+
+
+def get_sort_order(asset_id: np.ndarray, start: np.ndarray) -> Optional[np.ndarray]:
+    """Return the order that sorts rows by asset then start, or None if already sorted."""
+    if len(asset_id) < 2:
+        return None
+    same_asset = asset_id[1:] == asset_id[:-1]
+    if np.all((asset_id[1:] > asset_id[:-1]) | (same_asset & (start[1:] >= start[:-1]))):
+        return None
+    return np.lexsort((start, asset_id))
+
+
+def get_asset_columns(
+        assets: Iterable[Asset],
+        asset_id: np.ndarray,
+        id: np.ndarray,
+        start: np.ndarray,
+        end: np.ndarray,
+) -> Dict:
+    """Derive the shared AssetColumns fields from rows sorted by asset then start."""
+    asset_ids, offsets = np.unique(asset_id, return_index=True)
+    offsets = np.append(offsets, len(asset_id)).astype(np.int64)
+
+    asset_lookup = {asset.id: asset for asset in assets}
+    missing = set(asset_ids.tolist()) - set(asset_lookup)
+    if missing:
+        raise RuntimeError(f"Rows reference unknown assets {sorted(missing)}")
+
+    max_end = np.empty_like(end)
+    for first, stop in zip(offsets[:-1], offsets[1:]):
+        max_end[first:stop] = np.maximum.accumulate(end[first:stop])
+
+    return dict(
+        assets=tuple(asset_lookup[asset] for asset in asset_ids.tolist()),
+        asset_ids=asset_ids,
+        offsets=offsets,
+        asset_index=np.repeat(np.arange(len(asset_ids)), np.diff(offsets)),
+        id=id,
+        start=start,
+        end=end,
+        max_end=max_end,
+    )
@@ -2,8 +2,10 @@ import logging
 from datetime import datetime
 from typing import Optional, Union
 
+import numpy as np
+
 from bmu_balancer.models import Asset, Instruction, Rate
-from bmu_balancer.models.engine import Candidate
+from bmu_balancer.models.engine import Candidate, CandidateSet
 from bmu_balancer.operations.key_store import KeyStore
 
 log = logging.getLogger(__name__)
@@ -16,14 +18,21 @@ def get_prior_instruction(
 ) -> Optional[Instruction]:
     """Given a set of instructions, an asset and a time,
     return the instruction for the asset prior to time
-    if it exists."""
+    if it exists.
 
-    asset_instructions = instructions.get(asset=asset)
-    asset_instructions.sort(key=lambda x: x.end, reverse=True)
+    Note: to answer this for many assets or times build
+    an InstructionTimeline instead.
+    """
 
-    for asset_instruction in asset_instructions:
-        if asset_instruction.end < time:
-            return asset_instruction
+    return max(
+        (
+            asset_instruction
+            for asset_instruction in instructions.get(asset=asset)
+            if asset_instruction.end < time
+        ),
+        key=lambda x: x.end,
+        default=None,
+    )
 
 
 def get_instruction_cost(
@@ -66,3 +75,27 @@ def get_ramp_cost(instruction: Union[Candidate, Instruction], rates: KeyStore[Ra
     ramp_down_cost = instruction.mw / ramp_down_rate * 0.5
 
     return ramp_up_cost + ramp_down_cost
+
+
+def get_instruction_costs(candidates: CandidateSet, rates: KeyStore[Rate]) -> np.ndarray:
+    """Vectorised get_instruction_cost for every candidate in a set."""
+    asset_rates = []
+    for asset in candidates.assets:
+        rate = rates.get_one_or_none(asset=asset)
+        if rate is None:
+            raise RuntimeError(f"Missing rate for asset {asset}")
+        asset_rates.append(rate)
+
+    direction = 'import' if candidates.boa.is_import else 'export'
+    running_cost = np.array([asset.running_cost_per_mw_hr for asset in candidates.assets], dtype=np.float64)
+    ramp_up_rate = np.array([getattr(rate, f'ramp_up_{direction}') for rate in asset_rates], dtype=np.float64)
+    ramp_down_rate = np.array([getattr(rate, f'ramp_down_{direction}') for rate in asset_rates], dtype=np.float64)
+
+    index = candidates.asset_index
+    with np.errstate(divide='raise', invalid='raise'):
+        return (
+            # Cost of main delivery
+            running_cost[index] * candidates.hours
+            # cost to deliver ramp up + down
+            + (candidates.mw / ramp_up_rate[index] * 0.5 + candidates.mw / ramp_down_rate[index] * 0.5)
+        )
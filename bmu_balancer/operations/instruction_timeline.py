@@ -0,0 +1,92 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from bmu_balancer.models import Asset, Instruction
+from bmu_balancer.operations.interval_index import IntervalIndex
+from bmu_balancer.operations.key_store import KeyStore
+
+
+@dataclass(frozen=True)
+class AssetTimeline:
+    """An asset's instructions sorted by end and by start."""
+    by_end: Tuple[Instruction, ...]
+    ends: Tuple[datetime, ...]
+    by_start: IntervalIndex[Instruction]
+
+    @classmethod
+    def from_instructions(cls, instructions: Iterable[Instruction]) -> "AssetTimeline":
+        by_end = tuple(sorted(instructions, key=lambda x: x.end))
+        return cls(
+            by_end=by_end,
+            ends=tuple(instruction.end for instruction in by_end),
+            by_start=IntervalIndex.from_items(by_end),
+        )
+
+    def prior(self, time: datetime) -> Optional[Instruction]:
+        """Return the instruction that most recently ended before time,
+        taking the first given if several ended together."""
+        n = bisect_left(self.ends, time)
+        if n == 0:
+            return None
+        return self.by_end[bisect_left(self.ends, self.ends[n - 1])]
+
+    def current(self, time: datetime) -> Optional[Instruction]:
+        """Return the instruction in progress at time."""
+        instructions = self.by_start.at_time(time=time)
+        if len(instructions) > 1:
+            raise RuntimeError(
+                f"Only expected one instruction at {time} got {instructions}"
+            )
+        return instructions[0] if instructions else None
+
+    def next(self, time: datetime) -> Optional[Instruction]:
+        """Return the first instruction to start after time."""
+        n = bisect_right(self.by_start.starts, time)
+        if n == len(self.by_start):
+            return None
+        return self.by_start.items[n]
+
+
+EMPTY_TIMELINE = AssetTimeline.from_instructions(())
+
+
+@dataclass(frozen=True)
+class InstructionTimeline:
+    """Instructions per asset, sorted once up front.
+
+    Prior, current and next lookups are bisects over the asset's
+    timeline. Nothing is sorted or cached on query, so a single
+    timeline can be shared by any number of BOA solves.
+    """
+    assets: Dict[Asset, AssetTimeline]
+
+    @classmethod
+    def from_instructions(cls, instructions: Iterable[Instruction]) -> "InstructionTimeline":
+        asset_instructions = defaultdict(list)
+        for instruction in instructions:
+            asset_instructions[instruction.asset].append(instruction)
+
+        return cls(assets={
+            asset: AssetTimeline.from_instructions(instructions)
+            for asset, instructions in asset_instructions.items()
+        })
+
+    @classmethod
+    def from_key_store(cls, instructions: KeyStore[Instruction], assets: Iterable[Asset]) -> "InstructionTimeline":
+        """Build timelines only for the given assets."""
+        return cls(assets={
+            asset: AssetTimeline.from_instructions(instructions.get(asset=asset))
+            for asset in assets
+        })
+
+    def prior(self, asset: Asset, time: datetime) -> Optional[Instruction]:
+        return self.assets.get(asset, EMPTY_TIMELINE).prior(time=time)
+
+    def current(self, asset: Asset, time: datetime) -> Optional[Instruction]:
+        return self.assets.get(asset, EMPTY_TIMELINE).current(time=time)
+
+    def next(self, asset: Asset, time: datetime) -> Optional[Instruction]:
+        return self.assets.get(asset, EMPTY_TIMELINE).next(time=time)
@@ -0,0 +1,48 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import accumulate
+from typing import Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass(frozen=True)
+class IntervalIndex(Generic[T]):
+    """Items with a start and end sorted for logarithmic time queries.
+
+    Items are ordered by start alongside a running maximum of their ends,
+    so a query bisects for the last item starting before the query end and
+    the first item that could still be running at the query start. For
+    non-overlapping series, such as an asset's states, everything between
+    the two is a match. Intervals are treated as closed at both ends.
+    """
+    items: Tuple[T, ...]
+    starts: Tuple[datetime, ...]
+    max_ends: Tuple[datetime, ...]
+
+    @classmethod
+    def from_items(cls, items: Iterable[T]) -> "IntervalIndex[T]":
+        ordered = tuple(sorted(items, key=lambda x: x.start))
+        return cls(
+            items=ordered,
+            starts=tuple(item.start for item in ordered),
+            max_ends=tuple(accumulate((item.end for item in ordered), max)),
+        )
+
+    def at_time(self, time: datetime) -> List[T]:
+        """Return the items running at time."""
+        return self.overlapping(start=time, end=time)
+
+    def overlapping(self, start: datetime, end: datetime) -> List[T]:
+        """Return the items that overlap the period, ordered by start."""
+        stop = bisect_right(self.starts, end)
+        first = bisect_left(self.max_ends, start, 0, stop)
+        return [
+            item
+            for item in self.items[first:stop]
+            if item.end >= start
+        ]
+
+    def __len__(self) -> int:
+        return len(self.items)
@@ -1,18 +1,48 @@
 from collections import defaultdict
 from dataclasses import dataclass, field, fields
+from datetime import datetime
 from functools import lru_cache
-from typing import Any, Dict, Generic, List, Protocol, Set, Tuple, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Protocol, Set, Tuple, Type, TypeVar, Union
+
+from bmu_balancer.operations.interval_index import IntervalIndex
+from bmu_balancer.operations.query_cache import CacheStats, QueryCache
 
 T = TypeVar('T')
 
+Index = Union[str, Tuple[str, ...]]
+
 
 @dataclass(frozen=True)
 class KeyStore(Generic[T]):
+    """Store of objects that can be queried by attribute values.
+
+    Lookups without an index scan the objects once per unique query
+    and cache the result. Attributes (or tuples of attributes) listed
+    in `indexes` are hashed up front, so any query on exactly those
+    attributes is a dict lookup and a query on a superset of them only
+    scans the matching bucket. Time window queries sort the matching
+    objects into an interval index the first time they are asked for.
+
+    Scanned query results and interval indexes are cached, holding at
+    most cache_size entries each if it is set.
+    """
     keys: Union[Tuple[str], List[str]]
     objects: Union[List[T], Set[T]]
     dict: bool = False
+    indexes: Tuple[Index, ...] = ()
+    cache_size: Optional[int] = None
+
+    _cache: QueryCache = field(init=False, repr=False, compare=False)
+    _indexes: Dict[Tuple[str, ...], Dict[Tuple, List[T]]] = field(default_factory=lambda: {}, repr=False)
+    _intervals: QueryCache = field(init=False, repr=False, compare=False)
 
-    _cache: Dict = field(default_factory=lambda: defaultdict(list))
+    def __post_init__(self) -> None:
+        object.__setattr__(self, '_cache', QueryCache(max_size=self.cache_size))
+        object.__setattr__(self, '_intervals', QueryCache(max_size=self.cache_size))
+        for index in self.indexes:
+            attrs = get_index_attrs(index)
+            if attrs not in self._indexes:
+                self._indexes[attrs] = self._build_index(attrs=attrs)
 
     def get(self, **kwargs) -> List[T]:
         return self._get_values(**kwargs)
@@ -25,20 +55,83 @@ class KeyStore(Generic[T]):
             raise RuntimeError
         return values[0]
 
+    def get_at_time(self, time: datetime, **kwargs) -> List[T]:
+        """Return the objects matching kwargs whose start and end contain time."""
+        return self._get_interval_index(**kwargs).at_time(time=time)
+
+    def get_for_period(self, start: datetime, end: datetime, **kwargs) -> List[T]:
+        """Return the objects matching kwargs that overlap the period."""
+        return self._get_interval_index(**kwargs).overlapping(start=start, end=end)
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        """Combined counters for the query and interval caches."""
+        return self._cache.stats + self._intervals.stats
+
+    def invalidate_cache(self, **kwargs) -> None:
+        """Drop the cached results for the query given by kwargs,
+        or all cached results if there are none."""
+        if not kwargs:
+            self._cache.invalidate()
+            self._intervals.invalidate()
+        else:
+            self._cache.invalidate(key=self._get_cache_key(**kwargs))
+            self._intervals.invalidate(key=tuple(sorted(kwargs.items())))
+
+    def _get_interval_index(self, **kwargs) -> IntervalIndex[T]:
+        key = tuple(sorted(kwargs.items()))
+        interval_index = self._intervals.lookup(key)
+        if interval_index is None:
+            interval_index = IntervalIndex.from_items(self._get_values(**kwargs))
+            self._intervals.store(key, interval_index)
+        return interval_index
+
     def _get_values(self, **kwargs) -> List[T]:
+        attrs = tuple(sorted(kwargs))
+        if attrs in self._indexes:
+            return self._indexes[attrs].get(tuple(kwargs[attr] for attr in attrs), [])
+
+        key = self._get_cache_key(**kwargs)
+        values = self._cache.lookup(key)
+        if values is None:
+            values = [
+                obj
+                for obj in self._get_scan_objects(**kwargs)
+                if all(
+                    self._equal(obj=obj, attr=attr, val=val)
+                    for attr, val in kwargs.items()
+                )
+            ]
+            if values:
+                self._cache.store(key, values)
+
+        return values
+
+    def _get_cache_key(self, **kwargs) -> Tuple:
         attr_dict = {k: None for k in self.keys}
         attr_dict.update(**kwargs)
-        key = tuple(attr_dict.values())
+        return tuple(attr_dict.values())
 
-        if key not in self._cache:
-            for obj in self.objects:
-                if all(
-                        self._equal(obj=obj, attr=attr, val=val)
-                        for attr, val in kwargs.items()
-                ):
-                    self._cache[key].append(obj)
+    def _get_scan_objects(self, **kwargs) -> Union[List[T], Set[T]]:
+        """Return the smallest indexed bucket covering the query,
+        falling back on all the objects if no index applies."""
+        buckets = [
+            index.get(tuple(kwargs[attr] for attr in attrs), [])
+            for attrs, index in self._indexes.items()
+            if set(attrs).issubset(kwargs)
+        ]
+        return min(buckets, key=len) if buckets else self.objects
 
-        return self._cache.get(key, [])
+    def _build_index(self, attrs: Tuple[str, ...]) -> Dict[Tuple, List[T]]:
+        index = defaultdict(list)
+        for obj in self.objects:
+            index[tuple(self._get_attr(obj=obj, attr=attr) for attr in attrs)].append(obj)
+        return dict(index)
+
+    def _get_attr(self, obj: Union[object, Dict], attr: str) -> Any:
+        if self.dict:
+            return obj.get(attr)
+        return getattr(obj, attr)
 
     def _equal(self, obj: Union[object, Dict], attr: str, val: Any) -> bool:
         if self.dict:
@@ -49,6 +142,11 @@ class KeyStore(Generic[T]):
         return self.objects[key]
 
 
+def get_index_attrs(index: Index) -> Tuple[str, ...]:
+    """Normalise an index definition to a sorted tuple of attribute names."""
+    return tuple(sorted((index,) if isinstance(index, str) else index))
+
+
 class Dataclass(Protocol):
     """Type hint used to identify if something is a dataclass"""
     __dataclass_fields__: Dict
@@ -57,4 +155,4 @@ class Dataclass(Protocol):
 @lru_cache
 def get_keys(obj: Type[T]) -> Tuple[str]:
     """Default function to get keys off a dataclass for KeyStore input."""
-    return tuple(obj.__annotations__.keys())
\ No newline at end of file
+    return tuple(obj.__annotations__.keys())
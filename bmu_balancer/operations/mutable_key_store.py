@@ -0,0 +1,206 @@
+from collections.abc import Sequence
+from itertools import islice
+from threading import Lock
+from typing import Dict, Generic, Hashable, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar, Union
+
+from bmu_balancer.operations.key_store import Index, KeyStore, get_index_attrs
+
+T = TypeVar('T')
+
+# Most objects in one chunk of the object list, so the most a write after a snapshot copies
+CHUNK_SIZE = 1024
+
+
+class ChunkedObjects(Sequence, Generic[T]):
+    """Read-only sequence of the objects in a list of chunks, in order.
+
+    Snapshots hold one of these, so they share the chunks no write has
+    touched with the store and with each other.
+    """
+
+    def __init__(self, chunks: Tuple[Dict[Hashable, T], ...]):
+        self._chunks = chunks
+        self._len = sum(len(chunk) for chunk in chunks)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[T]:
+        for chunk in self._chunks:
+            yield from chunk.values()
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[T, List[T]]:
+        if isinstance(key, slice):
+            return list(self)[key]
+        if key < 0:
+            key += self._len
+        if not 0 <= key < self._len:
+            raise IndexError("ChunkedObjects index out of range")
+        for chunk in self._chunks:
+            if key < len(chunk):
+                return next(islice(chunk.values(), key, None))
+            key -= len(chunk)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (list, ChunkedObjects)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ChunkedObjects({list(self)!r})"
+
+
+class MutableKeyStore(Generic[T]):
+    """A writable KeyStore that keeps its hash indexes up to date.
+
+    Objects are identified by their id_attr. Writes update the indexes
+    incrementally under a lock. Readers never query this store directly,
+    they take a snapshot(), which is a normal frozen KeyStore sharing the
+    current objects and indexes. Objects are kept in chunks of at most
+    CHUNK_SIZE, and the index dicts, buckets and chunks are each copied
+    the first time they are written to after a snapshot, so a snapshot
+    never changes underneath a reader.
+
+    The first snapshot after a write copies only the chunks and buckets
+    written to since the last one, plus each index's dict, so with a
+    coarse index such as asset it costs little more than the writes.
+    """
+
+    def __init__(
+            self,
+            keys: Union[Tuple[str], List[str]],
+            objects: Iterable[T] = (),
+            indexes: Tuple[Index, ...] = (),
+            id_attr: str = 'id',
+            cache_size: Optional[int] = None,
+    ):
+        self.keys = keys
+        self.indexes = indexes
+        self.id_attr = id_attr
+        self.cache_size = cache_size
+
+        self._lock = Lock()
+        # Chunks of objects by id, in order, and the chunk each id is in
+        self._chunks: Dict[int, Dict[Hashable, T]] = {}
+        self._chunk_of: Dict[Hashable, int] = {}
+        self._last_chunk = -1
+        self._indexes: Dict[Tuple[str, ...], Dict[Tuple, List[T]]] = {
+            get_index_attrs(index): {} for index in indexes
+        }
+        self._snapshot: Optional[KeyStore[T]] = None
+        # Buckets and chunks created since the last snapshot, which are safe to write to
+        self._owned: Set[Tuple[Tuple[str, ...], Tuple]] = set()
+        self._owned_chunks: Set[int] = set()
+
+        for obj in objects:
+            self.insert(obj)
+
+    def insert(self, obj: T) -> None:
+        with self._lock:
+            obj_id = getattr(obj, self.id_attr)
+            if obj_id in self._chunk_of:
+                raise RuntimeError(f"Object with {self.id_attr} {obj_id} already in store.")
+
+            self._copy_if_shared()
+            last = self._chunks.get(self._last_chunk)
+            if last is None or len(last) >= CHUNK_SIZE:
+                self._last_chunk += 1
+                self._chunks[self._last_chunk] = {}
+                self._owned_chunks.add(self._last_chunk)
+            self._get_chunk(self._last_chunk)[obj_id] = obj
+            self._chunk_of[obj_id] = self._last_chunk
+            for attrs in self._indexes:
+                self._get_bucket(attrs=attrs, key=self._get_index_key(obj=obj, attrs=attrs)).append(obj)
+
+    def update(self, obj: T) -> None:
+        """Replace the object with the same id, keeping its position."""
+        with self._lock:
+            obj_id = getattr(obj, self.id_attr)
+            n = self._chunk_of.get(obj_id)
+            if n is None:
+                raise RuntimeError(f"No object with {self.id_attr} {obj_id} in store to update.")
+
+            self._copy_if_shared()
+            chunk = self._get_chunk(n)
+            old = chunk[obj_id]
+            chunk[obj_id] = obj
+            for attrs in self._indexes:
+                old_key = self._get_index_key(obj=old, attrs=attrs)
+                new_key = self._get_index_key(obj=obj, attrs=attrs)
+                if old_key == new_key:
+                    bucket = self._get_bucket(attrs=attrs, key=new_key)
+                    bucket[:] = [obj if item is old else item for item in bucket]
+                else:
+                    self._remove_from_bucket(attrs=attrs, key=old_key, obj=old)
+                    self._get_bucket(attrs=attrs, key=new_key).append(obj)
+
+    def delete(self, obj: T) -> None:
+        with self._lock:
+            obj_id = getattr(obj, self.id_attr)
+            n = self._chunk_of.pop(obj_id, None)
+            if n is None:
+                raise RuntimeError(f"No object with {self.id_attr} {obj_id} in store to delete.")
+
+            self._copy_if_shared()
+            chunk = self._get_chunk(n)
+            old = chunk.pop(obj_id)
+            if not chunk:
+                del self._chunks[n]
+                self._owned_chunks.discard(n)
+            for attrs in self._indexes:
+                self._remove_from_bucket(attrs=attrs, key=self._get_index_key(obj=old, attrs=attrs), obj=old)
+
+    def snapshot(self) -> KeyStore[T]:
+        """Return a read-only view of the store as it is now.
+
+        Repeated calls without a write in between return the same
+        KeyStore, so its query cache stays warm.
+        """
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = KeyStore(
+                    keys=self.keys,
+                    objects=ChunkedObjects(tuple(self._chunks.values())),
+                    indexes=self.indexes,
+                    cache_size=self.cache_size,
+                    _indexes=self._indexes,
+                )
+                self._owned.clear()
+                self._owned_chunks.clear()
+            return self._snapshot
+
+    def __len__(self) -> int:
+        return len(self._chunk_of)
+
+    def _copy_if_shared(self) -> None:
+        """Give the writer its own index dicts if a snapshot holds the current ones."""
+        if self._snapshot is not None:
+            self._indexes = {attrs: dict(index) for attrs, index in self._indexes.items()}
+            self._snapshot = None
+
+    def _get_chunk(self, n: int) -> Dict[Hashable, T]:
+        """Return a chunk that can be written to, copying it if a snapshot may hold it."""
+        if n not in self._owned_chunks:
+            self._chunks[n] = dict(self._chunks[n])
+            self._owned_chunks.add(n)
+        return self._chunks[n]
+
+    def _get_index_key(self, obj: T, attrs: Tuple[str, ...]) -> Tuple:
+        return tuple(getattr(obj, attr) for attr in attrs)
+
+    def _get_bucket(self, attrs: Tuple[str, ...], key: Tuple) -> List[T]:
+        """Return a bucket that can be written to, copying it if a snapshot may hold it."""
+        index = self._indexes[attrs]
+        if (attrs, key) not in self._owned:
+            index[key] = list(index.get(key, []))
+            self._owned.add((attrs, key))
+        return index[key]
+
+    def _remove_from_bucket(self, attrs: Tuple[str, ...], key: Tuple, obj: T) -> None:
+        bucket = self._get_bucket(attrs=attrs, key=key)
+        bucket[:] = [item for item in bucket if item is not obj]
+        if not bucket:
+            del self._indexes[attrs][key]
+            self._owned.discard((attrs, key))
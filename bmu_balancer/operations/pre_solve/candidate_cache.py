@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from typing import Hashable, Optional, Tuple, Union
+
+from bmu_balancer.models.engine import AssetCandidates
+from bmu_balancer.models.inputs import Asset, AssetState, BOA
+from bmu_balancer.operations.columnar import AssetStateColumns
+from bmu_balancer.operations.instruction_timeline import InstructionTimeline
+from bmu_balancer.operations.key_store import KeyStore
+from bmu_balancer.operations.query_cache import CacheStats, QueryCache
+from bmu_balancer.operations.utils import get_items_for_period, to_epoch_us
+
+CACHE_SIZE = 100000
+
+
+class CandidateCache:
+    """Per-asset candidates kept between BOAs, with least recently used eviction.
+
+    An asset's candidates are stored against a fingerprint of everything
+    they're worked out from: the asset itself, the BOA's window and mw
+    (so its direction), the execution time, and the asset's states over
+    the window along with its current and prior instructions. Models
+    compare by value, so an asset whose parameters, states or
+    instructions changed gets a new fingerprint and is regenerated,
+    while the rest are reused.
+
+    With an execution_time_bucket, execution times are only compared to
+    within the bucket, for more reuse. Candidates are then worked out
+    at the bucket's latest time, see get_generation_time, so the notice
+    periods hold for any execution time in it, at the cost of candidates
+    starting up to a bucket later than they could.
+    """
+
+    def __init__(self, max_size: Optional[int] = CACHE_SIZE, execution_time_bucket: Optional[timedelta] = None):
+        if execution_time_bucket is not None and execution_time_bucket <= timedelta(0):
+            raise RuntimeError(f"Execution time bucket must be positive, got {execution_time_bucket}")
+        self.execution_time_bucket = execution_time_bucket
+        self._cache = QueryCache(max_size=max_size)
+
+    def get_key(
+            self,
+            asset: Asset,
+            boa: BOA,
+            states: Union[KeyStore[AssetState], AssetStateColumns],
+            instruction_timeline: InstructionTimeline,
+            execution_time: datetime,
+    ) -> Tuple:
+        """Fingerprint of the inputs to the asset's candidates for the boa."""
+        return (
+            asset,
+            boa.start,
+            boa.end,
+            boa.mw,
+            self._get_execution_time_key(execution_time),
+            tuple(get_items_for_period(items=states, asset=asset, start=boa.start, end=boa.end)),
+            instruction_timeline.current(asset=asset, time=boa.start),
+            instruction_timeline.prior(asset=asset, time=boa.start),
+        )
+
+    def lookup(self, key: Hashable) -> Tuple[bool, Optional[AssetCandidates]]:
+        """Return whether key is cached, and its candidates,
+        which are None when the asset couldn't be assigned."""
+        # Stored wrapped, as QueryCache gives None for a miss
+        cached = self._cache.lookup(key)
+        if cached is None:
+            return False, None
+        return True, cached[0]
+
+    def store(self, key: Hashable, candidates: Optional[AssetCandidates]) -> None:
+        self._cache.store(key, (candidates,))
+
+    def invalidate(self) -> None:
+        self._cache.invalidate()
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._cache.stats
+
+    def get_generation_time(self, execution_time: datetime) -> datetime:
+        """The execution time to work out candidates at, the latest
+        time in execution_time's bucket if there are buckets."""
+        if self.execution_time_bucket is None:
+            return execution_time
+        bucket_us = self._get_bucket_us()
+        return execution_time + timedelta(microseconds=bucket_us - 1 - to_epoch_us(execution_time) % bucket_us)
+
+    def _get_execution_time_key(self, execution_time: datetime) -> Hashable:
+        if self.execution_time_bucket is None:
+            return execution_time
+        return to_epoch_us(execution_time) // self._get_bucket_us()
+
+    def _get_bucket_us(self) -> int:
+        return self.execution_time_bucket // timedelta(microseconds=1)
+
+    def __len__(self) -> int:
+        return len(self._cache)
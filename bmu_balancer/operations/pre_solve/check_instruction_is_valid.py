@@ -1,7 +1,9 @@
 import logging
 from datetime import timedelta
+from typing import Union
 
 from bmu_balancer.models import Asset, AssetState, BOA, Instruction
+from bmu_balancer.operations.columnar import AssetStateColumns
 from bmu_balancer.operations.key_store import KeyStore
 from bmu_balancer.operations.utils import get_items_for_period
 
@@ -11,7 +13,7 @@ log = logging.getLogger(__name__)
 def asset_can_be_assigned_to_boa(
         asset: Asset,
         boa: BOA,
-        states: KeyStore[AssetState],
+        states: Union[KeyStore[AssetState], AssetStateColumns],
         current_instruction: Instruction,
         prior_instruction: Instruction,
 ) -> bool:
@@ -2,19 +2,21 @@ import logging
 import sys
 from datetime import datetime
 from time import time
-from typing import List
+from typing import List, Optional, Union
 
-from bmu_balancer.models.engine import Candidate
-from bmu_balancer.models.inputs import AssetState, BOA
+from bmu_balancer.models.engine import AssetCandidates, Candidate, CandidateSet
+from bmu_balancer.models.inputs import Asset, AssetState, BOA
 from bmu_balancer.models.outputs import Instruction
-from bmu_balancer.operations.instruction_helpers import get_prior_instruction
+from bmu_balancer.operations.columnar import AssetStateColumns
+from bmu_balancer.operations.instruction_timeline import InstructionTimeline
 from bmu_balancer.operations.key_store import KeyStore
+from bmu_balancer.operations.pre_solve.candidate_cache import CandidateCache
 from bmu_balancer.operations.pre_solve.check_instruction_is_valid import (
     asset_can_be_assigned_to_boa,
 )
 from bmu_balancer.operations.pre_solve.get_adjusted_times import get_adjusted_end, get_adjusted_start
 from bmu_balancer.operations.pre_solve.get_mw_bounds import get_mw_options
-from bmu_balancer.operations.utils import get_item_at_time
+from bmu_balancer.operations.pre_solve.vectorised_candidates import generate_candidate_set_vectorised
 
 log = logging.getLogger(__name__)
 
@@ -23,78 +25,178 @@ NOW = datetime.utcnow()
 
 def generate_instruction_candidates(
         boa: BOA,
-        states: KeyStore[AssetState],
+        states: Union[KeyStore[AssetState], AssetStateColumns],
         instructions: KeyStore[Instruction],
         execution_time: datetime = NOW,
+        instruction_timeline: Optional[InstructionTimeline] = None,
+        candidate_cache: Optional[CandidateCache] = None,
 ) -> List[Candidate]:
     """Generate a set of valid instruction candidate
-    variables given a boa and the asset states."""
-    log.info("Generating instruction candidates...")
-    start = time()
+    variables given a boa and the asset states.
 
-    candidates = []
-    for asset in boa.assets:
+    A prebuilt instruction_timeline can be passed in to share
+    it between BOAs, otherwise one is built from instructions.
+    Likewise a candidate_cache reuses the candidates of assets
+    whose inputs haven't changed since an earlier BOA.
+    """
+    candidate_set = generate_candidate_set(
+        boa=boa,
+        states=states,
+        instructions=instructions,
+        execution_time=execution_time,
+        instruction_timeline=instruction_timeline,
+        candidate_cache=candidate_cache,
+    )
+    return candidate_set.to_candidates()
 
-        # Identify if instructions are in/progress
-        # and which if any have most recently finished.
-        current_instruction = get_item_at_time(
-            items=instructions,
-            asset=asset,
-            time=boa.start,
-            nullable=True,
-        )
-        prior_instruction = get_prior_instruction(
-            asset=asset,
-            instructions=instructions,
-            time=boa.start,
-        )
 
-        valid = asset_can_be_assigned_to_boa(
-            asset=asset,
+def generate_candidate_set(
+        boa: BOA,
+        states: Union[KeyStore[AssetState], AssetStateColumns],
+        instructions: KeyStore[Instruction],
+        execution_time: datetime = NOW,
+        instruction_timeline: Optional[InstructionTimeline] = None,
+        vectorised: bool = False,
+        candidate_cache: Optional[CandidateCache] = None,
+) -> CandidateSet:
+    """As generate_instruction_candidates, but returns the candidates as
+    a CandidateSet, without building a Candidate object for each one.
+
+    vectorised works out the candidates for all assets at once,
+    see generate_candidate_set_vectorised.
+    """
+    if vectorised:
+        if candidate_cache is not None:
+            raise RuntimeError("The candidate cache is only used when generating candidates asset by asset.")
+        return generate_candidate_set_vectorised(
             boa=boa,
             states=states,
-            current_instruction=current_instruction,
-            prior_instruction=prior_instruction,
+            instructions=instructions,
+            execution_time=execution_time,
+            instruction_timeline=instruction_timeline,
+        )
+
+    log.info("Generating instruction candidates...")
+    start = time()
+
+    if instruction_timeline is None:
+        instruction_timeline = InstructionTimeline.from_key_store(
+            instructions=instructions,
+            assets=boa.assets,
         )
-        if valid:
-            # Given a valid asset that can be assigned to the boa
-            # for a non-zero time.
 
-            # Define candidate parameters
-            adjusted_start = get_adjusted_start(
+    asset_candidates = []
+    for asset in boa.assets:
+        if candidate_cache is None:
+            candidates = get_asset_candidates(
                 asset=asset,
                 boa=boa,
-                current_instruction=current_instruction,
+                states=states,
+                instruction_timeline=instruction_timeline,
                 execution_time=execution_time,
             )
-            adjusted_end = get_adjusted_end(
+        else:
+            candidates = get_cached_asset_candidates(
                 asset=asset,
                 boa=boa,
-                current_instruction=current_instruction,
-                adjusted_start=adjusted_start,
+                states=states,
+                instruction_timeline=instruction_timeline,
+                execution_time=execution_time,
+                candidate_cache=candidate_cache,
             )
+        if candidates is not None:
+            asset_candidates.append(candidates)
+
+    candidate_set = CandidateSet.from_asset_candidates(boa=boa, asset_candidates=asset_candidates)
+    log.info(f"Finished generating candidates, got {len(candidate_set)}. Took: {round(time() - start, 4)} secs")
+    return candidate_set
 
-            mw_options = get_mw_options(
-                asset=asset,
-                boa=boa,
-                adjusted_start=adjusted_start,
-                adjusted_end=adjusted_end,
-            )
 
-            asset_candidates = [
-                Candidate(
-                    asset=asset,
-                    boa=boa,
-                    adjusted_start=adjusted_start,
-                    adjusted_end=adjusted_end,
-                    mw=mw,
-                )
-                for mw in mw_options
-                if abs(mw) <= asset.capacity
-            ]
-            log.info(f"Added {len(asset_candidates)} candidates for {asset}.")
-
-            candidates.extend(asset_candidates)
-
-    log.info(f"Finished generating candidates, got {len(candidates)}. Took: {round(time() - start, 4)} secs")
+def get_cached_asset_candidates(
+        asset: Asset,
+        boa: BOA,
+        states: Union[KeyStore[AssetState], AssetStateColumns],
+        instruction_timeline: InstructionTimeline,
+        execution_time: datetime,
+        candidate_cache: CandidateCache,
+) -> Optional[AssetCandidates]:
+    """As get_asset_candidates, reusing the cached candidates if the asset's inputs are unchanged."""
+    key = candidate_cache.get_key(
+        asset=asset,
+        boa=boa,
+        states=states,
+        instruction_timeline=instruction_timeline,
+        execution_time=execution_time,
+    )
+    found, candidates = candidate_cache.lookup(key)
+    if not found:
+        # Worked out at the latest time the key covers, so they're deliverable from any of them
+        candidates = get_asset_candidates(
+            asset=asset,
+            boa=boa,
+            states=states,
+            instruction_timeline=instruction_timeline,
+            execution_time=candidate_cache.get_generation_time(execution_time),
+        )
+        candidate_cache.store(key, candidates)
     return candidates
+
+
+def get_asset_candidates(
+        asset: Asset,
+        boa: BOA,
+        states: Union[KeyStore[AssetState], AssetStateColumns],
+        instruction_timeline: InstructionTimeline,
+        execution_time: datetime,
+) -> Optional[AssetCandidates]:
+    """Work out the candidate parameters for one asset,
+    or None if it can't be assigned to the boa."""
+
+    # Identify if instructions are in/progress
+    # and which if any have most recently finished.
+    current_instruction = instruction_timeline.current(asset=asset, time=boa.start)
+    prior_instruction = instruction_timeline.prior(asset=asset, time=boa.start)
+
+    valid = asset_can_be_assigned_to_boa(
+        asset=asset,
+        boa=boa,
+        states=states,
+        current_instruction=current_instruction,
+        prior_instruction=prior_instruction,
+    )
+    if not valid:
+        return None
+
+    # Given a valid asset that can be assigned to the boa
+    # for a non-zero time.
+
+    # Define candidate parameters
+    adjusted_start = get_adjusted_start(
+        asset=asset,
+        boa=boa,
+        current_instruction=current_instruction,
+        execution_time=execution_time,
+    )
+    adjusted_end = get_adjusted_end(
+        asset=asset,
+        boa=boa,
+        current_instruction=current_instruction,
+        adjusted_start=adjusted_start,
+    )
+
+    mw_options = get_mw_options(
+        asset=asset,
+        boa=boa,
+        adjusted_start=adjusted_start,
+        adjusted_end=adjusted_end,
+    )
+
+    mw_options = tuple(mw for mw in mw_options if abs(mw) <= asset.capacity)
+    log.info(f"Added {len(mw_options)} candidates for {asset}.")
+
+    return AssetCandidates(
+        asset=asset,
+        mw_options=mw_options,
+        adjusted_start=adjusted_start,
+        adjusted_end=adjusted_end,
+    )
@@ -0,0 +1,97 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from time import time
+from typing import List, Optional, Tuple, Union
+
+from bmu_balancer.models.engine import AssetCandidates, CandidateSet
+from bmu_balancer.models.inputs import AssetState, BOA
+from bmu_balancer.models.outputs import Instruction
+from bmu_balancer.operations.columnar import AssetStateColumns
+from bmu_balancer.operations.instruction_timeline import InstructionTimeline
+from bmu_balancer.operations.key_store import KeyStore
+from bmu_balancer.operations.pre_solve.generate_instruction_candidates import get_asset_candidates
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256
+
+# Set once per worker process by init_worker, so the states and
+# instructions are sent to each worker once rather than with every chunk.
+_WORKER_INPUTS: Optional[Tuple] = None
+
+
+def generate_candidate_set_parallel(
+        boa: BOA,
+        states: Union[KeyStore[AssetState], AssetStateColumns],
+        instructions: KeyStore[Instruction],
+        execution_time: datetime,
+        instruction_timeline: Optional[InstructionTimeline] = None,
+        workers: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+) -> CandidateSet:
+    """As generate_candidate_set, but with the BOA's assets split into
+    chunks of chunk_size that are worked through by a pool of worker
+    processes, os.cpu_count() of them if workers is None.
+
+    The states and instruction timeline are handed to each worker once
+    when it starts, only chunk bounds are sent per task. The chunks are
+    merged back in asset order, so the result is the same as the serial one.
+    """
+    if chunk_size < 1:
+        raise RuntimeError(f"Chunk size must be at least 1, got {chunk_size}")
+    log.info("Generating instruction candidates in parallel...")
+    start = time()
+
+    if instruction_timeline is None:
+        instruction_timeline = InstructionTimeline.from_key_store(
+            instructions=instructions,
+            assets=boa.assets,
+        )
+
+    chunks = [(first, min(first + chunk_size, len(boa.assets))) for first in range(0, len(boa.assets), chunk_size)]
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(boa, states, instruction_timeline, execution_time),
+    ) as executor:
+        # map gives the results back in chunk order, whichever finishes first
+        results = list(executor.map(get_chunk_candidates, chunks))
+
+    candidate_set = CandidateSet.from_asset_candidates(
+        boa=boa,
+        asset_candidates=[candidates for chunk in results for candidates in chunk],
+    )
+    log.info(f"Finished generating candidates, got {len(candidate_set)}. Took: {round(time() - start, 4)} secs")
+    return candidate_set
+
+
+def init_worker(
+        boa: BOA,
+        states: Union[KeyStore[AssetState], AssetStateColumns],
+        instruction_timeline: InstructionTimeline,
+        execution_time: datetime,
+) -> None:
+    global _WORKER_INPUTS
+    _WORKER_INPUTS = (boa, states, instruction_timeline, execution_time)
+
+
+def get_chunk_candidates(chunk: Tuple[int, int]) -> List[AssetCandidates]:
+    """Candidates for the assets in a chunk of the BOA's assets, in order."""
+    if _WORKER_INPUTS is None:
+        raise RuntimeError("Worker has not been initialised.")
+    boa, states, instruction_timeline, execution_time = _WORKER_INPUTS
+    first, stop = chunk
+
+    asset_candidates = []
+    for asset in boa.assets[first:stop]:
+        candidates = get_asset_candidates(
+            asset=asset,
+            boa=boa,
+            states=states,
+            instruction_timeline=instruction_timeline,
+            execution_time=execution_time,
+        )
+        if candidates is not None:
+            asset_candidates.append(candidates)
+    return asset_candidates
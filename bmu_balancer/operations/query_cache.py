@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import RLock
+from typing import Hashable, Optional
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __add__(self, other: "CacheStats") -> "CacheStats":
+        return CacheStats(
+            hits=self.hits + other.hits,
+            misses=self.misses + other.misses,
+            evictions=self.evictions + other.evictions,
+            size=self.size + other.size,
+        )
+
+
+class QueryCache(OrderedDict):
+    """Least recently used cache of query results.
+
+    With max_size None the cache is unbounded, otherwise the least
+    recently looked up entry is evicted once it is full. Lookups and
+    stores are counted and behind a lock so concurrent readers can
+    share it.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        super().__init__()
+        if max_size is not None and max_size < 1:
+            raise RuntimeError(f"Cache max_size must be at least 1, got {max_size}")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = RLock()
+
+    def lookup(self, key: Hashable) -> Optional:
+        """Return the value stored against key, or None if it isn't cached."""
+        with self._lock:
+            if key not in self:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.move_to_end(key)
+            return self[key]
+
+    def store(self, key: Hashable, value) -> None:
+        with self._lock:
+            self[key] = value
+            self.move_to_end(key)
+            while self.max_size is not None and len(self) > self.max_size:
+                self.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop key from the cache, or everything if no key is given."""
+        with self._lock:
+            if key is None:
+                self.clear()
+            else:
+                self.pop(key, None)
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            size=len(self),
+        )
+
+    def __reduce__(self):
+        # Cached results are cheap to rebuild, so only the policy is copied.
+        return self.__class__, (self.max_size,)
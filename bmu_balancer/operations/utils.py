@@ -1,10 +1,12 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone, tzinfo
 from typing import List, Optional
 
 from bmu_balancer.operations.key_store import KeyStore
 
 SEC_IN_MIN = 60.0
 SEC_IN_HOUR = 3600.0
+US_IN_SEC = 1000000
+EPOCH = datetime(1970, 1, 1)
 
 
 def get_item_at_time(
@@ -16,11 +18,7 @@ def get_item_at_time(
     """Given a keystore of items and a time,
     return the item at that time if it exists,
     otherwise return none."""
-    items_at_time = [
-        item
-        for item in items.get(**kwargs)
-        if item.start <= time <= item.end
-    ]
+    items_at_time = items.get_at_time(time=time, **kwargs)
 
     if len(items_at_time) == 0 and nullable:
         return None
@@ -41,23 +39,23 @@ def get_items_for_period(
 ) -> List:
     """Given a keystore of items and a period return
     a list of the items that overlap the period."""
-    return [
-        item
-        for item in items.get(**kwargs)
-        if date_range_overlap(
-            start_1=start, end_1=end,
-            start_2=item.start, end_2=item.end,
-        ) > 0
-    ]
-
-
-def date_range_overlap(start_1, end_1, start_2, end_2) -> int:
-    latest_start = max(start_1, start_2)
-    earliest_end = min(end_1, end_2)
-    delta = (earliest_end - latest_start).days + 1
-    overlap = max(0, delta)
-    return overlap
+    return items.get_for_period(start=start, end=end, **kwargs)
 
 
 def timedelta_mins(start: datetime, end: datetime) -> float:
     return (end - start).total_seconds() / SEC_IN_MIN
+
+
+def to_epoch_us(time: datetime) -> int:
+    """Microseconds since the unix epoch, naive times are taken to be UTC."""
+    if time.tzinfo is not None:
+        time = time.astimezone(timezone.utc).replace(tzinfo=None)
+    return (time - EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_us(value: int, tz: Optional[tzinfo] = None) -> datetime:
+    """Inverse of to_epoch_us, giving a naive time if tz is None."""
+    time = EPOCH + timedelta(microseconds=int(value))
+    if tz is None:
+        return time
+    return time.replace(tzinfo=timezone.utc).astimezone(tz)
@@ -1,10 +1,12 @@
+import argparse
 import logging
 import sys
-from typing import Optional
+from typing import List, Optional
 
 import colorlog
 
 from bmu_balancer.balance_a_bmu import balance_a_bmu
+from bmu_balancer.operations.pre_solve.parallel_candidates import CHUNK_SIZE
 
 LOG_FORMAT = '%(log_color)s%(levelname)-7s | %(asctime)s | %(message)s'
 LOG_DATEFMT = '%Y-%m-%dT%H:%M:%S'
@@ -21,7 +23,10 @@ def run(
         input_filepath: str,
         output_filepath: Optional[str] = None,
         log_level: str = logging.INFO,
-        do_visualise: bool = True
+        do_visualise: bool = True,
+        vectorised_candidates: bool = False,
+        workers: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
 ) -> None:
     # Set-up logging
     colorlog.basicConfig(level=log_level, format=LOG_FORMAT, datefmt=LOG_DATEFMT, stream=sys.stderr)
@@ -31,8 +36,32 @@ def run(
         input_filepath=input_filepath,
         output_filepath=output_filepath,
         do_visualise=do_visualise,
+        vectorised_candidates=vectorised_candidates,
+        workers=workers,
+        chunk_size=chunk_size,
     )
 
 
+def parse_args(args: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Balance the BOA in an input file.")
+    parser.add_argument("input_filepath")
+    parser.add_argument("output_filepath", nargs="?")
+    parser.add_argument("log_level", nargs="?", default=logging.INFO)
+    parser.add_argument("--no-visualise", dest="do_visualise", action="store_false")
+    parser.add_argument(
+        "--vectorised", dest="vectorised_candidates", action="store_true",
+        help="generate the candidates for all assets at once",
+    )
+    parser.add_argument(
+        "--workers", type=int,
+        help="generate the candidates across this many processes",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=CHUNK_SIZE,
+        help=f"assets per task when generating candidates in parallel (default {CHUNK_SIZE})",
+    )
+    return parser.parse_args(args)
+
+
 if __name__ == "__main__":
-    run(*sys.argv[1:])
+    run(**vars(parse_args(sys.argv[1:])))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from bmu_balancer.engine.adaptive import get_coarse_positions, get_refined_positions, run_engine_adaptive
+from bmu_balancer.engine.main import run_engine
+from bmu_balancer.models.engine import Solution
+from tests.factories import make_problem
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("boa_mw", [90, 735, 1850])
+def test_run_engine_adaptive__matches_fine_grid(seed: int, boa_mw: int):
+    boa, rates, candidates = make_problem(seed=seed, boa_mw=boa_mw)
+
+    expected = run_engine(boa=boa, rates=rates, candidates=candidates)
+    actual = run_engine_adaptive(boa=boa, rates=rates, candidates=candidates)
+
+    assert actual.status == expected.status == "Optimal"
+    assert actual.objective == pytest.approx(expected.objective)
+    assert sum(instruction.mw for instruction in actual.instructions) <= boa_mw
+
+
+def test_get_coarse_positions():
+    boa, rates, candidates = make_problem(seed=0, boa_mw=500)
+    positions = get_coarse_positions(candidates=candidates, step=100)
+    coarse = candidates.take(positions)
+
+    assert len(coarse) < len(candidates) / 5
+    for group in coarse.get_asset_groups():
+        mws = coarse.mw[group]
+        asset = coarse.assets[coarse.asset_index[group[0]]]
+        assert mws.min() == 0 and mws.max() == asset.capacity
+
+
+def test_get_refined_positions():
+    boa, rates, candidates = make_problem(seed=0, boa_mw=500)
+    # Every asset at 0 apart from a 1000mw one at 300, leaving 200 unassigned
+    large = next(n for n, asset in enumerate(candidates.assets) if asset.capacity == 1000)
+    levels = np.where(candidates.asset_index == large, 300, 0)
+    solution = Solution(status="Optimal", instructions=[
+        candidates.get_instruction(int(n)) for n in np.flatnonzero(candidates.mw == levels)
+    ])
+
+    refined = candidates.take(get_refined_positions(candidates=candidates, solution=solution, step=100))
+    is_large = refined.asset_index == large
+    assert (refined.mw[is_large].min(), refined.mw[is_large].max()) == (200, 600)
+    assert (refined.mw[~is_large].min(), refined.mw[~is_large].max()) == (0, 300)
+
+
+def test_run_engine_adaptive__coarse_step():
+    boa, rates, candidates = make_problem(seed=0, boa_mw=500)
+    with pytest.raises(RuntimeError):
+        run_engine_adaptive(boa=boa, rates=rates, candidates=candidates, coarse_step=0)
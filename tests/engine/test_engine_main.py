@@ -1,13 +1,16 @@
 from datetime import datetime
+from time import time
 from typing import Dict, Tuple
 
 import pytest
+from pulp import LpProblem, LpSolutionIntegerFeasible, LpStatusOptimal
 
-from bmu_balancer.engine.main import run_engine
+from bmu_balancer.engine.main import MIN_SOLVE_SECONDS, get_solver, run_engine
+from bmu_balancer.engine.solution import FEASIBLE, SOLVED, get_status
 from bmu_balancer.models import Asset, Rate
-from bmu_balancer.models.engine import Candidate
+from bmu_balancer.models.engine import Candidate, CandidateSet, SolverOptions
 from bmu_balancer.operations.key_store import KeyStore, get_keys
-from tests.factories import AssetFactory, BOAFactory, RateFactory
+from tests.factories import AssetFactory, BOAFactory, RateFactory, make_problem
 
 UNDER_MIN_REQUIRED_PROFIT = [
     # Check that don't choose to turn on an asset if the
@@ -153,7 +156,15 @@ MAXIMISE_FULFILLMENT = [
         "7. Maximise within bounds",
     ]
 )
-def test_run_engine(assets: Tuple[Asset], ramp_rates: Dict, asset_mw: Dict[str, int]) -> None:
+@pytest.mark.parametrize("as_set", [False, True], ids=["list", "set"])
+@pytest.mark.parametrize("reduce", [False, True], ids=["full", "reduced"])
+def test_run_engine(
+        assets: Tuple[Asset],
+        ramp_rates: Dict,
+        asset_mw: Dict[str, int],
+        as_set: bool,
+        reduce: bool,
+) -> None:
 
     boa = BOAFactory(
         mw=10,
@@ -172,6 +183,8 @@ def test_run_engine(assets: Tuple[Asset], ramp_rates: Dict, asset_mw: Dict[str,
         for mw in [0, 5, 10]
         if abs(mw) <= asset.capacity
     ]
+    if as_set:
+        candidates = CandidateSet.from_candidates(boa=boa, candidates=candidates)
     rates = KeyStore(
         keys=get_keys(Rate),
         objects=[
@@ -184,9 +197,49 @@ def test_run_engine(assets: Tuple[Asset], ramp_rates: Dict, asset_mw: Dict[str,
         boa=boa,
         rates=rates,
         candidates=candidates,
+        reduce=reduce,
     )
 
     assert len(solution.instructions) == len(asset_mw)
 
     for instruction in solution.instructions:
         assert asset_mw[instruction.asset.name] == instruction.mw
+
+
+@pytest.mark.parametrize(
+    "options",
+    [SolverOptions(), SolverOptions(gap_rel=0.1, threads=2), SolverOptions(gap_abs=100), SolverOptions(time_limit=0)],
+    ids=["Default", "Relative gap", "Absolute gap", "Out of time"],
+)
+def test_run_engine__options(options: SolverOptions) -> None:
+    boa, rates, candidates = make_problem(seed=0, boa_mw=735)
+    optimal = run_engine(boa=boa, rates=rates, candidates=candidates)
+
+    solution = run_engine(boa=boa, rates=rates, candidates=candidates, options=options)
+
+    assert solution.status in SOLVED
+    assert solution.objective <= optimal.objective + 1e-6
+    # Within the gap found, which is 0 when proven optimal
+    assert solution.gap >= 0
+    assert solution.objective * (1 + solution.gap) >= optimal.objective - 1e-6
+    if options == SolverOptions():
+        assert solution.gap == 0
+
+
+def test_get_solver() -> None:
+    solver = get_solver(options=SolverOptions(time_limit=30, gap_rel=0.01, gap_abs=5, threads=4), start=time())
+    assert 29 < solver.maxSeconds <= 30
+    assert (solver.fracGap, solver.threads, solver.options) == (0.01, 4, ["allowableGap 5"])
+
+    # Still given a moment once out of time
+    assert get_solver(options=SolverOptions(time_limit=1), start=time() - 5).maxSeconds == MIN_SOLVE_SECONDS
+    assert get_solver(options=SolverOptions(), start=time()).maxSeconds is None
+
+
+def test_get_status() -> None:
+    model = LpProblem()
+    model.assignStatus(LpStatusOptimal)
+    assert get_status(model) == "Optimal"
+    # As CBC stopped on its time limit with a solution
+    model.assignStatus(LpStatusOptimal, LpSolutionIntegerFeasible)
+    assert get_status(model) == FEASIBLE
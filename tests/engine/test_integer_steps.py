@@ -0,0 +1,56 @@
+import pytest
+
+from bmu_balancer.engine.integer_steps import create_step_variables
+from bmu_balancer.engine.main import BINARY, INTEGER_STEPS, run_engine
+from bmu_balancer.models.engine import CandidateSet
+from tests.factories import make_problem, with_costs
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("boa_mw", [90, 735, 1850])
+def test_run_engine__integer_steps_matches_binary(seed: int, boa_mw: int):
+    boa, rates, candidates = make_problem(seed=seed, boa_mw=boa_mw)
+
+    expected = run_engine(boa=boa, rates=rates, candidates=candidates, formulation=BINARY)
+    actual = run_engine(boa=boa, rates=rates, candidates=candidates, formulation=INTEGER_STEPS)
+
+    assert actual.status == expected.status == "Optimal"
+    assert actual.objective == pytest.approx(expected.objective)
+    assert sum(instruction.mw for instruction in actual.instructions) <= boa_mw
+    assert [instruction.asset for instruction in actual.instructions] == \
+        [instruction.asset for instruction in expected.instructions]
+
+
+def test_create_step_variables():
+    boa, rates, candidates = make_problem(seed=0, boa_mw=500)
+    variables = create_step_variables(candidates=with_costs(candidates, rates))
+
+    forced_off = [
+        n for n, asset in enumerate(candidates.assets)
+        if boa.price_mw_hr * 1 < asset.min_required_profit
+    ]
+    assert set(variables.steps) == set(range(len(candidates.assets))) - set(forced_off)
+    for asset_steps in variables.steps.values():
+        assert (asset_steps.first, asset_steps.step) == (0, 10)
+        assert asset_steps.variable.upBound == asset_steps.count - 1
+
+
+def test_run_engine__integer_steps_uneven_grid():
+    boa, rates, candidates = make_problem(seed=1, boa_mw=735)
+    # Drop a level from each asset's grid so none are evenly spaced
+    candidates = CandidateSet.from_candidates(boa=boa, candidates=[
+        candidate for candidate in candidates.to_candidates() if candidate.mw != 20
+    ])
+    variables = create_step_variables(candidates=with_costs(candidates, rates))
+    assert not variables.steps
+    assert len(variables.selected) == len(candidates)
+
+    expected = run_engine(boa=boa, rates=rates, candidates=candidates)
+    actual = run_engine(boa=boa, rates=rates, candidates=candidates, formulation=INTEGER_STEPS)
+    assert actual.objective == pytest.approx(expected.objective)
+
+
+def test_run_engine__unknown_formulation():
+    boa, rates, candidates = make_problem(seed=0, boa_mw=500)
+    with pytest.raises(RuntimeError):
+        run_engine(boa=boa, rates=rates, candidates=candidates, formulation="continuous")
@@ -0,0 +1,74 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from bmu_balancer.engine.knapsack import get_frontier, get_objective_bound, solve_knapsack
+from bmu_balancer.engine.main import KNAPSACK, run_engine
+from tests.factories import AssetFactory, make_candidates, make_problem, with_costs
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("boa_mw", [90, 735, 1850, 5000])
+def test_run_engine__knapsack_matches_model(seed: int, boa_mw: int):
+    boa, rates, candidates = make_problem(seed=seed, boa_mw=boa_mw)
+
+    expected = run_engine(boa=boa, rates=rates, candidates=candidates)
+    actual = run_engine(boa=boa, rates=rates, candidates=candidates, formulation=KNAPSACK)
+
+    assert actual.status == expected.status == "Optimal"
+    assert actual.objective == pytest.approx(expected.objective)
+    assert sum(instruction.mw for instruction in actual.instructions) <= boa_mw
+    assert [instruction.asset for instruction in actual.instructions] == \
+        [instruction.asset for instruction in expected.instructions]
+
+
+def test_get_frontier():
+    mw = np.array([20, 10, 30, 10, 20, 40])
+    value = np.array([5, 3, 4, 3, 6, 9])
+    # The second 10 equals the first, 20 at 5 is beaten by 20 at 6, and 30 by 20
+    assert get_frontier(mw=mw, value=value).tolist() == [1, 4, 5]
+
+
+def test_solve_knapsack__min_required_profit():
+    # At price 10 for an hour, one can't make its min required profit so has to stay at 0
+    one, two = AssetFactory(min_required_profit=20), AssetFactory(min_required_profit=0)
+    candidates = make_candidates(
+        assets=[one, one, two, two],
+        mws=[0, 10, 0, 10],
+        objectives=[0, 50, 0, 5],
+    )
+    solution = solve_knapsack(candidates=candidates)
+    assert solution.status == "Optimal"
+    assert [(instruction.asset, instruction.mw) for instruction in solution.instructions] == [(one, 0), (two, 10)]
+    assert solution.objective == 5
+
+
+def test_solve_knapsack__infeasible():
+    one = AssetFactory(min_required_profit=0)
+    candidates = make_candidates(assets=[one, one], mws=[10, 20], objectives=[1, 2])
+    candidates = replace(candidates, boa=replace(candidates.boa, mw=5))
+    assert solve_knapsack(candidates=candidates).status == "Infeasible"
+
+
+def test_solve_knapsack__falls_back_to_model():
+    boa, rates, candidates = make_problem(seed=0, boa_mw=735)
+    assert solve_knapsack(candidates=with_costs(candidates, rates), max_states=10) is None
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("boa_mw", [90, 735, 5000])
+def test_get_objective_bound(seed: int, boa_mw: int):
+    boa, rates, candidates = make_problem(seed=seed, boa_mw=boa_mw)
+    candidates = with_costs(candidates, rates)
+
+    objective = solve_knapsack(candidates=candidates).objective
+    bound = get_objective_bound(candidates=candidates)
+    assert objective - 1e-6 <= bound <= objective * 1.01
+
+
+def test_get_objective_bound__infeasible():
+    one = AssetFactory(min_required_profit=0)
+    candidates = make_candidates(assets=[one, one], mws=[10, 20], objectives=[1, 2])
+    candidates = replace(candidates, boa=replace(candidates.boa, mw=5))
+    assert get_objective_bound(candidates=candidates) is None
@@ -0,0 +1,55 @@
+from dataclasses import replace
+
+import pytest
+
+from bmu_balancer.engine.main import run_engine
+from bmu_balancer.engine.reduction import get_undominated, reduce_candidates
+from bmu_balancer.operations.instruction_helpers import get_instruction_costs
+from tests.factories import AssetFactory, make_candidates, make_problem
+
+
+def test_get_undominated():
+    one, two = AssetFactory(), AssetFactory()
+    candidates = make_candidates(
+        assets=[one, one, one, one, one, two, two],
+        mws=[0, 10, 20, 30, 30, 10, 0],
+        objectives=[0, 5, 3, 8, 8, -1, 0],
+    )
+    # 20 is beaten by 10, the second 30 equals the first, and two's 10 is beaten by its 0
+    assert get_undominated(candidates).tolist() == [True, True, False, True, False, False, True]
+
+
+def test_reduce_candidates__unprofitable():
+    asset = AssetFactory(min_required_profit=15)
+    # An hour at a price of 10 can't make a min required profit of 15
+    candidates = make_candidates(assets=[asset] * 3, mws=[0, 10, 20], objectives=[0, 100, 200])
+    reduced, reduction = reduce_candidates(candidates)
+
+    assert reduced.mw.tolist() == [0]
+    assert (reduction.unprofitable, reduction.dominated, reduction.remaining) == (2, 0, 1)
+    assert (reduction.profit_rows, reduction.remaining_profit_rows) == (2, 0)
+
+
+def test_reduce_candidates__keeps_asset_with_no_profitable_candidates():
+    asset = AssetFactory(min_required_profit=15)
+    candidates = make_candidates(assets=[asset] * 2, mws=[10, 20], objectives=[100, 200])
+    reduced, reduction = reduce_candidates(candidates)
+
+    assert reduced.mw.tolist() == [10, 20]
+    assert reduction.remaining_profit_rows == 2
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("boa_mw", [90, 735, 1850])
+def test_run_engine__reduce(seed: int, boa_mw: int):
+    boa, rates, candidates = make_problem(seed=seed, boa_mw=boa_mw)
+    expected = run_engine(boa=boa, rates=rates, candidates=candidates)
+    actual = run_engine(boa=boa, rates=rates, candidates=candidates, reduce=True)
+
+    _, reduction = reduce_candidates(
+        replace(candidates, cost=get_instruction_costs(candidates=candidates, rates=rates)),
+    )
+    assert reduction.remaining < reduction.candidates
+    assert actual.status == expected.status == "Optimal"
+    assert actual.objective == pytest.approx(expected.objective)
+
@@ -1,9 +1,15 @@
+import random
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
 
+import numpy as np
 from factory import Factory, List, LazyAttribute, SubFactory, fuzzy, Sequence
 
+from bmu_balancer.models.engine import Candidate, CandidateSet
 from bmu_balancer.models.inputs import Asset, Rate, AssetState, BMU, Offer, BOA
 from bmu_balancer.models.outputs import Instruction
+from bmu_balancer.operations.instruction_helpers import get_instruction_costs
+from bmu_balancer.operations.key_store import KeyStore, get_keys
 
 MIN, MAX = 0, 1000
 START_DATE = datetime(2010, 1, 1)
@@ -103,3 +109,129 @@ class InstructionFactory(Factory):
     end = LazyAttribute(lambda c: c.start + timedelta(minutes=DEFAULT_MIN_DURATION))
     mw = fuzzy.FuzzyInteger(MIN, MAX)
     boa = SubFactory(BOAFactory)
+
+
+# HELPERS ------------------------------------------------------------------- #
+
+@dataclass
+class Item:
+    name: str
+    start: datetime
+    end: datetime
+    type: str
+
+
+ITEM_ONE = Item(name="Orange", start=datetime(2000, 1, 1), end=datetime(2000, 1, 1, 1), type="Fruit")
+ITEM_TWO = Item(name="Apple", start=datetime(2000, 1, 2), end=datetime(2000, 1, 2, 1), type="Fruit")
+ITEM_THREE = Item(name="Carrot", start=datetime(2000, 1, 1), end=datetime(2000, 1, 1, 1), type="Vegetable")
+ITEM_FOUR = Item(name="Carrot", start=datetime(2000, 1, 3), end=datetime(2000, 1, 3, 1), type="Vegetable")
+
+
+BOA_START = datetime(2000, 1, 1, 10)
+
+
+def make_input(seed: int, mw: int, tz=None):
+    """A BMU of assets with a mix of availability, current and
+    prior instructions, notice periods and single mw levels."""
+    rng = random.Random(seed)
+    boa_start = BOA_START.replace(tzinfo=tz)
+    assets = [
+        AssetFactory(
+            id=n,
+            capacity=rng.choice([50, 100, 200, 1000]),
+            max_import_mw_hr=rng.choice([30, 100, 600]),
+            max_export_mw_hr=rng.choice([30, 100, 600]),
+            single_import_mw_hr=rng.choice([None, None, 0, 40]),
+            single_export_mw_hr=rng.choice([None, None, 0, 25.5]),
+            min_zero_time=rng.choice([0, 30, 300]),
+            min_non_zero_time=rng.choice([0, 10, 45, 90]),
+            notice_to_deviate_from_zero=rng.choice([0, 5, 30, 90]),
+            notice_to_deliver_bid=rng.choice([0, 5, 30]),
+            max_delivery_period=rng.choice([10, 20.5, 60, 600]),
+        )
+        for n in range(40)
+    ]
+    boa = BOAFactory(
+        offer__bmu__assets=tuple(assets),
+        start=boa_start,
+        end=boa_start + timedelta(minutes=rng.choice([30, 45])),
+        mw=mw,
+    )
+    states = []
+    instructions = []
+    for asset in assets:
+        for hour in range(rng.choice([0, 1, 2])):
+            states.append(AssetStateFactory(
+                asset=asset,
+                start=boa_start - timedelta(hours=1 - hour),
+                end=boa_start + timedelta(hours=hour),
+                available=rng.random() > 0.1,
+            ))
+        if rng.random() < 0.4:
+            start = boa_start - timedelta(minutes=rng.choice([5, 30, 60]))
+            instructions.append(InstructionFactory(asset=asset, boa=None, start=start, end=boa_start + timedelta(minutes=5)))
+        for _ in range(rng.choice([0, 1, 2])):
+            end = boa_start - timedelta(minutes=rng.choice([10, 60, 120]))
+            instructions.append(InstructionFactory(asset=asset, boa=None, start=end - timedelta(minutes=30), end=end))
+    return boa, states, instructions
+
+
+def assert_same_candidates(actual, expected):
+    assert actual.assets == expected.assets
+    for name in ('asset_index', 'mw', 'start', 'end', 'hours'):
+        np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name))
+    assert actual.to_candidates() == expected.to_candidates()
+
+
+def make_problem(seed: int, boa_mw: int):
+    """A BMU of assets with fine 10mw grids and differing ramp costs."""
+    rng = np.random.RandomState(seed)
+    assets = [
+        AssetFactory(
+            id=n,
+            capacity=int(rng.choice([150, 400, 1000])),
+            min_required_profit=float(rng.uniform(0, 50)),
+            running_cost_per_mw_hr=float(rng.uniform(0, 5)),
+        )
+        for n in range(8)
+    ]
+    boa = BOAFactory(
+        mw=boa_mw,
+        offer__price_mw_hr=10,
+        offer__bmu__assets=tuple(assets),
+        start=datetime(2020, 1, 1, 1),
+        end=datetime(2020, 1, 1, 2),
+    )
+    candidates = CandidateSet.from_candidates(boa=boa, candidates=[
+        Candidate(asset=asset, boa=boa, mw=mw)
+        for asset in assets
+        for mw in range(0, int(asset.capacity) + 10, 10)
+    ])
+    rates = KeyStore(keys=get_keys(Rate), objects=[
+        RateFactory(
+            asset=asset,
+            **{name: float(rng.uniform(0.5, 20)) for name in (
+                'ramp_up_import', 'ramp_up_export', 'ramp_down_import', 'ramp_down_export',
+            )},
+        )
+        for asset in assets
+    ])
+    return boa, rates, candidates
+
+
+def make_candidates(assets, mws, objectives, price: float = 10):
+    boa = BOAFactory(
+        offer__price_mw_hr=price,
+        offer__bmu__assets=tuple(assets),
+        start=datetime(2020, 1, 1, 1),
+        end=datetime(2020, 1, 1, 2),
+    )
+    candidates = CandidateSet.from_candidates(boa=boa, candidates=[
+        Candidate(asset=asset, boa=boa, mw=mw) for asset, mw in zip(assets, mws)
+    ])
+    # Cost chosen so the objective comes out as given
+    return replace(candidates, cost=candidates.profit - np.array(objectives, dtype=np.float64))
+
+
+def with_costs(candidates, rates):
+    return replace(candidates, cost=get_instruction_costs(candidates=candidates, rates=rates))
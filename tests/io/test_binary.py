@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from bmu_balancer.balance_a_bmu import balance_a_bmu
+from bmu_balancer.io.binary import convert_to_binary, is_binary_input, load_binary_input_data
+from bmu_balancer.io.io import load_input_data
+from tests import SIMPLE_INPUT_FILEPATH
+
+
+@pytest.fixture
+def directory(tmp_path):
+    directory = str(tmp_path / "input")
+    convert_to_binary(json_filepath=SIMPLE_INPUT_FILEPATH, directory=directory)
+    return directory
+
+
+def test_load_binary_input_data(directory) -> None:
+    expected = load_input_data(filepath=SIMPLE_INPUT_FILEPATH)
+    loaded = load_binary_input_data(directory=directory)
+
+    assert is_binary_input(directory)
+    assert not is_binary_input(SIMPLE_INPUT_FILEPATH)
+    assert isinstance(loaded.states.start, np.memmap)
+    assert loaded.data.assets == expected.assets
+    assert loaded.data.boa == expected.boa
+    assert list(loaded.data.states) == expected.states
+    assert list(loaded.data.instructions) == expected.instructions
+    assert loaded.states.assets[0] is loaded.data.assets[0]
+
+    asset = expected.assets[0]
+    assert loaded.instructions.get(asset=asset) == [i for i in expected.instructions if i.asset == asset]
+
+
+def test_load_binary_input_data__not_mapped(directory) -> None:
+    loaded = load_binary_input_data(directory=directory, mmap=False)
+    assert not isinstance(loaded.states.start, np.memmap)
+    assert list(loaded.states) == load_input_data(filepath=SIMPLE_INPUT_FILEPATH).states
+
+
+def test_balance_a_bmu__binary_input(directory) -> None:
+    expected = balance_a_bmu(input_filepath=SIMPLE_INPUT_FILEPATH)
+    solution = balance_a_bmu(input_filepath=directory)
+    assert solution.instructions == expected.instructions
@@ -0,0 +1,80 @@
+import shutil
+
+import pytest
+
+from bmu_balancer.io import cache, io
+from bmu_balancer.io.cache import get_cache_filepath
+from bmu_balancer.io.io import load_input_data
+from tests import SIMPLE_INPUT_FILEPATH
+
+
+@pytest.fixture
+def input_filepath(tmp_path):
+    filepath = str(tmp_path / "input.json")
+    shutil.copy(SIMPLE_INPUT_FILEPATH, filepath)
+    return filepath
+
+
+@pytest.fixture
+def expected():
+    return load_input_data(filepath=SIMPLE_INPUT_FILEPATH)
+
+
+@pytest.fixture
+def parse_calls(expected, monkeypatch):
+    calls = []
+    parse_input_data = io.parse_input_data
+
+    def counting_parse(**kwargs):
+        calls.append(kwargs)
+        return parse_input_data(**kwargs)
+
+    monkeypatch.setattr(io, "parse_input_data", counting_parse)
+    return calls
+
+
+def test_load_input_data__cache(input_filepath, expected, parse_calls) -> None:
+    assert load_input_data(filepath=input_filepath, cache=True) == expected
+    assert load_input_data(filepath=input_filepath, cache=True) == expected
+    assert len(parse_calls) == 1
+
+    # Options change how the input is parsed, so have their own entry
+    assert load_input_data(filepath=input_filepath, cache=True, fast=True) == expected
+    assert len(parse_calls) == 2
+
+
+def test_load_input_data__cache_invalidated_by_content(input_filepath, parse_calls) -> None:
+    load_input_data(filepath=input_filepath, cache=True)
+
+    with open(input_filepath) as file:
+        content = file.read()
+    with open(input_filepath, 'w') as file:
+        file.write(content.replace('"mw": 300', '"mw": 200'))
+
+    data = load_input_data(filepath=input_filepath, cache=True)
+    assert data.boa.mw == 200
+    assert len(parse_calls) == 2
+
+
+def test_load_input_data__cache_invalidated_by_code(input_filepath, parse_calls, monkeypatch) -> None:
+    load_input_data(filepath=input_filepath, cache=True)
+    monkeypatch.setattr(cache, "get_code_version", lambda: "another version")
+    load_input_data(filepath=input_filepath, cache=True)
+    assert len(parse_calls) == 2
+
+
+def test_load_input_data__corrupt_cache(input_filepath, expected, parse_calls) -> None:
+    with open(get_cache_filepath(input_filepath), 'wb') as file:
+        file.write(b"not a pickle")
+
+    assert load_input_data(filepath=input_filepath, cache=True) == expected
+    load_input_data(filepath=input_filepath, cache=True)
+    assert len(parse_calls) == 1
+
+
+def test_write_cache__unpicklable(tmp_path) -> None:
+    cache_filepath = str(tmp_path / "input.json.cache")
+    cache.write_cache(cache_filepath=cache_filepath, key="key", data=lambda: None)
+
+    # Logged and carried on from, leaving no temporary file behind
+    assert list(tmp_path.iterdir()) == []
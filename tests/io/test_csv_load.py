@@ -0,0 +1,101 @@
+import gzip
+import lzma
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from bmu_balancer.balance_a_bmu import balance_a_bmu
+from bmu_balancer.io.csv_load import load_csv_input_data, read_csv_columns, resolve_references, to_ids
+from bmu_balancer.io.io import load_input_data
+from bmu_balancer.operations.columnar import AssetStateColumns, InstructionColumns
+from tests import SIMPLE_INPUT_FILEPATH
+
+SIMPLE_INPUT_CSV_DIRECTORY = 'tests/data/simple_input_csv'
+
+
+def copy_directory(tmp_path, compress=None):
+    """Copy the CSV input, compressing the history sections with compress."""
+    directory = str(tmp_path / "input")
+    shutil.copytree(SIMPLE_INPUT_CSV_DIRECTORY, directory)
+    if compress is not None:
+        opener, suffix = compress
+        for section in ('states', 'instructions'):
+            filepath = os.path.join(directory, section + ".csv")
+            with open(filepath, 'rb') as source, opener(filepath + suffix, 'wb') as target:
+                target.write(source.read())
+            os.remove(filepath)
+    return directory
+
+
+@pytest.mark.parametrize("compress", [None, (gzip.open, ".gz"), (lzma.open, ".xz")], ids=["csv", "gzip", "xz"])
+def test_load_input_data__csv(tmp_path, compress) -> None:
+    expected = load_input_data(filepath=SIMPLE_INPUT_FILEPATH)
+    data = load_input_data(filepath=copy_directory(tmp_path, compress=compress))
+
+    assert isinstance(data.states, AssetStateColumns)
+    assert isinstance(data.instructions, InstructionColumns)
+    assert list(data.states) == expected.states
+    assert list(data.instructions) == expected.instructions
+    for section in ('assets', 'rates', 'bmus', 'offers'):
+        assert getattr(data, section) == getattr(expected, section)
+        for item, expected_item in zip(getattr(data, section), getattr(expected, section)):
+            assert list(map(type, item.__getstate__())) == list(map(type, expected_item.__getstate__()))
+    assert data.boa == expected.boa
+    assert data.parameters == expected.parameters
+
+
+def test_load_csv_input_data__defaults(tmp_path) -> None:
+    directory = copy_directory(tmp_path)
+    os.remove(os.path.join(directory, "parameters.csv"))
+    with open(os.path.join(directory, "states.csv"), 'w') as file:
+        file.write("id,asset,start,end\n1,1,2000-01-01T01:00:00+01:00,2000-01-01T01:20:00+01:00\n")
+
+    data = load_csv_input_data(directory)
+    state, = data.states
+    assert state.charge == 0
+    assert state.available is False
+    assert state.start.utcoffset().total_seconds() == 3600
+    assert data.parameters.execution_time.tzinfo is None
+
+
+def test_load_csv_input_data__unknown_reference(tmp_path) -> None:
+    directory = copy_directory(tmp_path)
+    with open(os.path.join(directory, "bmus.csv"), 'w') as file:
+        file.write("id,name,assets\n1,BMU One,1;3\n")
+
+    with pytest.raises(RuntimeError):
+        load_csv_input_data(directory)
+
+
+def test_resolve_references() -> None:
+    index = (np.array([1, 4, 9]), ["one", "four", "nine"])
+    assert resolve_references(np.array([9, 1, 4, 4]), index, "items").tolist() == [2, 0, 1, 1]
+    with pytest.raises(RuntimeError):
+        resolve_references(np.array([1, 5]), index, "items")
+    with pytest.raises(RuntimeError):
+        resolve_references(np.array([1]), (np.array([], dtype=np.int64), []), "items")
+    with pytest.raises(ValueError):
+        to_ids(["1.5"])
+    # Beyond float64's precision
+    assert to_ids(["9007199254740993"]).tolist() == [2 ** 53 + 1]
+
+
+def test_read_csv_columns__chunks(tmp_path) -> None:
+    filepath = os.path.join(SIMPLE_INPUT_CSV_DIRECTORY, "states.csv")
+    expected = read_csv_columns(filepath)
+    actual = read_csv_columns(filepath, chunk_rows=2)
+    assert list(actual) == list(expected)
+    assert all(np.array_equal(actual[name], expected[name]) for name in expected)
+
+    ragged = str(tmp_path / "ragged.csv")
+    with open(ragged, 'w') as file:
+        file.write("id,asset\n1,2\n3\n")
+    with pytest.raises(RuntimeError):
+        read_csv_columns(ragged)
+
+
+def test_balance_a_bmu__csv_input() -> None:
+    expected = balance_a_bmu(input_filepath=SIMPLE_INPUT_FILEPATH)
+    assert balance_a_bmu(input_filepath=SIMPLE_INPUT_CSV_DIRECTORY).instructions == expected.instructions
@@ -0,0 +1,89 @@
+import json
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from bmu_balancer.io.fast_load import fast_load_input_data, parse_datetime
+from bmu_balancer.io.io import load_input_data
+from tests import SIMPLE_INPUT_FILEPATH
+
+
+def get_values(obj):
+    """Field values with their types, so 1 and 1.0 don't compare equal."""
+    return [(type(getattr(obj, f.name)), getattr(obj, f.name)) for f in fields(obj)]
+
+
+@pytest.fixture
+def data_dict():
+    with open(SIMPLE_INPUT_FILEPATH) as file:
+        return json.load(file)
+
+
+@pytest.mark.parametrize("validate", [False, True])
+def test_load_input_data__fast_matches_schemas(validate) -> None:
+    expected = load_input_data(filepath=SIMPLE_INPUT_FILEPATH)
+    data = load_input_data(filepath=SIMPLE_INPUT_FILEPATH, fast=True, validate=validate)
+
+    assert data == expected
+    for section in ('assets', 'rates', 'states', 'bmus', 'offers', 'instructions'):
+        for item, expected_item in zip(getattr(data, section), getattr(expected, section)):
+            assert get_values(item) == get_values(expected_item)
+    assert get_values(data.boa) == get_values(expected.boa)
+    assert data.boa.offer.bmu.assets[0] is data.assets[0]
+
+
+def test_fast_load_input_data__defaults(data_dict) -> None:
+    del data_dict['assets'][0]['running_cost_per_mw_hr']
+    del data_dict['states'][0]['available']
+    data_dict['parameters'] = {}
+
+    data = fast_load_input_data(data_dict)
+    assert type(data.assets[0].running_cost_per_mw_hr) == int
+    assert data.states[0].available is False
+    assert data.parameters.execution_time.tzinfo is None
+
+
+def test_fast_load_input_data__missing_reference(data_dict) -> None:
+    data_dict['rates'][0]['asset'] = 99
+    with pytest.raises(RuntimeError):
+        fast_load_input_data(data_dict)
+
+
+def test_fast_load_input_data__validate(data_dict) -> None:
+    data_dict['assets'][0]['colour'] = "red"
+    data_dict['assets'][1]['capacity'] = True
+    data_dict['states'][0]['start'] = "2000-01-01T01:00:00"
+    data_dict['bmus'][0]['assets'] = [1, 3]
+    del data_dict['boa']['mw']
+
+    with pytest.raises(RuntimeError) as error:
+        fast_load_input_data(data_dict, validate=True)
+
+    message = str(error.value)
+    for expected in (
+            "assets[0]: unknown field colour",
+            "assets[1]: capacity is not a number",
+            "states[0]: start is not an aware",
+            "bmus[0]: assets references unknown assets 3",
+            "boa: missing required field mw",
+    ):
+        assert expected in message
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("2000-01-01T01:00:00Z", datetime(2000, 1, 1, 1, tzinfo=timezone.utc)),
+        ("2000-01-01T01:00:00.5+01:00", datetime(2000, 1, 1, 1, 0, 0, 500000, tzinfo=timezone(timedelta(hours=1)))),
+        ("2000-01-01T01:00:00.1234Z", datetime(2000, 1, 1, 1, 0, 0, 123400, tzinfo=timezone.utc)),
+    ]
+)
+def test_parse_datetime(value, expected) -> None:
+    assert parse_datetime(value) == expected
+    assert parse_datetime(value).utcoffset() == expected.utcoffset()
+
+
+def test_parse_datetime__naive() -> None:
+    with pytest.raises(ValueError):
+        parse_datetime("2000-01-01T01:00:00")
@@ -1,5 +1,7 @@
 
-from bmu_balancer.io.io import load_input_data
+from datetime import date, datetime
+
+from bmu_balancer.io.io import json_serial, load_input_data
 from bmu_balancer.models import BOA, InputData
 from tests import SIMPLE_INPUT_FILEPATH
 
@@ -14,3 +16,8 @@ def test_load_input_data():
     assert len(data.offers) == 1
     assert len(data.instructions) == 1
     assert type(data.boa) == BOA
+
+
+def test_json_serial__keeps_time():
+    assert json_serial(datetime(2000, 1, 1, 1, 30)) == "2000-01-01T01:30:00"
+    assert json_serial(date(2000, 1, 1)) == "2000-01-01"
@@ -0,0 +1,106 @@
+import json
+import re
+from datetime import timedelta
+
+import pytest
+
+from bmu_balancer.io.io import load_input_data
+from bmu_balancer.io.pushdown import load_boa_input_data
+from bmu_balancer.operations.instruction_timeline import InstructionTimeline
+from tests import SIMPLE_INPUT_FILEPATH
+
+
+def make_instruction(id, asset, start, end):
+    return {"id": id, "asset": asset, "mw": 10, "start": start, "end": end}
+
+
+def make_state(id, asset, start, end):
+    return {"id": id, "asset": asset, "start": start, "end": end, "charge": 0.5, "available": True}
+
+
+@pytest.fixture
+def input_filepath(tmp_path):
+    """The simple input with a second BMU, and history
+    around the BOA, which runs 01:00 to 01:30."""
+    with open(SIMPLE_INPUT_FILEPATH) as file:
+        data = json.load(file)
+
+    data['assets'].append(dict(data['assets'][0], id=3, name="Asset Three"))
+    data['rates'].append(dict(data['rates'][0], id=3, asset=3))
+    data['bmus'].append({"id": 2, "name": "BMU Two", "assets": [3]})
+    data['offers'].append(dict(data['offers'][0], id=2, bmu=2))
+    data['states'] = [
+        make_state(1, 1, "2000-01-01T01:00:00Z", "2000-01-01T01:20:00Z"),
+        make_state(2, 2, "2000-01-01T01:00:00Z", "2000-01-01T01:20:00Z"),
+        make_state(3, 1, "2000-01-01T00:00:00Z", "2000-01-01T00:40:00Z"),
+        make_state(4, 1, "2000-01-01T02:00:00Z", "2000-01-01T02:20:00Z"),
+        make_state(5, 3, "2000-01-01T01:00:00Z", "2000-01-01T01:20:00Z"),
+    ]
+    data['instructions'] = [
+        make_instruction(1, 1, "1999-12-31T22:00:00Z", "1999-12-31T23:00:00Z"),
+        make_instruction(2, 1, "1999-12-31T23:00:00Z", "2000-01-01T00:00:00Z"),
+        make_instruction(3, 2, "1999-12-31T23:00:00Z", "2000-01-01T00:00:00Z"),
+        make_instruction(4, 2, "1999-12-31T23:30:00Z", "2000-01-01T00:00:00Z"),
+        make_instruction(5, 2, "2000-01-01T00:30:00Z", "2000-01-01T01:10:00Z"),
+        make_instruction(6, 1, "2000-01-01T08:00:00Z", "2000-01-01T08:30:00Z"),
+        make_instruction(7, 3, "1999-12-31T23:00:00Z", "2000-01-01T00:00:00Z"),
+    ]
+
+    filepath = str(tmp_path / "input.json")
+    with open(filepath, 'w') as file:
+        json.dump(data, file)
+    return filepath
+
+
+def get_ids(items):
+    return [item.id for item in items]
+
+
+def test_load_boa_input_data(input_filepath) -> None:
+    data = load_boa_input_data(filepath=input_filepath, indexes=("asset",)).data
+
+    assert get_ids(data.assets) == [1, 2]
+    assert get_ids(data.rates) == [1, 2]
+    assert get_ids(data.bmus) == [1]
+    assert get_ids(data.offers) == [1]
+    assert get_ids(data.states) == [1, 2]
+    # The latest to end before the BOA per asset, ties included, and those in progress
+    assert get_ids(data.instructions) == [2, 3, 4, 5]
+    assert data.boa == load_input_data(filepath=input_filepath).boa
+
+
+def test_load_boa_input_data__state_window(input_filepath) -> None:
+    data = load_boa_input_data(filepath=input_filepath, state_window=timedelta(minutes=30)).data
+    assert get_ids(data.states) == [1, 2, 3, 4]
+
+    # Overlap is inclusive of the window ends
+    data = load_boa_input_data(filepath=input_filepath, state_window=timedelta(minutes=20)).data
+    assert get_ids(data.states) == [1, 2, 3]
+
+    data = load_boa_input_data(filepath=input_filepath, state_window=timedelta(minutes=15)).data
+    assert get_ids(data.states) == [1, 2]
+
+
+def test_load_boa_input_data__same_lookups(input_filepath) -> None:
+    full = load_input_data(filepath=input_filepath)
+    data = load_boa_input_data(filepath=input_filepath).data
+
+    full_timeline = InstructionTimeline.from_instructions(full.instructions)
+    timeline = InstructionTimeline.from_instructions(data.instructions)
+    for asset in data.boa.assets:
+        assert timeline.prior(asset=asset, time=data.boa.start) == full_timeline.prior(asset=asset, time=data.boa.start)
+        assert timeline.current(asset=asset, time=data.boa.start) == full_timeline.current(
+            asset=asset, time=data.boa.start,
+        )
+
+
+@pytest.mark.parametrize("state", [{"id": 9, "asset": 1, "end": "2000-01-01T01:20:00Z"}, make_state(9, 1, "soon", "")])
+def test_load_boa_input_data__bad_state(input_filepath, state) -> None:
+    with open(input_filepath) as file:
+        data = json.load(file)
+    data['states'].append(state)
+    with open(input_filepath, 'w') as file:
+        json.dump(data, file)
+
+    with pytest.raises(RuntimeError, match=re.escape(input_filepath)):
+        load_boa_input_data(filepath=input_filepath)
@@ -0,0 +1,91 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from bmu_balancer.balance_a_bmu import balance_a_bmu
+from bmu_balancer.io.io import dump_solution
+from bmu_balancer.io.solution_writer import SolutionWriter
+from bmu_balancer.models.engine import Solution
+from tests import SIMPLE_INPUT_FILEPATH
+from tests.factories import BOAFactory, InstructionFactory
+
+
+@pytest.fixture
+def solution():
+    boa = BOAFactory(id=7)
+    return Solution(
+        status="Optimal",
+        objective=12.5,
+        gap=0.01,
+        instructions=[
+            InstructionFactory(
+                id=None,
+                boa=boa,
+                mw=10,
+                start=datetime(2000, 1, 1, 1, 15, tzinfo=timezone.utc),
+                end=datetime(2000, 1, 1, 1, 45, 30, tzinfo=timezone.utc),
+            ),
+            InstructionFactory(id=None, boa=boa, mw=5),
+        ],
+    )
+
+
+def test_dump_solution(tmp_path, solution) -> None:
+    filepath = str(tmp_path / "solution.json")
+    dump_solution(filepath=filepath, solution=solution)
+
+    with open(filepath) as file:
+        data = json.load(file)
+
+    assert data['status'] == "Optimal"
+    assert data['objective'] == 12.5
+    assert data['gap'] == 0.01
+    first = data['instructions'][0]
+    assert first == {
+        'id': None,
+        'asset': solution.instructions[0].asset.id,
+        'boa': 7,
+        'mw': 10,
+        'start': "2000-01-01T01:15:00+00:00",
+        'end': "2000-01-01T01:45:30+00:00",
+    }
+    assert datetime.fromisoformat(first['end']) == solution.instructions[0].end
+    assert len(data['instructions']) == 2
+
+
+def test_dump_solution__append(tmp_path, solution) -> None:
+    filepath = str(tmp_path / "solutions.jsonl")
+    dump_solution(filepath=filepath, solution=solution, append=True)
+    dump_solution(filepath=filepath, solution=Solution(status="Infeasible"), append=True)
+
+    with open(filepath) as file:
+        lines = [json.loads(line) for line in file]
+    assert [line['status'] for line in lines] == ["Optimal", "Infeasible"]
+    assert lines[1] == {'status': "Infeasible", 'objective': None, 'gap': None, 'instructions': []}
+
+    with pytest.raises(RuntimeError):
+        dump_solution(filepath=str(tmp_path / "solutions.json"), solution=solution, append=True)
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_solution_writer__json(tmp_path, solution, count) -> None:
+    filepath = str(tmp_path / "solutions.json")
+    with SolutionWriter.open(filepath=filepath) as writer:
+        for _ in range(count):
+            writer.write(solution)
+
+    with open(filepath) as file:
+        data = json.load(file)
+    assert len(data) == count
+    assert all(len(item['instructions']) == 2 for item in data)
+
+
+def test_balance_a_bmu__output(tmp_path) -> None:
+    filepath = str(tmp_path / "solution.json")
+    solution = balance_a_bmu(input_filepath=SIMPLE_INPUT_FILEPATH, output_filepath=filepath)
+
+    with open(filepath) as file:
+        data = json.load(file)
+    assert [item['mw'] for item in data['instructions']] == [i.mw for i in solution.instructions]
+    assert data['instructions'][0]['start'] == solution.instructions[0].start.isoformat()
@@ -0,0 +1,142 @@
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+
+from bmu_balancer.balance_a_bmu import balance_a_bmu
+from bmu_balancer.io.io import load_input_data, load_json
+from bmu_balancer.io.sqlite_store import ConnectionPool, convert_to_sqlite, is_sqlite_input, load_sqlite_input_data
+from bmu_balancer.models import AssetState, Instruction
+from bmu_balancer.operations.key_store import KeyStore, get_keys
+from tests import SIMPLE_INPUT_FILEPATH
+
+
+@pytest.fixture
+def sqlite_filepath(tmp_path):
+    filepath = str(tmp_path / "input.sqlite")
+    convert_to_sqlite(json_filepath=SIMPLE_INPUT_FILEPATH, sqlite_filepath=filepath)
+    return filepath
+
+
+def test_load_sqlite_input_data(sqlite_filepath) -> None:
+    expected = load_input_data(filepath=SIMPLE_INPUT_FILEPATH)
+    loaded = load_sqlite_input_data(filepath=sqlite_filepath)
+
+    assert is_sqlite_input(sqlite_filepath)
+    assert not is_sqlite_input(SIMPLE_INPUT_FILEPATH)
+    assert loaded.data.assets == expected.assets
+    assert loaded.data.boa == expected.boa
+    assert list(loaded.data.states) == expected.states
+    assert list(loaded.data.instructions) == expected.instructions
+    assert len(loaded.states) == len(expected.states)
+
+
+@pytest.mark.parametrize("start_minutes, end_minutes", [(0, 0), (-60, 0), (20, 30), (21, 30), (-60, -1), (0, 600)])
+def test_sqlite_store__matches_key_store(sqlite_filepath, start_minutes, end_minutes) -> None:
+    expected = load_input_data(filepath=SIMPLE_INPUT_FILEPATH)
+    loaded = load_sqlite_input_data(filepath=sqlite_filepath)
+    stores = {
+        'states': KeyStore(keys=get_keys(AssetState), objects=expected.states),
+        'instructions': KeyStore(keys=get_keys(Instruction), objects=expected.instructions),
+    }
+    start = expected.boa.start + timedelta(minutes=start_minutes)
+    end = expected.boa.start + timedelta(minutes=end_minutes)
+
+    for section, key_store in stores.items():
+        store = getattr(loaded, section)
+        for asset in expected.assets:
+            assert store.get(asset=asset) == key_store.get(asset=asset)
+            assert store.get_for_period(start=start, end=end, asset=asset) == key_store.get_for_period(
+                start=start, end=end, asset=asset,
+            )
+            assert store.get_at_time(time=end, asset=asset) == key_store.get_at_time(time=end, asset=asset)
+
+    with pytest.raises(RuntimeError):
+        loaded.states.get(asset=expected.assets[0], available=True)
+    with pytest.raises(TypeError):
+        loaded.states.get_at_time(time=start.replace(tzinfo=None), asset=expected.assets[0])
+
+
+def test_connection_pool(sqlite_filepath) -> None:
+    pool = ConnectionPool(filepath=sqlite_filepath, size=2)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        counts = list(executor.map(lambda _: query_count(pool), range(32)))
+    assert counts == [2] * 32
+    assert pool._opened <= 2
+
+    with pool.connection() as connection:
+        with pytest.raises(sqlite3.OperationalError):
+            connection.execute("DELETE FROM states")
+    pool.close()
+
+
+def test_connection_pool__close(sqlite_filepath) -> None:
+    pool = ConnectionPool(filepath=sqlite_filepath, size=1)
+    with pool.connection() as connection:
+        pool.close()
+    # Returned after the close, so closed rather than kept
+    with pytest.raises(sqlite3.ProgrammingError):
+        connection.execute("SELECT 1")
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            pass
+
+
+def test_sqlite_store__bounded_period_query(sqlite_filepath) -> None:
+    loaded = load_sqlite_input_data(filepath=sqlite_filepath)
+    assert loaded.states.max_duration_us == 20 * 60 * 10 ** 6
+    with loaded.states.pool.connection() as connection:
+        plan = connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM states WHERE asset_id = ? AND start_us BETWEEN ? AND ? AND end_us >= ?",
+            (1, 0, 0, 0),
+        ).fetchall()
+    assert "start_us>? AND start_us<?" in plan[0][-1]
+
+
+def test_sqlite_store__empty(tmp_path) -> None:
+    data = load_json(SIMPLE_INPUT_FILEPATH)
+    json_filepath = str(tmp_path / "input.json")
+    with open(json_filepath, 'w') as file:
+        json.dump({**data, 'instructions': []}, file)
+    sqlite_filepath = str(tmp_path / "input.sqlite")
+    convert_to_sqlite(json_filepath=json_filepath, sqlite_filepath=sqlite_filepath)
+
+    loaded = load_sqlite_input_data(filepath=sqlite_filepath)
+    boa = loaded.data.boa
+    # With no times stored either aware or naive times can be queried, as with a KeyStore
+    for time in (boa.start, boa.start.replace(tzinfo=None)):
+        assert loaded.instructions.get_at_time(time=time, asset=loaded.data.assets[0]) == []
+
+
+def query_count(pool: ConnectionPool) -> int:
+    with pool.connection() as connection:
+        return connection.execute("SELECT COUNT(*) FROM states").fetchone()[0]
+
+
+def test_convert_to_sqlite__exists(sqlite_filepath) -> None:
+    with pytest.raises(RuntimeError):
+        convert_to_sqlite(json_filepath=SIMPLE_INPUT_FILEPATH, sqlite_filepath=sqlite_filepath)
+
+
+def test_balance_a_bmu__sqlite_input(sqlite_filepath) -> None:
+    expected = balance_a_bmu(input_filepath=SIMPLE_INPUT_FILEPATH)
+    assert balance_a_bmu(input_filepath=sqlite_filepath).instructions == expected.instructions
+
+
+def test_balance_a_bmu__sqlite_input_closes_pool(sqlite_filepath, monkeypatch) -> None:
+    closed = []
+    close = ConnectionPool.close
+    monkeypatch.setattr(ConnectionPool, "close", lambda pool: closed.append(pool) or close(pool))
+
+    balance_a_bmu(input_filepath=sqlite_filepath)
+    assert len(closed) == 1
+    with pytest.raises(RuntimeError):
+        with closed[0].connection():
+            pass
+
+
+def test_balance_a_bmu__sqlite_input_columnar_states(sqlite_filepath) -> None:
+    with pytest.raises(RuntimeError):
+        balance_a_bmu(input_filepath=sqlite_filepath, columnar_states=True)
@@ -0,0 +1,46 @@
+import io
+
+import pytest
+
+from bmu_balancer.io.io import load_input_data
+from bmu_balancer.io.streaming import JsonStreamReader, stream_input_data
+from tests import SIMPLE_INPUT_FILEPATH
+
+ASSETS_NOT_IN_BMU_FILEPATH = 'tests/data/assets_not_in_bmu.json'
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+def test_json_stream_reader(chunk_size) -> None:
+    text = ' { "a" : [1, 22, 333.5, {"b": [] }, "c,]"] , "d": {}, "e": 12345678 , "f": [ ] } '
+    reader = JsonStreamReader(io.StringIO(text), chunk_size=chunk_size)
+
+    values = {}
+    for key in reader.iter_object():
+        values[key] = list(reader.iter_array()) if key in ("a", "f") else reader.decode()
+
+    assert values == {"a": [1, 22, 333.5, {"b": []}, "c,]"], "d": {}, "e": 12345678, "f": []}
+
+
+def test_json_stream_reader__invalid() -> None:
+    reader = JsonStreamReader(io.StringIO('{"a": 1 "b": 2}'), chunk_size=4)
+    with pytest.raises(RuntimeError):
+        list(reader.iter_object())
+
+
+@pytest.mark.parametrize("chunk_size", [5, 1 << 16])
+def test_stream_input_data(chunk_size) -> None:
+    expected = load_input_data(filepath=SIMPLE_INPUT_FILEPATH)
+    streamed = stream_input_data(filepath=SIMPLE_INPUT_FILEPATH, indexes=("asset",), chunk_size=chunk_size)
+
+    assert streamed.data == expected
+    assert streamed.states.objects == expected.states
+    assert streamed.instructions.get(asset=expected.assets[0]) == expected.instructions
+
+
+def test_stream_input_data__skips_assets_not_in_bmu() -> None:
+    expected = load_input_data(filepath=ASSETS_NOT_IN_BMU_FILEPATH)
+    streamed = stream_input_data(filepath=ASSETS_NOT_IN_BMU_FILEPATH)
+
+    assert streamed.data.assets == expected.assets
+    assert streamed.data.states == [state for state in expected.states if state.asset.id == 1]
+    assert streamed.data.instructions == expected.instructions
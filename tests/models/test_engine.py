@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from bmu_balancer.models import Rate
+from bmu_balancer.models.engine import AssetCandidates, Candidate, CandidateSet
+from bmu_balancer.operations.instruction_helpers import get_instruction_cost, get_instruction_costs
+from bmu_balancer.operations.key_store import KeyStore, get_keys
+from tests.factories import AssetFactory, BOAFactory, RateFactory
+
+
+@pytest.fixture
+def boa():
+    return BOAFactory(
+        mw=10,
+        offer__price_mw_hr=10,
+        start=datetime(2020, 1, 1, 1),
+        end=datetime(2020, 1, 1, 4),
+    )
+
+
+@pytest.fixture
+def candidates(boa):
+    one, two = AssetFactory(running_cost_per_mw_hr=1), AssetFactory(running_cost_per_mw_hr=2)
+    return [
+        Candidate(asset=one, boa=boa, mw=0),
+        Candidate(asset=one, boa=boa, mw=5),
+        Candidate(asset=two, boa=boa, mw=5, adjusted_start=datetime(2020, 1, 1, 2)),
+        Candidate(asset=two, boa=boa, mw=10, adjusted_start=datetime(2020, 1, 1, 2)),
+        Candidate(asset=one, boa=boa, mw=10),
+    ]
+
+
+def test_candidate_set__from_candidates(boa, candidates) -> None:
+    candidate_set = CandidateSet.from_candidates(boa=boa, candidates=candidates)
+
+    assert len(candidate_set) == len(candidates)
+    assert candidate_set.to_candidates() == candidates
+    assert candidate_set.hours.tolist() == [candidate.hours for candidate in candidates]
+    assert [group.tolist() for group in candidate_set.get_asset_groups()] == [[0, 1, 4], [2, 3]]
+    assert isinstance(candidate_set.get_instruction(1).mw, int)
+    assert candidate_set.get_instruction(2).start == datetime(2020, 1, 1, 2)
+
+
+def test_candidate_set__from_asset_candidates(boa, candidates) -> None:
+    one, two = candidates[0].asset, candidates[2].asset
+    candidate_set = CandidateSet.from_asset_candidates(
+        boa=boa,
+        asset_candidates=[
+            AssetCandidates(asset=one, mw_options=(0, 5, 10)),
+            AssetCandidates(asset=two, mw_options=(5, 10), adjusted_start=datetime(2020, 1, 1, 2)),
+        ],
+    )
+    assert candidate_set.to_candidates() == [candidates[n] for n in (0, 1, 4, 2, 3)]
+
+
+def test_candidate_set__costs(boa, candidates) -> None:
+    rates = KeyStore(
+        keys=get_keys(Rate),
+        objects=[
+            RateFactory(asset=candidates[0].asset, ramp_up_import=1, ramp_up_export=1),
+            RateFactory(asset=candidates[2].asset, ramp_down_import=2, ramp_down_export=2),
+        ],
+    )
+    candidate_set = CandidateSet.from_candidates(boa=boa, candidates=candidates)
+
+    with pytest.raises(RuntimeError):
+        candidate_set.objective
+
+    costs = get_instruction_costs(candidates=candidate_set, rates=rates)
+    assert costs.tolist() == [get_instruction_cost(instruction=candidate, rates=rates) for candidate in candidates]
+
+
+def test_candidate_set__missing_rate(boa, candidates) -> None:
+    candidate_set = CandidateSet.from_candidates(boa=boa, candidates=candidates)
+    with pytest.raises(RuntimeError):
+        get_instruction_costs(candidates=candidate_set, rates=KeyStore(keys=get_keys(Rate), objects=[]))
+
+
+def test_get_hours__ignores_days() -> None:
+    boa = BOAFactory(start=datetime(2020, 1, 1, 1), end=datetime(2020, 1, 2, 3))
+    candidate = Candidate(asset=AssetFactory(), boa=boa, mw=1)
+    candidate_set = CandidateSet.from_candidates(boa=boa, candidates=[candidate])
+    assert np.array_equal(candidate_set.hours, [candidate.hours])
@@ -0,0 +1,42 @@
+import pickle
+from dataclasses import FrozenInstanceError, dataclass, replace
+from typing import Optional
+
+import pytest
+
+from bmu_balancer.models.utils import compact
+
+
+@compact(hash_fields=("id",))
+@dataclass(frozen=True)
+class Item:
+    id: int
+    name: str
+    size: Optional[int] = None
+
+
+def test_compact__slots() -> None:
+    item = Item(id=1, name="one")
+    assert not hasattr(item, "__dict__")
+    assert item.size is None
+    assert replace(item, size=2) == Item(id=1, name="one", size=2)
+
+    with pytest.raises(FrozenInstanceError):
+        item.name = "two"
+
+
+def test_compact__hash() -> None:
+    item = Item(id=1, name="one")
+    assert hash(item) == hash(Item(id=1, name="one"))
+    # Only the id is hashed, equality still uses every field
+    assert hash(item) == hash(Item(id=1, name="two"))
+    assert item != Item(id=1, name="two")
+    assert len({item, Item(id=1, name="one"), Item(id=1, name="two")}) == 2
+
+
+def test_compact__pickle() -> None:
+    item = Item(id=1, name="one", size=3)
+    hash(item)
+    copy = pickle.loads(pickle.dumps(item))
+    assert copy == item
+    assert hash(copy) == hash(item)
@@ -0,0 +1,88 @@
+from dataclasses import replace
+from datetime import timedelta
+
+import pytest
+
+from bmu_balancer.models import AssetState, Instruction
+from bmu_balancer.operations.key_store import KeyStore, get_keys
+from bmu_balancer.operations.pre_solve.candidate_cache import CandidateCache
+from bmu_balancer.operations.pre_solve.generate_instruction_candidates import generate_candidate_set
+from tests.factories import BOA_START, assert_same_candidates, make_input
+
+EXECUTION_TIME = BOA_START - timedelta(minutes=20)
+
+
+def generate(boa, states, instructions, candidate_cache=None, execution_time=EXECUTION_TIME):
+    return generate_candidate_set(
+        boa=boa,
+        states=KeyStore(keys=get_keys(AssetState), objects=states),
+        instructions=KeyStore(keys=get_keys(Instruction), objects=instructions),
+        execution_time=execution_time,
+        candidate_cache=candidate_cache,
+    )
+
+
+def test_candidate_cache__reuses_unchanged_assets():
+    boa, states, instructions = make_input(seed=2, mw=500)
+    n_assets = len(boa.assets)
+    cache = CandidateCache()
+
+    expected = generate(boa, states, instructions)
+    assert_same_candidates(generate(boa, states, instructions, candidate_cache=cache), expected)
+    assert (cache.stats.hits, cache.stats.misses) == (0, n_assets)
+    assert_same_candidates(generate(boa, states, instructions, candidate_cache=cache), expected)
+    assert (cache.stats.hits, cache.stats.misses) == (n_assets, n_assets)
+
+    # Only the asset with a changed state is regenerated
+    changed = replace(states[0], available=not states[0].available)
+    states = [changed] + states[1:]
+    actual = generate(boa, states, instructions, candidate_cache=cache)
+    assert (cache.stats.hits, cache.stats.misses) == (2 * n_assets - 1, n_assets + 1)
+    assert_same_candidates(actual, generate(boa, states, instructions))
+
+    # As is every asset for a BOA with a different mw
+    generate(replace(boa, mw=-500), states, instructions, candidate_cache=cache)
+    assert cache.stats.misses == 2 * n_assets + 1
+
+
+def test_candidate_cache__execution_time_bucket():
+    boa, states, instructions = make_input(seed=3, mw=500)
+    exact, bucketed = CandidateCache(), CandidateCache(execution_time_bucket=timedelta(minutes=5))
+
+    for cache in (exact, bucketed):
+        generate(boa, states, instructions, candidate_cache=cache, execution_time=BOA_START - timedelta(minutes=20))
+        generate(boa, states, instructions, candidate_cache=cache, execution_time=BOA_START - timedelta(minutes=19))
+
+    assert exact.stats.hits == 0
+    assert bucketed.stats.hits == len(boa.assets)
+
+
+def test_candidate_cache__execution_time_bucket_is_deliverable():
+    boa, states, instructions = make_input(seed=5, mw=500)
+    cache = CandidateCache(execution_time_bucket=timedelta(minutes=5))
+    earlier, later = BOA_START - timedelta(minutes=20), BOA_START - timedelta(minutes=16)
+
+    latest = cache.get_generation_time(earlier)
+    assert later <= latest < earlier + timedelta(minutes=5)
+    assert cache.get_generation_time(later) == latest
+
+    # Candidates cached at the earlier time are those for the latest time in the bucket,
+    # so they keep the notice periods of the later time that reuses them
+    cached = generate(boa, states, instructions, candidate_cache=cache, execution_time=earlier)
+    assert_same_candidates(cached, generate(boa, states, instructions, execution_time=latest))
+    assert_same_candidates(generate(boa, states, instructions, candidate_cache=cache, execution_time=later), cached)
+    assert cache.stats.hits == len(boa.assets)
+
+
+def test_candidate_cache__eviction():
+    boa, states, instructions = make_input(seed=4, mw=500)
+    cache = CandidateCache(max_size=10)
+    generate(boa, states, instructions, candidate_cache=cache)
+
+    assert len(cache) == 10
+    assert cache.stats.evictions == len(boa.assets) - 10
+
+
+def test_candidate_cache__bucket_must_be_positive():
+    with pytest.raises(RuntimeError):
+        CandidateCache(execution_time_bucket=timedelta(0))
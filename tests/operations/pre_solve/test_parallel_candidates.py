@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+import pytest
+
+from bmu_balancer.models import AssetState, Instruction
+from bmu_balancer.operations.columnar import AssetStateColumns
+from bmu_balancer.operations.key_store import KeyStore, get_keys
+from bmu_balancer.operations.pre_solve.generate_instruction_candidates import generate_candidate_set
+from bmu_balancer.operations.pre_solve.parallel_candidates import (
+    generate_candidate_set_parallel,
+    get_chunk_candidates,
+)
+from tests.factories import BOA_START, assert_same_candidates, make_input
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+@pytest.mark.parametrize("columnar", [False, True])
+def test_generate_candidate_set_parallel__matches_serial(chunk_size: int, columnar: bool):
+    boa, states, instructions = make_input(seed=1, mw=500)
+    state_store = AssetStateColumns.from_states(states) if columnar else KeyStore(
+        keys=get_keys(AssetState),
+        objects=states,
+    )
+    instruction_store = KeyStore(keys=get_keys(Instruction), objects=instructions)
+    execution_time = BOA_START - timedelta(minutes=20)
+
+    expected = generate_candidate_set(
+        boa=boa,
+        states=state_store,
+        instructions=instruction_store,
+        execution_time=execution_time,
+    )
+    actual = generate_candidate_set_parallel(
+        boa=boa,
+        states=state_store,
+        instructions=instruction_store,
+        execution_time=execution_time,
+        workers=2,
+        chunk_size=chunk_size,
+    )
+
+    assert_same_candidates(actual, expected)
+
+
+def test_generate_candidate_set_parallel__chunk_size(boa):
+    with pytest.raises(RuntimeError):
+        generate_candidate_set_parallel(
+            boa=boa,
+            states=KeyStore(keys=get_keys(AssetState), objects=[]),
+            instructions=KeyStore(keys=get_keys(Instruction), objects=[]),
+            execution_time=BOA_START,
+            chunk_size=0,
+        )
+
+
+def test_get_chunk_candidates__not_initialised():
+    with pytest.raises(RuntimeError):
+        get_chunk_candidates((0, 1))
@@ -0,0 +1,94 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from bmu_balancer.models import AssetState, Instruction
+from bmu_balancer.operations.columnar import AssetStateColumns, InstructionColumns
+from bmu_balancer.operations.key_store import KeyStore, get_keys
+from bmu_balancer.operations.pre_solve.generate_instruction_candidates import generate_candidate_set
+from bmu_balancer.operations.pre_solve.vectorised_candidates import (
+    generate_candidate_set_vectorised,
+    get_mw_grids,
+)
+from tests.factories import BOA_START, AssetFactory, BOAFactory, assert_same_candidates, make_input
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("mw", [500, 45, -500, -45])
+@pytest.mark.parametrize("columnar", [False, True])
+def test_generate_candidate_set_vectorised__matches_scalar(seed: int, mw: int, columnar: bool):
+    boa, states, instructions = make_input(seed=seed, mw=mw)
+    state_store = KeyStore(keys=get_keys(AssetState), objects=states)
+    instruction_store = KeyStore(keys=get_keys(Instruction), objects=instructions)
+    expected = generate_candidate_set(
+        boa=boa,
+        states=state_store,
+        instructions=instruction_store,
+        execution_time=BOA_START - timedelta(minutes=20),
+    )
+    if columnar:
+        state_store = AssetStateColumns.from_states(states)
+        instruction_store = InstructionColumns.from_instructions(instructions)
+
+    actual = generate_candidate_set(
+        boa=boa,
+        states=state_store,
+        instructions=instruction_store,
+        execution_time=BOA_START - timedelta(minutes=20),
+        vectorised=True,
+    )
+    assert len(expected) > 0
+    assert_same_candidates(actual, expected)
+
+
+def test_generate_candidate_set_vectorised__time_zones():
+    tz = timezone(timedelta(hours=2))
+    boa, states, instructions = make_input(seed=0, mw=500, tz=tz)
+    execution_time = BOA_START.replace(tzinfo=tz) - timedelta(minutes=20)
+    expected = generate_candidate_set(
+        boa=boa,
+        states=KeyStore(keys=get_keys(AssetState), objects=states),
+        instructions=KeyStore(keys=get_keys(Instruction), objects=instructions),
+        execution_time=execution_time,
+    )
+    actual = generate_candidate_set_vectorised(
+        boa=boa,
+        states=AssetStateColumns.from_states(states),
+        instructions=InstructionColumns.from_instructions(instructions),
+        execution_time=execution_time,
+    )
+    assert_same_candidates(actual, expected)
+    assert actual.get_candidate(0).start.tzinfo == tz
+
+    with pytest.raises(TypeError):
+        generate_candidate_set_vectorised(
+            boa=boa,
+            states=AssetStateColumns.from_states(states),
+            instructions=InstructionColumns.from_instructions(instructions),
+            execution_time=BOA_START,
+        )
+
+
+def test_generate_candidate_set_vectorised__no_history(boa: BOAFactory):
+    candidates = generate_candidate_set_vectorised(
+        boa=boa,
+        states=AssetStateColumns.from_states([]),
+        instructions=InstructionColumns.from_instructions([]),
+        execution_time=datetime(2000, 1, 1),
+    )
+    assert len(candidates) == 0
+    assert candidates.assets == ()
+
+
+def test_get_mw_grids(asset: AssetFactory, boa: BOAFactory):
+    start = np.array([0], dtype=np.int64)
+    end = np.array([30 * 60 * 1000000], dtype=np.int64)
+
+    # 500mw for half an hour exceeds the 200 capacity, so is bound to 400mw
+    first, step, counts = get_mw_grids(assets=[asset], boa=boa, start=start, end=end)
+    assert (first.tolist(), step.tolist(), counts.tolist()) == ([0], [10], [41])
+
+    single = replace(asset, single_import_mw_hr=40)
+    first, step, counts = get_mw_grids(assets=[single], boa=replace(boa, mw=-500), start=start, end=end)
+    assert (first.tolist(), step.tolist(), counts.tolist()) == ([0], [-40], [2])
@@ -0,0 +1,153 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from bmu_balancer.models import AssetState, Instruction
+from bmu_balancer.operations.columnar import AssetStateColumns, InstructionColumns
+from bmu_balancer.operations.key_store import KeyStore, get_keys
+from bmu_balancer.operations.pre_solve.check_instruction_is_valid import asset_can_be_assigned_to_boa
+from bmu_balancer.operations.utils import to_epoch_us
+from tests.factories import AssetFactory, AssetStateFactory, InstructionFactory
+
+START = datetime(2000, 1, 1)
+
+
+@pytest.fixture
+def states(asset: AssetFactory):
+    other = AssetFactory(id=0)
+    return [
+        AssetStateFactory(asset=asset, start=START + timedelta(hours=2), end=START + timedelta(hours=3)),
+        AssetStateFactory(asset=asset, start=START, end=START + timedelta(hours=1)),
+        AssetStateFactory(asset=asset, start=START + timedelta(hours=1), end=START + timedelta(hours=2), available=False),
+        AssetStateFactory(asset=other, start=START, end=START + timedelta(hours=5)),
+    ]
+
+
+@pytest.mark.parametrize(
+    "start_hour, end_hour",
+    [(0, 0), (0.5, 0.75), (1, 1), (1.5, 2.5), (3, 4), (4, 5), (-1, 10)],
+)
+def test_asset_state_columns__matches_key_store(states, asset: AssetFactory, start_hour: float, end_hour: float):
+    columns = AssetStateColumns.from_states(states)
+    key_store = KeyStore(keys=get_keys(AssetState), objects=states)
+    start = START + timedelta(hours=start_hour)
+    end = START + timedelta(hours=end_hour)
+
+    assert columns.get_for_period(start=start, end=end, asset=asset) == key_store.get_for_period(
+        start=start, end=end, asset=asset,
+    )
+    assert columns.get_at_time(time=start, asset=asset) == key_store.get_at_time(time=start, asset=asset)
+
+
+def test_asset_state_columns__get(states, asset: AssetFactory):
+    columns = AssetStateColumns.from_states(states)
+
+    assert len(columns) == 4
+    assert [state.start for state in columns.get(asset=asset)] == [
+        START, START + timedelta(hours=1), START + timedelta(hours=2),
+    ]
+    assert columns.get(asset=AssetFactory(id=100)) == []
+    with pytest.raises(RuntimeError):
+        columns.get(asset=asset, available=True)
+
+
+def test_asset_state_columns__get_availability(states, asset: AssetFactory):
+    columns = AssetStateColumns.from_states(states)
+    assets = [asset, states[-1].asset, AssetFactory(id=100)]
+
+    available = columns.get_availability(assets=assets, start=START, end=START + timedelta(minutes=30))
+    assert available.tolist() == [True, True, False]
+
+    available = columns.get_availability(assets=assets, start=START, end=START + timedelta(hours=3))
+    assert available.tolist() == [False, True, False]
+
+    available = columns.get_availability(assets=assets, start=START + timedelta(hours=6), end=START + timedelta(hours=7))
+    assert available.tolist() == [False, False, False]
+
+
+def test_asset_state_columns__time_zones(asset: AssetFactory):
+    aware = AssetStateFactory(
+        asset=asset,
+        start=datetime(2000, 1, 1, tzinfo=timezone.utc),
+        end=datetime(2000, 1, 1, 1, tzinfo=timezone.utc),
+    )
+    columns = AssetStateColumns.from_states([aware])
+
+    assert columns.get(asset=asset) == [aware]
+    with pytest.raises(TypeError):
+        columns.get_at_time(time=datetime(2000, 1, 1), asset=asset)
+    with pytest.raises(RuntimeError):
+        AssetStateColumns.from_states([aware, AssetStateFactory(asset=asset, start=START)])
+
+
+def test_asset_state_columns__empty():
+    columns = AssetStateColumns.from_states([])
+    assert columns.get(asset=AssetFactory()) == []
+    assert columns.get_availability(assets=[AssetFactory()], start=START, end=START).tolist() == [False]
+    assert np.array_equal(columns.offsets, [0])
+    # With no times stored either aware or naive times can be queried, as with a KeyStore
+    aware = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    assert columns.get_for_period(start=aware, end=aware, asset=AssetFactory()) == []
+
+
+def test_asset_can_be_assigned_to_boa__columnar(states, asset: AssetFactory, boa):
+    columns = AssetStateColumns.from_states([
+        AssetStateFactory(asset=asset, start=boa.start - timedelta(hours=1), end=boa.end, available=True),
+    ])
+    assert asset_can_be_assigned_to_boa(
+        asset=asset,
+        boa=boa,
+        states=columns,
+        current_instruction=None,
+        prior_instruction=None,
+    )
+
+
+def test_instruction_columns__matches_key_store(asset: AssetFactory):
+    instructions = [
+        InstructionFactory(id=1, asset=asset, mw=5.0, start=START + timedelta(hours=1), end=START + timedelta(hours=2)),
+        InstructionFactory(id=2, asset=asset, mw=10.0, start=START, end=START + timedelta(hours=1)),
+        InstructionFactory(id=3, mw=1.0, start=START, end=START + timedelta(hours=1)),
+    ]
+    # The BOA an instruction was for isn't stored
+    instructions = [replace(instruction, boa=None) for instruction in instructions]
+    columns = InstructionColumns.from_instructions(instructions)
+    key_store = KeyStore(keys=get_keys(Instruction), objects=instructions)
+
+    assert columns.get(asset=asset) == [instructions[1], instructions[0]]
+    assert columns.get_at_time(time=START + timedelta(minutes=90), asset=asset) == key_store.get_at_time(
+        time=START + timedelta(minutes=90), asset=asset,
+    )
+    assert sorted(columns, key=lambda x: x.id) == instructions
+
+    with pytest.raises(RuntimeError):
+        InstructionColumns.from_instructions([InstructionFactory(id=None)])
+
+
+def test_instruction_columns__get_current_and_prior_end(asset: AssetFactory):
+    other, unknown = AssetFactory(), AssetFactory()
+    instructions = [
+        InstructionFactory(id=1, asset=asset, start=START - timedelta(hours=2), end=START - timedelta(hours=1)),
+        InstructionFactory(id=2, asset=asset, start=START - timedelta(minutes=10), end=START + timedelta(hours=1)),
+        InstructionFactory(id=3, asset=other, start=START - timedelta(hours=3), end=START - timedelta(hours=2)),
+        InstructionFactory(id=4, asset=other, start=START + timedelta(hours=1), end=START + timedelta(hours=2)),
+    ]
+    columns = InstructionColumns.from_instructions(instructions)
+    assets = [asset, other, unknown]
+
+    current = columns.get_current(assets=assets, time=START)
+    assert current[1:].tolist() == [-1, -1]
+    assert int(columns.id[current[0]]) == 2
+
+    prior_end, found = columns.get_prior_end(assets=assets, time=START)
+    assert found.tolist() == [True, True, False]
+    assert prior_end[:2].tolist() == [to_epoch_us(START - timedelta(hours=1)), to_epoch_us(START - timedelta(hours=2))]
+
+    overlapping = InstructionFactory(id=5, asset=asset, start=START, end=START + timedelta(minutes=5))
+    with pytest.raises(RuntimeError):
+        InstructionColumns.from_instructions(instructions + [overlapping]).get_current(assets=assets, time=START)
+    # Overlapping instructions only matter for the assets asked about
+    overlapped = InstructionColumns.from_instructions(instructions + [overlapping])
+    assert overlapped.get_current(assets=[other, unknown], time=START).tolist() == [-1, -1]
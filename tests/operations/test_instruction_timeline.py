@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+
+from bmu_balancer.models import Asset, Instruction
+from bmu_balancer.operations.instruction_timeline import InstructionTimeline
+from bmu_balancer.operations.key_store import KeyStore, get_keys
+from tests.factories import InstructionFactory
+
+
+@pytest.fixture
+def timeline(
+        previous_instruction: InstructionFactory,
+        current_instruction: InstructionFactory,
+        future_instruction: InstructionFactory,
+) -> InstructionTimeline:
+    return InstructionTimeline.from_instructions([
+        future_instruction,
+        current_instruction,
+        previous_instruction,
+        InstructionFactory(),
+    ])
+
+
+def test_instruction_timeline__prior(
+        timeline: InstructionTimeline,
+        asset: Asset,
+        previous_instruction: InstructionFactory,
+        current_instruction: InstructionFactory,
+) -> None:
+    assert timeline.prior(asset=asset, time=datetime(2000, 1, 1, 5)) is None
+    assert timeline.prior(asset=asset, time=datetime(2000, 1, 1, 10)) == previous_instruction
+    assert timeline.prior(asset=asset, time=datetime(2000, 1, 1, 11)) == current_instruction
+
+
+def test_instruction_timeline__current(
+        timeline: InstructionTimeline,
+        asset: Asset,
+        current_instruction: InstructionFactory,
+) -> None:
+    assert timeline.current(asset=asset, time=datetime(2000, 1, 1, 10)) == current_instruction
+    assert timeline.current(asset=asset, time=datetime(2000, 1, 1, 11)) is None
+
+
+def test_instruction_timeline__next(
+        timeline: InstructionTimeline,
+        asset: Asset,
+        current_instruction: InstructionFactory,
+        future_instruction: InstructionFactory,
+) -> None:
+    assert timeline.next(asset=asset, time=datetime(2000, 1, 1, 9)) == current_instruction
+    assert timeline.next(asset=asset, time=datetime(2000, 1, 1, 10)) == future_instruction
+    assert timeline.next(asset=asset, time=datetime(2000, 1, 1, 12)) is None
+
+
+def test_instruction_timeline__unknown_asset(timeline: InstructionTimeline) -> None:
+    other = InstructionFactory().asset
+    assert timeline.prior(asset=other, time=datetime(2000, 1, 1)) is None
+    assert timeline.current(asset=other, time=datetime(2000, 1, 1)) is None
+    assert timeline.next(asset=other, time=datetime(2000, 1, 1)) is None
+
+
+def test_instruction_timeline__does_not_mutate_key_store(
+        asset: Asset,
+        previous_instruction: InstructionFactory,
+        current_instruction: InstructionFactory,
+        future_instruction: InstructionFactory,
+) -> None:
+    instructions = KeyStore(
+        keys=get_keys(Instruction),
+        objects=[future_instruction, previous_instruction, current_instruction],
+        indexes=("asset",),
+    )
+    timeline = InstructionTimeline.from_key_store(instructions=instructions, assets=[asset])
+
+    assert timeline.prior(asset=asset, time=datetime(2000, 1, 1, 10)) == previous_instruction
+    assert instructions.get(asset=asset) == [future_instruction, previous_instruction, current_instruction]
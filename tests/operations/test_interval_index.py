@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import List
+
+import pytest
+
+from bmu_balancer.operations.interval_index import IntervalIndex
+from tests.factories import ITEM_FOUR, ITEM_ONE, ITEM_THREE, ITEM_TWO, Item
+
+LONG_ITEM = Item(name="Marrow", start=datetime(1999, 12, 1), end=datetime(2000, 1, 2, 12), type="Vegetable")
+
+INDEX = IntervalIndex.from_items([ITEM_FOUR, LONG_ITEM, ITEM_TWO, ITEM_ONE, ITEM_THREE])
+
+
+@pytest.mark.parametrize(
+    "start, end, expected_output",
+    [
+        # 1. Before all items
+        (datetime(1999, 1, 1), datetime(1999, 1, 2), []),
+        # 2. After all items
+        (datetime(2000, 1, 4), datetime(2000, 1, 5), []),
+        # 3. Only the long running item
+        (datetime(1999, 12, 15), datetime(1999, 12, 16), [LONG_ITEM]),
+        # 4. Touching the end of an item counts as overlapping
+        (datetime(2000, 1, 1, 1), datetime(2000, 1, 1, 6), [LONG_ITEM, ITEM_ONE, ITEM_THREE]),
+        # 5. Long item is found behind shorter items that have finished
+        (datetime(2000, 1, 2, 2), datetime(2000, 1, 2, 3), [LONG_ITEM]),
+        # 6. Everything
+        (datetime(1999, 1, 1), datetime(2001, 1, 1), [LONG_ITEM, ITEM_ONE, ITEM_THREE, ITEM_TWO, ITEM_FOUR]),
+    ],
+)
+def test_interval_index__overlapping(start: datetime, end: datetime, expected_output: List[Item]) -> None:
+    assert INDEX.overlapping(start=start, end=end) == expected_output
+
+
+def test_interval_index__at_time() -> None:
+    assert INDEX.at_time(time=datetime(2000, 1, 3)) == [ITEM_FOUR]
+    assert IntervalIndex.from_items([]).at_time(time=datetime(2000, 1, 3)) == []
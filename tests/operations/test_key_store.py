@@ -38,3 +38,55 @@ def test_key_store__get(key_store: KeyStore):
     output = key_store.get(capacity=0)
     assert len(output) == 3
     assert len(key_store._cache) == 2
+
+
+@pytest.fixture
+def indexed_key_store() -> KeyStore:
+    return KeyStore(
+        keys=["name", "capacity"],
+        objects=[
+            AssetFactory(name="One", capacity=0),
+            AssetFactory(name="Two", capacity=0),
+            AssetFactory(name="Two", capacity=1),
+        ],
+        indexes=("name", ("name", "capacity")),
+    )
+
+
+def test_key_store__indexed__get(indexed_key_store: KeyStore):
+    output = indexed_key_store.get(name="Two")
+    assert [asset.capacity for asset in output] == [0, 1]
+    assert indexed_key_store.get(name="Other") == []
+    assert indexed_key_store._cache == {}
+
+
+def test_key_store__indexed__composite(indexed_key_store: KeyStore):
+    output = indexed_key_store.get_one_or_none(capacity=1, name="Two")
+    assert output.name == "Two"
+    assert output.capacity == 1
+    assert indexed_key_store._cache == {}
+
+
+def test_key_store__indexed__partial_scan(indexed_key_store: KeyStore):
+    # Capacity alone is not indexed, so the full store is scanned and cached.
+    output = indexed_key_store.get(capacity=0)
+    assert [asset.name for asset in output] == ["One", "Two"]
+    assert indexed_key_store._cache[(None, 0)] == output
+
+
+def test_key_store__bounded_cache():
+    key_store = KeyStore(
+        keys=["name"],
+        objects=[AssetFactory(name="One"), AssetFactory(name="Two")],
+        cache_size=1,
+    )
+    key_store.get(name="One")
+    key_store.get(name="Two")
+    key_store.get(name="Two")
+
+    assert list(key_store._cache) == [("Two",)]
+    stats = key_store.cache_stats
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (1, 2, 1, 1)
+
+    key_store.invalidate_cache(name="Two")
+    assert key_store._cache == {}
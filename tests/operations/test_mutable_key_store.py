@@ -0,0 +1,111 @@
+from threading import Thread
+
+import pytest
+
+from bmu_balancer.models import AssetState
+from bmu_balancer.operations.key_store import get_keys
+from bmu_balancer.operations import mutable_key_store
+from bmu_balancer.operations.mutable_key_store import MutableKeyStore
+from tests.factories import AssetFactory, AssetStateFactory
+
+
+@pytest.fixture
+def store(asset: AssetFactory) -> MutableKeyStore:
+    return MutableKeyStore(
+        keys=get_keys(AssetState),
+        objects=[AssetStateFactory(id=1, asset=asset), AssetStateFactory(id=2)],
+        indexes=("asset",),
+    )
+
+
+def test_mutable_key_store__snapshot_is_isolated(store: MutableKeyStore, asset: AssetFactory) -> None:
+    before = store.snapshot()
+    assert store.snapshot() is before
+
+    added = AssetStateFactory(id=3, asset=asset)
+    store.insert(added)
+    after = store.snapshot()
+
+    assert [state.id for state in before.get(asset=asset)] == [1]
+    assert [state.id for state in after.get(asset=asset)] == [1, 3]
+    assert len(before.objects) == 2
+    assert len(after.objects) == 3
+
+
+def test_mutable_key_store__update(store: MutableKeyStore, asset: AssetFactory) -> None:
+    before = store.snapshot()
+    other = before.get_one_or_none(id=2).asset
+
+    # Same asset, updated in place
+    store.update(AssetStateFactory(id=1, asset=asset, available=False))
+    # Moved to a different asset
+    store.update(AssetStateFactory(id=2, asset=asset))
+    after = store.snapshot()
+
+    assert [(state.id, state.available) for state in after.get(asset=asset)] == [(1, False), (2, True)]
+    assert after.get(asset=other) == []
+    assert before.get_one_or_none(asset=other).id == 2
+
+
+def test_mutable_key_store__delete(store: MutableKeyStore, asset: AssetFactory) -> None:
+    before = store.snapshot()
+    store.delete(before.get_one_or_none(asset=asset))
+
+    assert store.snapshot().get(asset=asset) == []
+    assert len(store) == 1
+    assert len(before.get(asset=asset)) == 1
+
+
+def test_mutable_key_store__snapshot_shares_untouched_chunks(asset: AssetFactory, monkeypatch) -> None:
+    monkeypatch.setattr(mutable_key_store, 'CHUNK_SIZE', 2)
+    store = MutableKeyStore(keys=get_keys(AssetState), objects=[
+        AssetStateFactory(id=n, asset=asset) for n in range(5)
+    ])
+    before = store.snapshot()
+
+    store.update(AssetStateFactory(id=2, asset=asset, available=False))
+    store.delete(before[4])
+    store.insert(AssetStateFactory(id=5, asset=asset))
+    after = store.snapshot()
+
+    # Only the chunk holding the updated object is copied, the emptied one is dropped
+    assert after.objects._chunks[0] is before.objects._chunks[0]
+    assert after.objects._chunks[1] is not before.objects._chunks[1]
+    assert [state.id for state in before.objects] == [0, 1, 2, 3, 4]
+    assert [state.id for state in after.objects] == [0, 1, 2, 3, 5]
+    assert before[2].available and not after[2].available
+    assert after[-1].id == 5
+    assert [state.id for state in after.objects[1:3]] == [1, 2]
+    with pytest.raises(IndexError):
+        after[5]
+
+
+def test_mutable_key_store__invalid_writes(store: MutableKeyStore) -> None:
+    with pytest.raises(RuntimeError):
+        store.insert(AssetStateFactory(id=1))
+    with pytest.raises(RuntimeError):
+        store.update(AssetStateFactory(id=10))
+    with pytest.raises(RuntimeError):
+        store.delete(AssetStateFactory(id=10))
+
+
+def test_mutable_key_store__concurrent_readers(store: MutableKeyStore, asset: AssetFactory) -> None:
+    errors = []
+
+    def read() -> None:
+        for _ in range(200):
+            snapshot = store.snapshot()
+            expected = [state for state in snapshot.objects if state.asset == asset]
+            if snapshot.get(asset=asset) != expected:
+                errors.append(snapshot)
+
+    readers = [Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for n in range(200):
+        store.insert(AssetStateFactory(id=100 + n, asset=asset))
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert len(store.snapshot().get(asset=asset)) == 201
@@ -0,0 +1,46 @@
+import pickle
+
+import pytest
+
+from bmu_balancer.operations.query_cache import CacheStats, QueryCache
+
+
+def test_query_cache__lru_eviction() -> None:
+    cache = QueryCache(max_size=2)
+    cache.store("a", [1])
+    cache.store("b", [2])
+
+    # Looking up "a" makes "b" the least recently used
+    assert cache.lookup("a") == [1]
+    cache.store("c", [3])
+
+    assert cache.lookup("b") is None
+    assert list(cache) == ["a", "c"]
+    assert cache.stats == CacheStats(hits=1, misses=1, evictions=1, size=2)
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_query_cache__invalidate() -> None:
+    cache = QueryCache()
+    cache.store("a", [1])
+    cache.store("b", [2])
+
+    cache.invalidate("a")
+    assert list(cache) == ["b"]
+
+    cache.invalidate()
+    assert cache == {}
+
+
+def test_query_cache__pickle_keeps_policy_only() -> None:
+    cache = QueryCache(max_size=3)
+    cache.store("a", [1])
+
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.max_size == 3
+    assert copy == {}
+
+
+def test_query_cache__invalid_size() -> None:
+    with pytest.raises(RuntimeError):
+        QueryCache(max_size=0)
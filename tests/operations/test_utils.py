@@ -1,4 +1,3 @@
-from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, List
 
@@ -6,20 +5,7 @@ import pytest
 
 from bmu_balancer.operations.key_store import KeyStore
 from bmu_balancer.operations.utils import get_item_at_time, get_items_for_period
-
-
-@dataclass
-class Item:
-    name: str
-    start: datetime
-    end: datetime
-    type: str
-
-
-ITEM_ONE = Item(name="Orange", start=datetime(2000, 1, 1), end=datetime(2000, 1, 1, 1), type="Fruit")
-ITEM_TWO = Item(name="Apple", start=datetime(2000, 1, 2), end=datetime(2000, 1, 2, 1), type="Fruit")
-ITEM_THREE = Item(name="Carrot", start=datetime(2000, 1, 1), end=datetime(2000, 1, 1, 1), type="Vegetable")
-ITEM_FOUR = Item(name="Carrot", start=datetime(2000, 1, 3), end=datetime(2000, 1, 3, 1), type="Vegetable")
+from tests.factories import ITEM_FOUR, ITEM_ONE, ITEM_THREE, ITEM_TWO, Item
 
 
 TEST_KEY_STORE = KeyStore(
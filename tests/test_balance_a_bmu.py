@@ -1,8 +1,20 @@
+from datetime import timedelta
+from typing import Optional
+
+import pytest
+
 from bmu_balancer.balance_a_bmu import balance_a_bmu
+from bmu_balancer.models.engine import SolverOptions
 from tests import SIMPLE_INPUT_FILEPATH
 
 
-def test_balance_a_bmu() -> None:
+@pytest.mark.parametrize("columnar_states", [False, True], ids=["KeyStore states", "Columnar states"])
+@pytest.mark.parametrize(
+    "stream_input, state_window",
+    [(False, None), (True, None), (False, timedelta(0))],
+    ids=["Loaded input", "Streamed input", "BOA input"],
+)
+def test_balance_a_bmu(columnar_states: bool, stream_input: bool, state_window: Optional[timedelta]) -> None:
     """THe God test to test all things.
 
     Check that the solver finds an optimal solution for
@@ -10,7 +22,12 @@ def test_balance_a_bmu() -> None:
     not left off with mw of zero.
     """
 
-    solution = balance_a_bmu(input_filepath=SIMPLE_INPUT_FILEPATH)
+    solution = balance_a_bmu(
+        input_filepath=SIMPLE_INPUT_FILEPATH,
+        columnar_states=columnar_states,
+        stream_input=stream_input,
+        state_window=state_window,
+    )
 
     assert solution.status == "Optimal"
     assert len(solution.instructions) == 2
@@ -21,3 +38,39 @@ def test_balance_a_bmu() -> None:
     }
     for instruction in solution.instructions:
         assert expected[instruction.asset.name] == instruction.mw
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(vectorised_candidates=True),
+        dict(workers=2, chunk_size=1),
+        dict(adaptive_grid=True),
+        dict(formulation="knapsack"),
+        dict(solver_options=SolverOptions(time_limit=60, gap_rel=0.01, threads=2)),
+    ],
+    ids=["Vectorised", "Parallel", "Adaptive grid", "Knapsack", "Solver options"],
+)
+def test_balance_a_bmu__candidate_generation(options: dict) -> None:
+    solution = balance_a_bmu(input_filepath=SIMPLE_INPUT_FILEPATH, **options)
+
+    assert solution.status == "Optimal"
+    assert {instruction.asset.name: instruction.mw for instruction in solution.instructions} == {
+        'Asset One': 100,
+        'Asset Two': 200,
+    }
+
+
+def test_balance_a_bmu__vectorised_and_parallel() -> None:
+    with pytest.raises(RuntimeError):
+        balance_a_bmu(input_filepath=SIMPLE_INPUT_FILEPATH, vectorised_candidates=True, workers=2)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [dict(stream_input=True), dict(state_window=timedelta(hours=1))],
+    ids=["Streamed", "State window"],
+)
+def test_balance_a_bmu__cache_and_stream(options: dict) -> None:
+    with pytest.raises(RuntimeError):
+        balance_a_bmu(input_filepath=SIMPLE_INPUT_FILEPATH, cache_input=True, **options)